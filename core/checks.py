@@ -0,0 +1,51 @@
+"""Checks that the cache is shared by every worker process.
+
+The knowledge version (``knowledge.cache``) and the product access lookups
+(``users.access``) are invalidated by writing to the cache. With a cache
+that lives in each process, such as LocMemCache, only the process that
+handled a write sees it; the others keep serving what they cached before,
+and a member whose access was revoked keeps it for up to
+PRODUCT_ACCESS_CACHE_TTL. gunicorn.conf.py therefore refuses to start more
+than one worker on such a cache, and ``manage.py check --deploy`` warns
+about it.
+"""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.core.exceptions import ImproperlyConfigured
+
+PER_PROCESS_CACHES = {"django.core.cache.backends.locmem.LocMemCache"}
+
+
+def cache_is_shared() -> bool:
+    """Whether the default cache is seen by every process (e.g. Redis, database)."""
+    return settings.CACHES["default"]["BACKEND"] not in PER_PROCESS_CACHES
+
+
+def require_shared_cache(workers: int) -> None:
+    """Refuse to run several worker processes on a per-process cache."""
+    if workers > 1 and not cache_is_shared():
+        raise ImproperlyConfigured(
+            f"{workers} workers cannot share {settings.CACHES['default']['BACKEND']}: "
+            "changes made by one worker would never reach the others' caches. "
+            "Set CACHE_BACKEND (and CACHE_LOCATION) to a shared cache such as "
+            "django.core.cache.backends.redis.RedisCache or "
+            "django.core.cache.backends.db.DatabaseCache, or WEB_CONCURRENCY=1."
+        )
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs) -> list[Warning]:
+    if cache_is_shared():
+        return []
+    return [
+        Warning(
+            "The default cache is kept in each process.",
+            hint=(
+                "Revoked product access and knowledge changes only reach the "
+                "process that made them. Set CACHE_BACKEND to a shared cache "
+                "unless a single process serves every request."
+            ),
+            id="core.W001",
+        )
+    ]
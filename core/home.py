@@ -0,0 +1,72 @@
+"""Product cards of the home page.
+
+The cards come from one query over the user's memberships, joined to each
+product and its ProductKnowledgeStats row, and are cached per user. A cached
+entry records the knowledge version of every product on it and is rebuilt as
+soon as one of them has moved on (one ``get_many`` to check). Membership and
+product changes delete the entry (see ``core.signals``); the TTL bounds how
+long a rebuild racing with a knowledge write can serve the older numbers.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.functions import Coalesce, Greatest
+
+from knowledge.cache import get_knowledge_versions
+from users.models import ProductMembership
+
+
+@dataclass(frozen=True)
+class ProductCard:
+    product_id: int
+    name: str
+    role: str
+    domain_count: int
+    subdomain_count: int
+    capability_count: int
+    last_updated: datetime
+
+    @property
+    def role_label(self) -> str:
+        return ProductMembership.Role(self.role).label
+
+
+def home_cache_key(user_id: int) -> str:
+    return f"core:home:{user_id}"
+
+
+def _load_cards(user_id: int) -> list[ProductCard]:
+    stats = "product__knowledge_stats__"
+    rows = (
+        ProductMembership.objects.filter(user_id=user_id, product__is_active=True)
+        .order_by("product__name", "product_id")
+        .values(
+            "product_id",
+            "role",
+            name=F("product__name"),
+            domain_count=Coalesce(F(f"{stats}domain_count"), 0),
+            subdomain_count=Coalesce(F(f"{stats}subdomain_count"), 0),
+            capability_count=Coalesce(F(f"{stats}capability_count"), 0),
+            # GREATEST skips NULL on PostgreSQL, i.e. knowledge never changed.
+            last_updated=Greatest("product__updated_at", f"{stats}changed_at"),
+        )
+    )
+    return [ProductCard(**row) for row in rows]
+
+
+def get_product_cards(user_id: int) -> list[ProductCard]:
+    """Return the cards of the user's active products, ordered by name."""
+    key = home_cache_key(user_id)
+    cached = cache.get(key)
+    if cached is not None:
+        versions, cards = cached
+        if get_knowledge_versions(versions) == versions:
+            return cards
+    cards = _load_cards(user_id)
+    versions = get_knowledge_versions(card.product_id for card in cards)
+    cache.set(key, (versions, cards), settings.PRODUCT_ACCESS_CACHE_TTL)
+    return cards
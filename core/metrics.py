@@ -0,0 +1,132 @@
+"""Prometheus metrics of the database connection pools.
+
+Every worker process has its own pool per database (see DATABASES in
+settings), so a scrape reports the worker that served it and each sample is
+labelled with that worker's ``pid``. Sum over pids to size workers x pool
+against PostgreSQL's ``max_connections``.
+"""
+
+import os
+
+from django.db import connections
+
+# (metric, type, help, psycopg_pool stats key, scale)
+POOL_METRICS = [
+    (
+        "skald_db_pool_min_size",
+        "gauge",
+        "Minimum connections kept open.",
+        "pool_min",
+        1,
+    ),
+    (
+        "skald_db_pool_max_size",
+        "gauge",
+        "Maximum connections the pool opens.",
+        "pool_max",
+        1,
+    ),
+    ("skald_db_pool_size", "gauge", "Connections currently open.", "pool_size", 1),
+    (
+        "skald_db_pool_available",
+        "gauge",
+        "Open connections not in use.",
+        "pool_available",
+        1,
+    ),
+    (
+        "skald_db_pool_requests_waiting",
+        "gauge",
+        "Requests waiting for a connection.",
+        "requests_waiting",
+        1,
+    ),
+    (
+        "skald_db_pool_requests_total",
+        "counter",
+        "Connections handed out.",
+        "requests_num",
+        1,
+    ),
+    (
+        "skald_db_pool_requests_queued_total",
+        "counter",
+        "Requests that had to wait for a connection.",
+        "requests_queued",
+        1,
+    ),
+    (
+        "skald_db_pool_requests_wait_seconds_total",
+        "counter",
+        "Time requests spent waiting for a connection.",
+        "requests_wait_ms",
+        0.001,
+    ),
+    (
+        "skald_db_pool_requests_errors_total",
+        "counter",
+        "Requests that got no connection in time.",
+        "requests_errors",
+        1,
+    ),
+    (
+        "skald_db_pool_connections_total",
+        "counter",
+        "Connections opened to the server.",
+        "connections_num",
+        1,
+    ),
+    (
+        "skald_db_pool_connections_seconds_total",
+        "counter",
+        "Time spent opening connections.",
+        "connections_ms",
+        0.001,
+    ),
+    (
+        "skald_db_pool_connections_errors_total",
+        "counter",
+        "Failed connection attempts.",
+        "connections_errors",
+        1,
+    ),
+    (
+        "skald_db_pool_connections_lost_total",
+        "counter",
+        "Connections found broken by the health check.",
+        "connections_lost",
+        1,
+    ),
+]
+
+
+def pool_stats() -> dict[str, dict[str, int]]:
+    """Return the psycopg_pool statistics of each pooled database alias."""
+    stats = {}
+    for connection in connections.all(initialized_only=True):
+        pool = getattr(connection, "pool", None)
+        if pool is not None:
+            stats[connection.alias] = pool.get_stats()
+    return stats
+
+
+def render_metrics() -> str:
+    """Return the pool metrics in the Prometheus text exposition format."""
+    stats = pool_stats()
+    pid = os.getpid()
+    lines = []
+    for name, kind, help_text, key, scale in POOL_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for alias, values in stats.items():
+            value = values.get(key, 0) * scale
+            lines.append(f'{name}{{alias="{alias}",pid="{pid}"}} {value:g}')
+
+    name = "skald_db_pool_utilization"
+    lines.append(f"# HELP {name} Share of the maximum pool size in use.")
+    lines.append(f"# TYPE {name} gauge")
+    for alias, values in stats.items():
+        in_use = values.get("pool_size", 0) - values.get("pool_available", 0)
+        utilization = in_use / values["pool_max"] if values.get("pool_max") else 0
+        lines.append(f'{name}{{alias="{alias}",pid="{pid}"}} {utilization:g}')
+    return "\n".join(lines) + "\n"
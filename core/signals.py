@@ -0,0 +1,21 @@
+"""Drop cached home page cards when a user's products change."""
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Product, ProductMembership
+
+from .home import home_cache_key
+
+
+@receiver([post_save, post_delete], sender=ProductMembership)
+def membership_changed(sender, instance: ProductMembership, **kwargs) -> None:
+    cache.delete(home_cache_key(instance.user_id))
+
+
+@receiver(post_save, sender=Product)
+def product_changed(sender, instance: Product, created: bool, **kwargs) -> None:
+    if not created:
+        user_ids = instance.memberships.values_list("user_id", flat=True)
+        cache.delete_many([home_cache_key(user_id) for user_id in user_ids])
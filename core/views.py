@@ -1,7 +1,14 @@
+import hmac
 from typing import Any
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import TemplateView
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.views.generic import TemplateView, View
+
+from .home import get_product_cards
+from .metrics import render_metrics
 
 
 class HomeView(LoginRequiredMixin, TemplateView):
@@ -9,9 +16,21 @@ class HomeView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        context["memberships"] = (
-            self.request.user.product_memberships.select_related("product")
-            .filter(product__is_active=True)
-            .order_by("product__name")
-        )
+        context["cards"] = get_product_cards(self.request.user.pk)
         return context
+
+
+class MetricsView(View):
+    """Prometheus metrics, for staff users or ``Bearer <METRICS_TOKEN>``."""
+
+    def get(self, request, *args, **kwargs):
+        if not (request.user.is_staff or self.has_metrics_token(request)):
+            raise PermissionDenied
+        return HttpResponse(
+            render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    def has_metrics_token(self, request) -> bool:
+        token = settings.METRICS_TOKEN
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        return bool(token) and hmac.compare_digest(supplied, token)
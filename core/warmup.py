@@ -0,0 +1,57 @@
+"""Warm up a worker process before it serves its first request.
+
+Django's cached template loader compiles each template on first use and the
+URL resolver builds its lookup tables on the first reverse(), so without a
+warm-up the first requests a worker serves after a (rolling) restart pay for
+both. gunicorn calls warm_up() from ``post_worker_init`` (see
+gunicorn.conf.py), once per worker, as each process has its own caches.
+"""
+
+import logging
+from pathlib import Path
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def warm_templates() -> int:
+    """Compile every template the Django engines can find; return how many."""
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        names = set()
+        for loader in backend.engine.template_loaders:
+            for directory in map(Path, loader.get_dirs()):
+                names.update(
+                    path.relative_to(directory).as_posix()
+                    for path in directory.rglob("*")
+                    if path.is_file()
+                )
+        for name in sorted(names):
+            try:
+                backend.engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError):
+                # Not every file in a template directory is a Django template.
+                logger.debug("Skipped %s while warming templates", name)
+            else:
+                compiled += 1
+    return compiled
+
+
+def warm_urls() -> None:
+    """Build the URL resolver's reverse and namespace lookup tables."""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.namespace_dict
+    resolver.app_dict
+
+
+def warm_up() -> int:
+    """Warm the template and URL caches; return how many templates compiled."""
+    templates = warm_templates()
+    warm_urls()
+    return templates
@@ -46,6 +46,16 @@ Feature: Capability Management
       When I view the capabilities in subdomain "Authentication"
       Then I see 3 capabilities
 
+    Scenario: Large capability lists load one page at a time
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And 60 capabilities exist in subdomain "Authentication"
+      When I view the capabilities in subdomain "Authentication"
+      Then I see 50 capabilities
+      When I scroll to the next page of capabilities
+      Then I see 10 capabilities
+
     Scenario: View capability details
       Given I am logged in as a product manager of "Acme Project"
       And the domain "User Access" exists in "Acme Project"
@@ -83,3 +93,119 @@ Feature: Capability Management
       And the capability "Login" exists in subdomain "Authentication"
       When I delete the capability "Login"
       Then the capability "Login" no longer exists in subdomain "Authentication"
+
+  Rule: Capabilities can be moved to another subdomain in bulk
+
+    Scenario: Picked capabilities move together
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the following capabilities exist in subdomain "Authentication":
+        | name           |
+        | Login          |
+        | Logout         |
+        | Password Reset |
+      And the domain "Security" exists in "Acme Project"
+      And the subdomain "Sessions" exists in domain "Security"
+      When I move the capabilities "Login, Logout" of "Authentication" to the subdomain "Sessions"
+      Then the capabilities "Login, Logout" are in the subdomain "Sessions"
+      And the subdomain "Authentication" holds 1 capability
+      And the subdomain "Sessions" holds 2 capabilities
+      And the domain "User Access" holds 1 subdomain and 1 capability
+      And the domain "Security" holds 1 subdomain and 2 capabilities
+      And the capability list is reloaded
+
+    Scenario: Name clashes are reported together and nothing is moved
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the following capabilities exist in subdomain "Authentication":
+        | name   |
+        | Login  |
+        | Logout |
+        | Signup |
+      And the subdomain "Sessions" exists in domain "User Access"
+      And the following capabilities exist in subdomain "Sessions":
+        | name   |
+        | Login  |
+        | Logout |
+      When I move the capabilities "Login, Logout, Signup" of "Authentication" to the subdomain "Sessions"
+      Then the move to "Sessions" is refused for the names "Login, Logout"
+      And the subdomain "Authentication" holds 3 capabilities
+      And the subdomain "Sessions" holds 2 capabilities
+
+  Rule: The subdomain of a new capability is picked by typing its name
+
+    Scenario: Subdomains starting with the text are suggested first
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the following subdomains exist in domain "User Access":
+        | name                      |
+        | Two-factor Authentication |
+        | Authentication            |
+        | Profiles                  |
+      When I look up subdomains matching "auth"
+      Then the suggestions are "User Access / Authentication, User Access / Two-factor Authentication"
+
+    Scenario: Only a few suggestions are returned
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And 25 subdomains exist in domain "User Access"
+      When I look up subdomains matching "subdomain"
+      Then there are 10 suggestions
+
+  Rule: Unchanged capability lists are served from cache
+
+    Scenario: Viewing the list again does not query the knowledge tables
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And I have viewed the capabilities of "Acme Project"
+      When I view the capabilities of "Acme Project" again
+      Then the capability list shows "Login"
+      And the capability list did not query the knowledge tables
+
+    Scenario: Unknown query parameters do not make a new cache entry
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And I have viewed the capabilities of "Acme Project"
+      When I view the capabilities of "Acme Project" again with "?x=1&utm_source=feed"
+      Then the capability list shows "Login"
+      And the capability list did not query the knowledge tables
+
+    Scenario: Changes show up on the next view
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And I have viewed the capabilities of "Acme Project"
+      When I update the capability "Login" with name "Sign In"
+      And I view the capabilities of "Acme Project" again
+      Then the capability list shows "Sign In"
+
+    Scenario: A browser revalidating an unchanged list gets 304
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And I have viewed the capabilities of "Acme Project"
+      When I revalidate the capabilities of "Acme Project"
+      Then the capability list is not sent again
+
+  Rule: Capability lists can be served by async (ASGI) workers
+
+    Scenario: The capability list is served through the ASGI handler
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      When I view the capabilities of "Acme Project" through ASGI
+      Then the capability list shows "Login"
+
+    Scenario: Anonymous ASGI requests are sent to the login page
+      Given the product "Acme Project" exists
+      When I view the capabilities of "Acme Project" through ASGI
+      Then I am sent to the login page
@@ -67,3 +67,116 @@ Feature: Domain Management
       When I delete the domain "User Access"
       Then the domain "User Access" no longer exists in "Acme Project"
       And the subdomain "Authentication" no longer exists
+
+    Scenario: The delete confirmation says what else will be deleted
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And the capability "Logout" exists in subdomain "Authentication"
+      When I open the delete page of the domain "User Access"
+      Then I am warned that 1 subdomain and 2 capabilities will also be deleted
+
+  Rule: Large domains are deleted in the background
+
+    Scenario: A large domain disappears at once and is deleted in batches
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And the capability "Logout" exists in subdomain "Authentication"
+      And knowledge is deleted in batches of 2 rows
+      When I delete the domain "User Access"
+      Then the domain "User Access" is being deleted
+      And "Acme Project" holds 0 domains, 0 subdomains and 0 capabilities
+      When I view the domains in "Acme Project"
+      Then I see 0 domains
+      When the background jobs have run
+      Then the subdomain "Authentication" no longer exists
+      And the deletion of "User Access" is finished
+
+    Scenario: The name of a domain being deleted can be used again at once
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And the capability "Logout" exists in subdomain "Authentication"
+      And knowledge is deleted in batches of 2 rows
+      When I delete the domain "User Access"
+      And I create a domain with name "User Access" in "Acme Project"
+      Then the domain "User Access" exists in "Acme Project"
+      And "Acme Project" holds 1 domain, 0 subdomains and 0 capabilities
+
+  Rule: Domain sizes are kept up to date as knowledge changes
+
+    Scenario: The domain list shows how much each domain contains
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And the capability "Logout" exists in subdomain "Authentication"
+      And the subdomain "Authorization" exists in domain "User Access"
+      When I view the domains in "Acme Project"
+      Then the domain "User Access" is listed with "2 subdomains / 2 capabilities"
+      And "Acme Project" holds 1 domain, 2 subdomains and 2 capabilities
+
+    Scenario: Moving a capability to another domain updates both domains
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And the domain "Planning" exists in "Acme Project"
+      And the subdomain "Roadmaps" exists in domain "Planning"
+      When the capability "Login" is moved to the subdomain "Roadmaps"
+      Then the domain "User Access" holds 1 subdomain and 0 capabilities
+      And the domain "Planning" holds 1 subdomain and 1 capability
+      And "Acme Project" holds 2 domains, 2 subdomains and 1 capability
+
+    Scenario: Deleting a domain removes everything below it from the totals
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      When I delete the domain "User Access"
+      Then "Acme Project" holds 0 domains, 0 subdomains and 0 capabilities
+
+    Scenario: Drifted counters are repaired by a recount
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      And the counters of "Acme Project" have drifted
+      When I recount the knowledge of "Acme Project"
+      Then the domain "User Access" holds 1 subdomain and 1 capability
+      And "Acme Project" holds 1 domain, 1 subdomain and 1 capability
+
+  Rule: Domains can be edited in place on the domain list
+
+    Scenario: The edit form opens without the page around it
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      When I open the edit form of the domain "User Access" from the domain list
+      Then I receive the form without the page layout
+
+    Scenario: Renaming a domain in place answers with its row only
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      When I rename the domain "User Access" to "User Management" from the domain list
+      Then I receive only the row of the domain "User Management"
+      And the toast "Domain "User Management" updated." is shown
+
+    Scenario: Deleting a domain in place removes its row
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      When I delete the domain "User Access" from the domain list
+      Then the row of the domain "User Access" is removed
+      And the domain "User Access" no longer exists in "Acme Project"
+
+    Scenario: Deleting a domain in place updates the product's statistics once
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And 50 capabilities exist in subdomain "Authentication"
+      When I delete the domain "User Access" from the domain list
+      Then the domain "User Access" no longer exists in "Acme Project"
+      And the statistics of "Acme Project" were updated 2 times
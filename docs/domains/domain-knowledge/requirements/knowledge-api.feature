@@ -0,0 +1,95 @@
+Feature: Knowledge API
+  As an integration developer
+  I want to read a product's domain knowledge through a REST API
+  So that I don't have to scrape the HTML pages.
+
+  Rule: Product members can read the knowledge hierarchy
+
+    Scenario: Fetch domains with nested subdomains and capabilities
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      When I request the domains API with "expand=subdomains.capabilities"
+      Then the API lists domain "User Access" with subdomain "Authentication" and capability "Login"
+
+    Scenario: Nested children are loaded in a constant number of queries
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the following subdomains exist in domain "User Access":
+        | name           |
+        | Authentication |
+        | Authorization  |
+        | Profiles       |
+      And 30 capabilities exist in subdomain "Authentication"
+      When I request the domains API with "expand=subdomains.capabilities"
+      Then the API response took at most 7 queries
+
+    Scenario: Subdomains being deleted are left out of expanded domains
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the subdomain "Profiles" exists in domain "User Access"
+      And the capability "Avatar" exists in subdomain "Profiles"
+      And the subdomain "Profiles" is being deleted in the background
+      When I request the domains API with "expand=subdomains.capabilities"
+      Then the API lists domain "User Access" with only the subdomains "Authentication"
+
+    Scenario: Request only some fields
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project" with description "Login and roles"
+      When I request the domains API with "fields=id,name"
+      Then each API result has exactly the fields "id,name"
+
+  Rule: Unchanged responses are not sent again
+
+    Scenario: Revalidating an unchanged list returns 304 without querying
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And I have fetched the domains API and kept its ETag
+      When I request the domains API again with that ETag
+      Then the API answers 304 Not Modified
+      And the API response ran no knowledge queries
+
+    Scenario: Two changes within the same second invalidate the ETag
+      Given I am logged in as a product manager of "Acme Project"
+      And every change to the knowledge falls within the same second
+      And the domain "User Access" exists in "Acme Project"
+      And I have fetched the domains API and kept its ETag
+      And the domain "Billing" exists in "Acme Project"
+      When I request the domains API again with that ETag
+      Then the API lists 2 domains
+
+    Scenario: A date from the same second does not hide a change
+      Given I am logged in as a product manager of "Acme Project"
+      And every change to the knowledge falls within the same second
+      And the domain "User Access" exists in "Acme Project"
+      And I have fetched the domains API and kept the date of that second
+      And the domain "Billing" exists in "Acme Project"
+      When I request the domains API again with that date
+      Then the API lists 2 domains
+      And the API response has no Last-Modified date
+
+    Scenario: A change invalidates the ETag
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And I have fetched the domains API and kept its ETag
+      And the domain "Billing" exists in "Acme Project"
+      When I request the domains API again with that ETag
+      Then the API lists 2 domains
+
+    Scenario: Renaming the product invalidates the ETag
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And I have fetched the domains API and kept its ETag
+      And the product "Acme Project" is renamed to "Acme Platform"
+      When I request the domains API again with that ETag
+      Then the API lists 1 domain
+
+  Rule: Users cannot read products they are not assigned to
+
+    Scenario: Non-member is denied
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "Core" exists in "Secret Project"
+      When I request the domains API of "Secret Project"
+      Then the API denies access
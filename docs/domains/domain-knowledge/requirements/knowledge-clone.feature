@@ -0,0 +1,41 @@
+Feature: Knowledge Clone
+  As a product manager
+  I want to start a new product from a copy of another product's knowledge
+  So that I don't have to create its domains, subdomains and capabilities one by one.
+
+  Rule: The whole hierarchy is copied into an empty product
+
+    Scenario: Copy the knowledge of another product
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the following capabilities exist in subdomain "Authentication":
+        | name   |
+        | Login  |
+        | Logout |
+      And the domain "Planning" exists in "Acme Project"
+      And I am logged in as a product manager of "Beta Project"
+      When I copy the knowledge of "Acme Project" into "Beta Project"
+      Then "Beta Project" has the same hierarchy as "Acme Project"
+      And the domain "User Access" holds 1 subdomain and 2 capabilities
+      And the domain "Planning" holds 0 subdomains and 0 capabilities
+
+    Scenario: Large hierarchies are copied with a fixed number of queries
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And 30 subdomains exist in domain "User Access"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And 200 capabilities exist in subdomain "Authentication"
+      And I am logged in as a product manager of "Beta Project"
+      When I copy the knowledge of "Acme Project" into "Beta Project"
+      Then "Beta Project" has the same hierarchy as "Acme Project"
+      And copying took at most 20 queries
+
+    Scenario: Knowledge is not copied into a product that has some
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And I am logged in as a product manager of "Beta Project"
+      And the domain "Planning" exists in "Beta Project"
+      When I copy the knowledge of "Acme Project" into "Beta Project"
+      Then I am told that "Beta Project" already has domains
+      And "Beta Project" only has the domain "Planning"
@@ -0,0 +1,37 @@
+Feature: Knowledge Export
+  As a product member
+  I want to export a product's domain knowledge
+  So that I can back it up and compare versions.
+
+  Rule: Exports contain every domain, subdomain and capability
+
+    Scenario: Export as CSV
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication" with description "User login"
+      When I export the knowledge of "Acme Project" as "csv"
+      Then the export has the row "User Access,,Authentication,,Login,User login"
+
+    Scenario: Export as JSON Lines keeps empty parents
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the domain "Planning" exists in "Acme Project"
+      When I export the knowledge of "Acme Project" as "jsonl"
+      Then the export has 2 JSON records
+      And the export has a record for domain "Planning" without subdomain
+
+    Scenario: Export through the ASGI handler streams without buffering
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication" with description "User login"
+      When I export the knowledge of "Acme Project" as "csv" through ASGI
+      Then the export is streamed asynchronously
+      And the export has the row "User Access,,Authentication,,Login,User login"
+
+    Scenario: Unsupported formats are rejected
+      Given I am logged in as a product manager of "Acme Project"
+      When I export the knowledge of "Acme Project" as "xml"
+      Then the export is rejected
@@ -0,0 +1,49 @@
+Feature: Knowledge Import
+  As a product manager
+  I want to import domains, subdomains and capabilities from a file
+  So that onboarding a product doesn't take hundreds of form posts.
+
+  Rule: Imports create and update the hierarchy in one go
+
+    Scenario: Import a CSV file
+      Given I am logged in as a product manager of "Acme Project"
+      When I import the following rows into "Acme Project":
+        | domain      | subdomain      | capability |
+        | User Access | Authentication | Login      |
+        | User Access | Authentication | Logout     |
+        | Planning    |                |            |
+      Then the domain "User Access" has 1 subdomain with 2 capabilities
+      And the domain "Planning" exists in the product
+
+    Scenario: Importing again updates existing rows
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication" with description "Old"
+      When I import the following rows into "Acme Project":
+        | domain      | subdomain      | capability | capability_description |
+        | User Access | Authentication | Login      | New                    |
+      Then the capability "Login" now has description "New"
+      And the domain "User Access" has 1 subdomain with 1 capabilities
+
+  Rule: A dry run shows the changes without saving them
+
+    Scenario: Dry run
+      Given I am logged in as a product manager of "Acme Project"
+      When I dry-run the import of the following rows into "Acme Project":
+        | domain      | subdomain      | capability |
+        | User Access | Authentication | Login      |
+      Then I see "Dry run: nothing was saved"
+      And the product has no domains
+
+  Rule: Invalid files are rejected as a whole
+
+    Scenario: All validation errors are reported together
+      Given I am logged in as a product manager of "Acme Project"
+      When I import the following rows into "Acme Project":
+        | domain      | subdomain | capability |
+        | User Access |           | Login      |
+        |             | Profiles  |            |
+      Then I see "Row 1: subdomain is required for a capability."
+      And I see "Row 2: domain is required."
+      And the product has no domains
@@ -0,0 +1,45 @@
+Feature: Knowledge Search
+  As a product member
+  I want to search a product's domains, subdomains and capabilities by keyword
+  So that I can find a capability without scrolling through every list.
+
+  Rule: Search matches names and descriptions, best matches first
+
+    Scenario: Find a capability by a word in its description
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication" with description "Sign in with a password"
+      And the capability "Logout" exists in subdomain "Authentication" with description "End the session"
+      When I search "Acme Project" for "passwords"
+      Then the search results are "Login"
+      And the result "Login" is shown in "User Access / Authentication"
+      And the match "password" is highlighted
+
+    Scenario: Name matches rank above description matches
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "Billing" exists in "Acme Project" with description "Invoices for each payment"
+      And the domain "Payments" exists in "Acme Project"
+      When I search "Acme Project" for "payment"
+      Then the search results are "Payments, Billing"
+
+    Scenario: Search text is escaped before highlighting
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "<b>Reports</b>" exists in "Acme Project"
+      When I search "Acme Project" for "reports"
+      Then the page does not contain "<b>"
+
+    Scenario: Search through the API
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      When I search the API of "Acme Project" for "authentication"
+      Then the API search returns the subdomain "Authentication"
+
+  Rule: Search only covers the current product
+
+    Scenario: Other products are not searched
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "Payments" exists in "Other Project"
+      When I search "Acme Project" for "payments"
+      Then there are no search results
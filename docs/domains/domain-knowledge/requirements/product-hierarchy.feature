@@ -0,0 +1,44 @@
+Feature: Product Hierarchy
+  As a product member
+  I want to see the whole domain hierarchy of a product at once
+  So that I don't have to page through three separate lists.
+
+  Rule: The hierarchy shows every domain, subdomain and capability
+
+    Scenario: View the hierarchy page
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      When I view the hierarchy of "Acme Project"
+      Then I see "User Access", "Authentication" and "Login" in the hierarchy
+
+    Scenario: Fetch the hierarchy as JSON in three queries
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the following subdomains exist in domain "User Access":
+        | name           |
+        | Authentication |
+        | Authorization  |
+      And 20 capabilities exist in subdomain "Authentication"
+      When I request the hierarchy JSON of "Acme Project"
+      Then the JSON hierarchy has 1 domain, 2 subdomains and 20 capabilities
+      And the knowledge tables were queried 3 times
+
+  Rule: The hierarchy is served from a snapshot that is refreshed on change
+
+    Scenario: Repeated requests are served from the snapshot
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And I have requested the hierarchy JSON of "Acme Project"
+      When I request the hierarchy JSON of "Acme Project"
+      Then the knowledge tables were queried 0 times
+
+    Scenario: Changes show up immediately
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And I have requested the hierarchy JSON of "Acme Project"
+      When I add the capability "Login" to subdomain "Authentication"
+      And I request the hierarchy JSON of "Acme Project"
+      Then the JSON hierarchy has 1 domain, 1 subdomains and 1 capabilities
@@ -84,3 +84,51 @@ Feature: SubDomain Management
       When I delete the subdomain "Authentication"
       Then the subdomain "Authentication" no longer exists in domain "User Access"
       And the capability "Login" no longer exists
+
+  Rule: SubDomains can be moved to another domain in bulk
+
+    Scenario: Picked subdomains move with their capabilities
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the following subdomains exist in domain "User Access":
+        | name           |
+        | Authentication |
+        | Profiles       |
+        | Preferences    |
+      And the capability "Login" exists in subdomain "Authentication"
+      And the domain "Security" exists in "Acme Project"
+      When I move the subdomains "Authentication, Profiles" of "User Access" to the domain "Security"
+      Then the subdomain "Authentication" exists in domain "Security"
+      And the subdomain "Profiles" exists in domain "Security"
+      And the domain "User Access" holds 1 subdomain and 0 capabilities
+      And the domain "Security" holds 2 subdomains and 1 capability
+      And I am told that 2 subdomains were moved to "Security"
+
+    Scenario: The move form offers the domains to move to
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the domain "Security" exists in "Acme Project"
+      When I pick a domain matching "sec" to move subdomains to
+      Then the domain "Security" can be picked
+
+  Rule: The domain of a new subdomain is picked by typing its name
+
+    Scenario: Suggested domains open the new subdomain form
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the domain "Billing" exists in "Acme Project"
+      When I look up domains matching "user"
+      Then the suggestions are "User Access"
+      And the suggestion "User Access" opens the new subdomain form
+
+  Rule: SubDomains and capabilities always belong to their domain's product
+
+    Scenario: Moving a domain to another product moves everything below it
+      Given I am logged in as a product manager of "Acme Project"
+      And the domain "User Access" exists in "Acme Project"
+      And the subdomain "Authentication" exists in domain "User Access"
+      And the capability "Login" exists in subdomain "Authentication"
+      When the domain "User Access" is moved to the product "Other Project"
+      Then the subdomain "Authentication" belongs to "Other Project"
+      And the capability "Login" belongs to "Other Project"
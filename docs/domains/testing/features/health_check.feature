@@ -7,3 +7,76 @@ Feature: Health Check
     Given the application is running
     When I request the admin login page
     Then I receive a successful response
+
+  Scenario: Staff read the database connection pool metrics
+    Given I am logged in as a staff member
+    When I request the metrics page
+    Then I receive a successful response
+    And the metrics report the database pool utilization
+
+  Scenario: Metrics are hidden from other users
+    Given I am logged in as a user without staff access
+    When I request the metrics page
+    Then I am refused access
+
+  Scenario: Workers compile templates before serving
+    Given the application is running
+    When a worker warms up
+    Then every page template is compiled
+    And the URL routes are ready
+
+  Scenario: Browsers cache the stylesheet and receive it compressed
+    Given the static files have been collected
+    When my browser requests the stylesheet accepting brotli
+    Then it receives the brotli-compressed stylesheet
+    And it may keep it without revalidating
+
+  Scenario: Workers run the most urgent background job first
+    Given a background job "routine" with priority 0
+    And a background job "urgent" with priority 10
+    When a worker runs the background jobs
+    Then the jobs ran in the order "urgent, routine"
+
+  Scenario: A failing background job is retried before it fails
+    Given failed background jobs are retried at once
+    And a background job that fails every time and allows 2 attempts
+    When a worker runs the background jobs
+    Then the job failed after 2 attempts
+
+  Scenario: Only one background job of a product runs at a time
+    Given a background job of product "Jobs Product A" is running
+    And a background job "same product" for product "Jobs Product A"
+    And a background job "other product" for product "Jobs Product B"
+    When a worker runs the background jobs
+    Then the jobs ran in the order "other product"
+
+  Scenario: A worker reports back while its job runs
+    Given workers report back on their running job every 0.1 seconds
+    And a background job that runs for 0.5 seconds
+    When a worker runs the background jobs
+    Then the job was reported on after it started
+
+  Scenario: A job given up on while it runs is not overwritten by its worker
+    Given a background job that is given up on while it runs
+    When a worker runs the background jobs
+    Then the job is waiting to be retried because its worker was lost
+
+  Scenario: The server runs a single worker on a per-process cache by default
+    Given the cache is kept in each process
+    When the server is configured without WEB_CONCURRENCY
+    Then it runs 1 worker
+
+  Scenario: The server runs a worker per CPU on a shared cache by default
+    Given the cache is shared by every process
+    When the server is configured without WEB_CONCURRENCY
+    Then it runs 2 workers per CPU and one more
+
+  Scenario: Several workers refuse to start on a per-process cache
+    Given the cache is kept in each process
+    When the server starts 3 workers
+    Then it refuses to start because the cache is not shared
+
+  Scenario: The deployment check warns about a per-process cache
+    Given the cache is kept in each process
+    When I run the deployment checks
+    Then they warn that revoked access would not reach other workers
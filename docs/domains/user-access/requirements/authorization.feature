@@ -63,3 +63,19 @@ Feature: Authorization
       And I am not assigned to "Secret Project"
       When I try to access "Secret Project"
       Then I see an access denied error
+
+  Rule: Membership changes take effect on the next request
+
+    Scenario: Removed member loses access immediately
+      Given I am logged in as a product viewer of "Acme Project"
+      And I have viewed the domains of "Acme Project"
+      When my membership in "Acme Project" is removed
+      And I view the domains of "Acme Project"
+      Then I see an access denied page
+
+    Scenario: Promoted viewer can create content immediately
+      Given I am logged in as a product viewer of "Acme Project"
+      And I have opened the new domain form of "Acme Project"
+      When my role in "Acme Project" is changed to "Product Contributor"
+      And I open the new domain form of "Acme Project"
+      Then I see the new domain form
@@ -28,3 +28,39 @@ Feature: Home Page
       When I visit the home page
       And I click on "Skald"
       Then I am redirected to the domain list for "Skald"
+
+  Rule: Product cards show the size of each product
+
+    Scenario: A product card shows how much knowledge the product holds
+      Given I am logged in as "alice"
+      And I am assigned to "Runestone" as a product manager
+      And "Runestone" has the capabilities "Login, Logout" in "User Access / Authentication"
+      When I visit the home page
+      Then the card of "Runestone" shows "1 domain"
+      And the card of "Runestone" shows "1 subdomain"
+      And the card of "Runestone" shows "2 capabilities"
+
+    Scenario: Visiting the home page again reuses the cached cards
+      Given I am logged in as "alice"
+      And I am assigned to "Runestone" as a product manager
+      And I have visited the home page
+      When I visit the home page again
+      Then I see "Runestone" in the list
+      And the home page did not query my products
+
+    Scenario: Knowledge changes show up on the next visit
+      Given I am logged in as "alice"
+      And I am assigned to "Runestone" as a product manager
+      And "Runestone" has the capabilities "Login" in "User Access / Authentication"
+      And I have visited the home page
+      When "Runestone" has the capabilities "Logout" in "User Access / Authentication"
+      And I visit the home page again
+      Then the card of "Runestone" shows "2 capabilities"
+
+    Scenario: New assignments show up on the next visit
+      Given I am logged in as "alice"
+      And I am assigned to "Runestone" as a product manager
+      And I have visited the home page
+      When I am assigned to "Acme App" as a product manager
+      And I visit the home page again
+      Then I see "Acme App" in the list
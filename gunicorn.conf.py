@@ -0,0 +1,67 @@
+"""Gunicorn settings for the production image (see Dockerfile).
+
+SKALD_SERVER selects the serving path:
+
+* ``wsgi`` (default): threaded sync workers running ``skald_project.wsgi``.
+* ``asgi``: uvicorn workers running ``skald_project.asgi``. The knowledge
+  list views are async, so a worker holds any number of slow clients of
+  them without a thread each; sync views run in a thread per request.
+
+Every worker compiles all templates and builds the URL resolver before it
+takes requests (post_worker_init, see core.warmup), so the first requests
+after a rolling restart are as fast as later ones.
+
+With more than one worker, CACHE_BACKEND must name a cache shared by all of
+them (see core.checks): the server refuses to start otherwise. Unless
+WEB_CONCURRENCY says otherwise, it starts 2 * CPUs + 1 workers on a shared
+cache and a single worker on a per-process one (the default LocMemCache).
+"""
+
+import multiprocessing
+import os
+import time
+
+SERVER = os.getenv("SKALD_SERVER", "wsgi")
+if SERVER not in ("wsgi", "asgi"):
+    raise ValueError(f"SKALD_SERVER must be 'wsgi' or 'asgi', not {SERVER!r}")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+
+def default_workers() -> int:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "skald_project.settings")
+    from core.checks import cache_is_shared
+
+    return multiprocessing.cpu_count() * 2 + 1 if cache_is_shared() else 1
+
+
+workers = int(os.getenv("WEB_CONCURRENCY") or default_workers())
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+accesslog = "-"
+
+if SERVER == "asgi":
+    wsgi_app = "skald_project.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "skald_project.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+
+def on_starting(server):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "skald_project.settings")
+    from core.checks import require_shared_cache
+
+    require_shared_cache(server.cfg.workers)
+
+
+def post_worker_init(worker):
+    from core.warmup import warm_up
+
+    started = time.perf_counter()
+    templates = warm_up()
+    worker.log.info(
+        "Warmed up %d templates and the URLconf in %.0f ms",
+        templates,
+        (time.perf_counter() - started) * 1000,
+    )
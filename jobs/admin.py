@@ -0,0 +1,27 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = [
+        "task_path",
+        "status",
+        "queue_name",
+        "priority",
+        "product",
+        "attempts",
+        "enqueued_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "queue_name", "product"]
+    search_fields = ["task_path"]
+    readonly_fields = [
+        "return_value",
+        "errors",
+        "worker_ids",
+        "started_at",
+        "last_attempted_at",
+        "finished_at",
+    ]
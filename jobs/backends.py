@@ -0,0 +1,82 @@
+"""A django.tasks backend that stores tasks in PostgreSQL.
+
+Configure it in ``TASKS``; ``manage.py run_worker`` runs the enqueued tasks
+(see ``jobs.worker``). Tasks are declared with Django's ``@task`` decorator
+and may take two options this backend adds:
+
+* ``max_attempts``: how often a failing task is run before it fails for
+  good, waiting ``retry_delay`` seconds (doubling every time) in between;
+* a ``product_id`` keyword argument (given when enqueuing) ties the job to a
+  product, and no more than ``product_concurrency`` jobs of a product run
+  at the same time.
+
+Enqueuing inside a transaction only makes the job visible to workers once
+the transaction commits, and drops it if it rolls back.
+"""
+
+from dataclasses import dataclass
+
+from django.core.exceptions import ImproperlyConfigured
+from django.tasks import Task
+from django.tasks.backends.base import BaseTaskBackend
+from django.tasks.exceptions import InvalidTask, TaskResultDoesNotExist
+from django.tasks.signals import task_enqueued
+from django.utils.json import normalize_json
+
+from .models import Job
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class JobTask(Task):
+    max_attempts: int = 1
+
+
+class DatabaseBackend(BaseTaskBackend):
+    task_class = JobTask
+    supports_defer = True
+    supports_async_task = True
+    supports_get_result = True
+    supports_priority = True
+
+    def __init__(self, alias, params):
+        super().__init__(alias, params)
+        self.product_concurrency = self.options.get("product_concurrency", 1)
+        self.retry_delay = self.options.get("retry_delay", 30)
+        # Workers refresh the last_attempted_at of their running job every
+        # heartbeat seconds; running jobs not refreshed for stale_after
+        # seconds are assumed lost with their worker and run again.
+        self.heartbeat = self.options.get("heartbeat", 30)
+        self.stale_after = self.options.get("stale_after", 300)
+        if self.stale_after <= self.heartbeat:
+            raise ImproperlyConfigured(
+                f"stale_after of task backend {alias!r} must be longer than "
+                "its heartbeat."
+            )
+
+    def validate_task(self, task):
+        super().validate_task(task)
+        if getattr(task, "max_attempts", 1) < 1:
+            raise InvalidTask("max_attempts must be at least 1.")
+
+    def enqueue(self, task, args, kwargs):
+        self.validate_task(task)
+        args, kwargs = normalize_json(list(args)), normalize_json(kwargs)
+        job = Job.objects.create(
+            task_path=task.module_path,
+            backend=self.alias,
+            queue_name=task.queue_name,
+            priority=task.priority,
+            run_after=task.run_after,
+            args=args,
+            kwargs=kwargs,
+            product_id=kwargs.get("product_id"),
+        )
+        result = job.to_result()
+        task_enqueued.send(type(self), task_result=result)
+        return result
+
+    def get_result(self, result_id):
+        try:
+            return Job.objects.get(pk=int(result_id)).to_result()
+        except (Job.DoesNotExist, ValueError):
+            raise TaskResultDoesNotExist(result_id) from None
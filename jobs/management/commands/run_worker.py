@@ -0,0 +1,99 @@
+"""Run background jobs enqueued on the database task backend."""
+
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.tasks import task_backends
+
+from jobs.backends import DatabaseBackend
+from jobs.worker import Worker
+
+
+def _work(backend_alias: str, queues: list[str], interval: float, burst: bool) -> int:
+    worker = Worker(task_backends[backend_alias], queues, interval)
+    handlers = {
+        signum: signal.signal(signum, worker.stop)
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    try:
+        return worker.run(burst=burst)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+
+
+class Command(BaseCommand):
+    help = "Run background jobs in a pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.JOBS_WORKER_PROCESSES,
+            help="Worker processes, defaults to JOBS_WORKER_PROCESSES",
+        )
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Only run jobs of this queue (repeatable), defaults to all",
+        )
+        parser.add_argument(
+            "--backend", default="default", help="The TASKS backend to run"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before looking again when no job is ready",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is ready instead of waiting for more",
+        )
+
+    def handle(self, *args, **options):
+        backend = task_backends[options["backend"]]
+        if not isinstance(backend, DatabaseBackend):
+            raise CommandError(f'Backend "{backend.alias}" does not store its jobs.')
+        queues = options["queues"] or sorted(backend.queues)
+        unknown = set(queues) - backend.queues
+        if unknown:
+            raise CommandError(f"Unknown queue {', '.join(sorted(unknown))}.")
+        work = (backend.alias, queues, options["interval"], options["burst"])
+
+        if options["processes"] <= 1:
+            done = _work(*work)
+            self.stdout.write(self.style.SUCCESS(f"Ran {done} jobs."))
+            return
+
+        # Children must not share the parent's database connections, nor
+        # its connection pool (whose threads do not survive the fork).
+        connections.close_all()
+        for connection in connections.all():
+            if hasattr(connection, "close_pool"):
+                connection.close_pool()
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_work, args=work, daemon=True)
+            for _ in range(options["processes"])
+        ]
+        for process in workers:
+            process.start()
+
+        def stop(signum, frame):
+            # Each worker finishes its running job, then exits.
+            for process in workers:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        # Ctrl-C reaches the workers directly, as the terminal's process group.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for process in workers:
+            process.join()
+        self.stdout.write(self.style.SUCCESS(f"{len(workers)} workers stopped."))
@@ -0,0 +1,42 @@
+# Generated by Django 6.1.2 on 2026-10-18 18:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_path', models.CharField(max_length=255)),
+                ('backend', models.CharField(default='default', max_length=100)),
+                ('queue_name', models.CharField(default='default', max_length=100)),
+                ('priority', models.SmallIntegerField(default=0)),
+                ('args', models.JSONField(default=list)),
+                ('kwargs', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('READY', 'Ready'), ('RUNNING', 'Running'), ('FAILED', 'Failed'), ('SUCCESSFUL', 'Successful')], default='READY', max_length=20)),
+                ('run_after', models.DateTimeField(blank=True, null=True)),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('last_attempted_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('return_value', models.JSONField(blank=True, null=True)),
+                ('errors', models.JSONField(default=list)),
+                ('worker_ids', models.JSONField(default=list)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='users.product')),
+            ],
+            options={
+                'ordering': ['-enqueued_at', '-id'],
+                'indexes': [models.Index(models.F('queue_name'), models.OrderBy(models.F('priority'), descending=True), models.F('enqueued_at'), models.F('id'), condition=models.Q(('status', 'READY')), name='job_ready_idx'), models.Index(condition=models.Q(('status', 'RUNNING')), fields=['product'], name='job_running_product_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,118 @@
+from functools import cached_property
+
+from django.db import models
+from django.db.models.functions import Now
+from django.tasks import Task, TaskResult, TaskResultStatus
+from django.tasks.base import TaskError
+from django.utils.module_loading import import_string
+
+from users.models import Product
+
+
+class JobQuerySet(models.QuerySet):
+    def ready(self, queues: list[str] | None = None) -> "JobQuerySet":
+        """Jobs that may start now, in the order they should start."""
+        jobs = self.filter(status=TaskResultStatus.READY).filter(
+            models.Q(run_after__isnull=True) | models.Q(run_after__lte=Now())
+        )
+        if queues:
+            jobs = jobs.filter(queue_name__in=queues)
+        return jobs.order_by("-priority", "enqueued_at", "pk")
+
+    def running(self) -> "JobQuerySet":
+        return self.filter(status=TaskResultStatus.RUNNING)
+
+
+class Job(models.Model):
+    """A task enqueued on the database task backend (see ``jobs.backends``).
+
+    ``product`` is taken from the task's ``product_id`` keyword argument; the
+    worker runs only a limited number of a product's jobs at the same time.
+    """
+
+    task_path = models.CharField(max_length=255)
+    backend = models.CharField(max_length=100, default="default")
+    queue_name = models.CharField(max_length=100, default="default")
+    priority = models.SmallIntegerField(default=0)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=TaskResultStatus.choices,
+        default=TaskResultStatus.READY,
+    )
+    run_after = models.DateTimeField(null=True, blank=True)
+    enqueued_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    last_attempted_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    return_value = models.JSONField(null=True, blank=True)
+    # TaskError fields (exception_class_path, traceback) of every failed attempt.
+    errors = models.JSONField(default=list)
+    worker_ids = models.JSONField(default=list)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-enqueued_at", "-id"]
+        indexes = [
+            models.Index(
+                "queue_name",
+                models.F("priority").desc(),
+                "enqueued_at",
+                "id",
+                condition=models.Q(status=TaskResultStatus.READY),
+                name="job_ready_idx",
+            ),
+            models.Index(
+                fields=["product"],
+                condition=models.Q(status=TaskResultStatus.RUNNING),
+                name="job_running_product_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task_path} #{self.pk}"
+
+    @cached_property
+    def task(self) -> Task:
+        task = import_string(self.task_path)
+        if not isinstance(task, Task):
+            raise TypeError(f"{self.task_path!r} is not a task.")
+        return task
+
+    @property
+    def attempts(self) -> int:
+        return len(self.worker_ids)
+
+    def to_result(self) -> TaskResult:
+        """The job as a django.tasks TaskResult."""
+        task = self.task.using(
+            priority=self.priority,
+            queue_name=self.queue_name,
+            run_after=self.run_after,
+            backend=self.backend,
+        )
+        result = TaskResult(
+            task=task,
+            id=str(self.pk),
+            status=TaskResultStatus(self.status),
+            enqueued_at=self.enqueued_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            last_attempted_at=self.last_attempted_at,
+            args=self.args,
+            kwargs=self.kwargs,
+            backend=self.backend,
+            errors=[TaskError(**error) for error in self.errors],
+            worker_ids=list(self.worker_ids),
+        )
+        object.__setattr__(result, "_return_value", self.return_value)
+        return result
@@ -0,0 +1,288 @@
+"""Claiming and running the jobs of the database task backend.
+
+A worker claims the next ready job with ``SELECT ... FOR UPDATE SKIP
+LOCKED``, so any number of workers (processes of ``manage.py run_worker``,
+on any host) share the queue without claiming the same job. Claiming marks
+the job RUNNING and commits before the task runs: tasks run outside the
+claim's transaction and may use short transactions of their own.
+
+A job of a product is only claimed while fewer than ``product_concurrency``
+jobs of that product are running. Two workers could both see room for the
+same product, so the claim takes a transaction-level advisory lock on the
+product and counts its running jobs again before taking the job.
+
+While a task runs, a heartbeat thread refreshes the job's
+``last_attempted_at`` every ``heartbeat`` seconds; jobs that have not been
+refreshed for ``stale_after`` seconds are taken to be lost with their worker
+and retried. The outcome of an attempt is only recorded while the job is
+still running that attempt, so a worker that was given up on cannot
+overwrite what became of the job since.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+from traceback import format_exception
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count
+from django.tasks import TaskContext, TaskResultStatus, task_backends
+from django.tasks.signals import task_finished, task_started
+from django.utils import timezone
+from django.utils.json import normalize_json
+
+from .backends import DatabaseBackend
+from .models import Job, JobQuerySet
+
+logger = logging.getLogger(__name__)
+
+# First key of the advisory locks taken on products while claiming ("jobs").
+PRODUCT_LOCK_CLASS = 0x6A6F6273
+
+
+class WorkerLost(Exception):
+    """The worker running a job stopped before the job finished."""
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _lock_product(product_id: int) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_try_advisory_xact_lock(%s, %s)",
+            [PRODUCT_LOCK_CLASS, product_id],
+        )
+        return cursor.fetchone()[0]
+
+
+def claim_job(
+    backend: DatabaseBackend, worker: str, queues: list[str] | None = None
+) -> Job | None:
+    """Mark the next job that may start as running and return it."""
+    limit = backend.product_concurrency
+    busy = (
+        Job.objects.running()
+        .filter(product__isnull=False)
+        .values("product_id")
+        .annotate(running=Count("pk"))
+        .filter(running__gte=limit)
+        .values("product_id")
+    )
+    skipped = set()
+    while True:
+        with transaction.atomic():
+            ready = Job.objects.filter(backend=backend.alias).ready(queues)
+            if limit:
+                ready = ready.exclude(product_id__in=busy)
+            job = (
+                ready.exclude(product_id__in=skipped)
+                .select_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                return None
+            if limit and job.product_id is not None:
+                if (
+                    not _lock_product(job.product_id)
+                    or Job.objects.running().filter(product_id=job.product_id).count()
+                    >= limit
+                ):
+                    skipped.add(job.product_id)
+                    continue
+            now = timezone.now()
+            job.status = TaskResultStatus.RUNNING
+            job.started_at = job.started_at or now
+            job.last_attempted_at = now
+            job.worker_ids.append(worker)
+            job.save(
+                update_fields=[
+                    "status",
+                    "started_at",
+                    "last_attempted_at",
+                    "worker_ids",
+                ]
+            )
+            return job
+
+
+def _attempt(job: Job) -> JobQuerySet:
+    """The job, as long as it is still running its current attempt."""
+    return Job.objects.running().filter(pk=job.pk, worker_ids=job.worker_ids)
+
+
+def _record(job: Job, *fields: str) -> bool:
+    """Save ``fields`` of a running job, unless its attempt was given up on."""
+    values = {field: getattr(job, field) for field in fields}
+    return bool(_attempt(job).update(**values))
+
+
+class Heartbeat(threading.Thread):
+    """Refreshes ``last_attempted_at`` of a running job until stopped."""
+
+    def __init__(self, job: Job, interval: float):
+        super().__init__(name=f"heartbeat-{job.pk}", daemon=True)
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    _attempt(self.job).update(last_attempted_at=timezone.now())
+                except Exception:
+                    logger.exception("Heartbeat of job %s failed", self.job)
+        finally:
+            connection.close()
+
+    def __enter__(self) -> "Heartbeat":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stopped.set()
+        self.join()
+
+
+def _error(exc: BaseException) -> dict[str, str]:
+    exception_type = type(exc)
+    return {
+        "exception_class_path": (
+            f"{exception_type.__module__}.{exception_type.__qualname__}"
+        ),
+        "traceback": "".join(format_exception(exc)),
+    }
+
+
+def _retry_or_fail(job: Job, backend: DatabaseBackend, max_attempts: int) -> bool:
+    """Make a job that did not finish ready again, or failed if out of attempts.
+
+    Returns whether the attempt was still running.
+    """
+    now = timezone.now()
+    if job.attempts < max_attempts:
+        delay = backend.retry_delay * 2 ** (job.attempts - 1)
+        job.status = TaskResultStatus.READY
+        job.run_after = now + timedelta(seconds=delay)
+    else:
+        job.status = TaskResultStatus.FAILED
+        job.finished_at = now
+    return _record(job, "status", "run_after", "finished_at", "errors")
+
+
+def run_job(job: Job) -> Job:
+    """Run a claimed job and record how it went."""
+    backend = task_backends[job.backend]
+    try:
+        task = job.task
+        result = job.to_result()
+    except Exception as exc:
+        # The task was renamed or removed since it was enqueued.
+        job.errors.append(_error(exc))
+        _retry_or_fail(job, backend, max_attempts=0)
+        logger.exception("Job %s cannot be run", job)
+        return job
+
+    task_started.send(type(backend), task_result=result)
+    try:
+        with Heartbeat(job, backend.heartbeat):
+            if task.takes_context:
+                context = TaskContext(task_result=result)
+                value = task.call(context, *job.args, **job.kwargs)
+            else:
+                value = task.call(*job.args, **job.kwargs)
+    except Exception as exc:
+        job.errors.append(_error(exc))
+        if not _retry_or_fail(job, backend, task.max_attempts):
+            logger.warning("Job %s failed after it was given up on", job)
+        elif job.status == TaskResultStatus.FAILED:
+            task_finished.send(type(backend), task_result=job.to_result())
+        else:
+            logger.warning("Job %s failed, retrying at %s", job, job.run_after)
+        return job
+
+    job.return_value = normalize_json(value)
+    job.status = TaskResultStatus.SUCCESSFUL
+    job.finished_at = timezone.now()
+    if not _record(job, "return_value", "status", "finished_at"):
+        logger.warning("Job %s finished after it was given up on", job)
+        return job
+    task_finished.send(type(backend), task_result=job.to_result())
+    return job
+
+
+def requeue_stale(backend: DatabaseBackend) -> int:
+    """Retry (or fail) running jobs whose worker was lost; return how many."""
+    cutoff = timezone.now() - timedelta(seconds=backend.stale_after)
+    requeued = 0
+    with transaction.atomic():
+        stale = (
+            Job.objects.running()
+            .filter(backend=backend.alias, last_attempted_at__lt=cutoff)
+            .select_for_update(skip_locked=True)
+        )
+        for job in stale:
+            try:
+                max_attempts = job.task.max_attempts
+            except Exception:
+                max_attempts = 0
+            lost = WorkerLost(f"Worker {job.worker_ids[-1]} stopped reporting back.")
+            job.errors.append(_error(lost))
+            _retry_or_fail(job, backend, max_attempts)
+            logger.warning("Job %s was lost by its worker", job)
+            requeued += 1
+    return requeued
+
+
+class Worker:
+    """Runs jobs of one backend, one at a time, until stopped."""
+
+    def __init__(
+        self,
+        backend: DatabaseBackend,
+        queues: list[str] | None = None,
+        interval: float = 1.0,
+    ):
+        self.backend = backend
+        self.queues = queues
+        self.interval = interval
+        self.id = worker_id()
+        self.stopping = False
+
+    def stop(self, *args) -> None:
+        """Stop after the running job (usable as a signal handler)."""
+        self.stopping = True
+
+    def run(self, burst: bool = False) -> int:
+        """Run jobs until stopped, or until none is ready if ``burst``.
+
+        Returns how many jobs were run.
+        """
+        done = 0
+        requeue_stale(self.backend)
+        while not self.stopping:
+            self.close_old_connections()
+            job = claim_job(self.backend, self.id, self.queues)
+            if job is None:
+                if burst:
+                    break
+                requeue_stale(self.backend)
+                time.sleep(self.interval)
+                continue
+            run_job(job)
+            done += 1
+        self.close_old_connections()
+        return done
+
+    def close_old_connections(self) -> None:
+        """Drop broken or expired connections between jobs, as requests do.
+
+        Not inside a transaction (a test's), where it would break it.
+        """
+        if not connection.in_atomic_block:
+            close_old_connections()
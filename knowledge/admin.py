@@ -1,39 +1,54 @@
 from django.contrib import admin
 
-from .models import Capability, Domain, SubDomain
+from .models import Capability, Domain, KnowledgeDeletion, SubDomain
 
 
 @admin.register(Domain)
 class DomainAdmin(admin.ModelAdmin):
-    list_display = ["name", "product", "created_at"]
-    list_filter = ["product"]
+    list_display = [
+        "name",
+        "product",
+        "subdomain_count",
+        "capability_count",
+        "created_at",
+    ]
+    list_filter = ["product", "is_deleting"]
     search_fields = ["name", "description"]
     ordering = ["product", "name"]
 
 
 @admin.register(SubDomain)
 class SubDomainAdmin(admin.ModelAdmin):
-    list_display = ["name", "domain", "get_product", "created_at"]
-    list_filter = ["domain__product", "domain"]
+    list_display = ["name", "domain", "product", "capability_count", "created_at"]
+    list_filter = ["product", "is_deleting", "domain"]
     search_fields = ["name", "description"]
-    ordering = ["domain__product", "domain", "name"]
-
-    @admin.display(description="Product")
-    def get_product(self, obj):
-        return obj.domain.product
+    ordering = ["product", "domain", "name"]
 
 
 @admin.register(Capability)
 class CapabilityAdmin(admin.ModelAdmin):
-    list_display = ["name", "subdomain", "get_domain", "get_product", "created_at"]
-    list_filter = ["subdomain__domain__product", "subdomain__domain", "subdomain"]
+    list_display = ["name", "subdomain", "get_domain", "product", "created_at"]
+    list_filter = ["product", "subdomain__domain", "subdomain"]
     search_fields = ["name", "description"]
-    ordering = ["subdomain__domain__product", "subdomain__domain", "subdomain", "name"]
+    ordering = ["product", "subdomain__domain", "subdomain", "name"]
 
     @admin.display(description="Domain")
     def get_domain(self, obj):
         return obj.subdomain.domain
 
-    @admin.display(description="Product")
-    def get_product(self, obj):
-        return obj.subdomain.domain.product
+
+@admin.register(KnowledgeDeletion)
+class KnowledgeDeletionAdmin(admin.ModelAdmin):
+    list_display = [
+        "name",
+        "level",
+        "product",
+        "deleted",
+        "total",
+        "progress",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["product", "level"]
+    readonly_fields = ["deleted", "total", "finished_at"]
+    ordering = ["-created_at"]
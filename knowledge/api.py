@@ -0,0 +1,216 @@
+"""Read-only REST API for the knowledge hierarchy.
+
+Endpoints are scoped to a product and use the same membership rules as
+ProductAccessMixin. List endpoints support cursor pagination, sparse
+fieldsets (``?fields=id,name``) and nested children (``?expand=subdomains``),
+which are prefetched with one query per expanded level (without the rows
+being deleted in the background). ``search/`` runs a
+ranked full-text search over all three levels. Every endpoint answers
+conditional GETs (If-None-Match) from the product's knowledge version
+without querying the knowledge tables.
+"""
+
+from dataclasses import asdict
+
+from django.db.models import Prefetch
+from rest_framework import viewsets
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.access import get_active_product, get_membership_role
+from users.models import ProductMembership
+
+from .conditional import KnowledgeValidators
+from .models import Capability, Domain, SubDomain
+from .search import DEFAULT_LIMIT, MAX_LIMIT, search_knowledge
+from .serializers import (
+    CapabilitySerializer,
+    DomainSerializer,
+    KnowledgeSerializer,
+    SubDomainSerializer,
+)
+from .tree import get_product_tree
+
+
+class HasProductAccess(BasePermission):
+    """Allow members of the product in the URL; sets view.product."""
+
+    message = "You do not have access to this product."
+
+    def has_permission(self, request, view) -> bool:
+        view.product = get_active_product(view.kwargs.get("product_id"))
+        if view.product is None:
+            raise NotFound("No Product matches the given query.")
+        if request.user.is_superuser:
+            return True
+        role = get_membership_role(request.user.pk, view.product.pk)
+        return role in view.allowed_roles
+
+
+class NotModified(Exception):
+    """Raised by KnowledgeConditionalMixin.initial to skip the handler."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class KnowledgeConditionalMixin:
+    """Answer conditional GETs with 304 from the product's knowledge version.
+
+    Runs after the permission checks (which set view.product) and before the
+    handler. The ETag varies on the negotiated format (JSON or browsable API).
+    """
+
+    validators: KnowledgeValidators | None = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = KnowledgeValidators(
+            self.product.pk, request.accepted_renderer.format
+        )
+        if response := self.validators.not_modified(request):
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.validators is not None:
+            self.validators.apply(response)
+        return response
+
+
+class NameCursorPagination(CursorPagination):
+    ordering = ("name", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+MEMBER_ROLES: list[str] = [
+    ProductMembership.Role.MANAGER,
+    ProductMembership.Role.CONTRIBUTOR,
+    ProductMembership.Role.VIEWER,
+]
+
+
+class ProductTreeAPIView(KnowledgeConditionalMixin, APIView):
+    """The whole hierarchy of a product as one JSON document."""
+
+    permission_classes = [IsAuthenticated, HasProductAccess]
+    allowed_roles = MEMBER_ROLES
+
+    def get(self, request, product_id: int) -> Response:
+        return Response(get_product_tree(self.product))
+
+
+class KnowledgeSearchAPIView(KnowledgeConditionalMixin, APIView):
+    """Ranked matches for ?q= (web search syntax), best first.
+
+    ``name`` and ``description`` are HTML with matches wrapped in <mark>.
+    """
+
+    permission_classes = [IsAuthenticated, HasProductAccess]
+    allowed_roles = MEMBER_ROLES
+
+    def get(self, request, product_id: int) -> Response:
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ParseError("'q' is required.")
+        limit = request.query_params.get("limit", str(DEFAULT_LIMIT))
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_LIMIT:
+            raise ParseError(f"'limit' must be between 1 and {MAX_LIMIT}.")
+        results = search_knowledge(self.product, query, limit=int(limit))
+        return Response(
+            {"query": query, "results": [asdict(result) for result in results]}
+        )
+
+
+class KnowledgeViewSet(KnowledgeConditionalMixin, viewsets.ReadOnlyModelViewSet):
+    """Base viewset handling product scoping, ?fields= and ?expand=."""
+
+    permission_classes = [IsAuthenticated, HasProductAccess]
+    pagination_class = NameCursorPagination
+    allowed_roles = MEMBER_ROLES
+
+    def get_fields_param(self) -> set[str] | None:
+        value = self.request.query_params.get("fields")
+        if not value:
+            return None
+        return {path.strip() for path in value.split(",") if path.strip()}
+
+    def get_expand_param(self) -> set[str]:
+        value = self.request.query_params.get("expand", "")
+        paths = {path.strip() for path in value.split(",") if path.strip()}
+        for path in paths:
+            serializer_class: type[KnowledgeSerializer] = self.serializer_class
+            for name in path.split("."):
+                if name not in serializer_class.expandable:
+                    raise ParseError(f"Cannot expand '{path}'.")
+                serializer_class = serializer_class.expandable[name]
+        return paths
+
+    def get_id_param(self, name: str) -> str | None:
+        value = self.request.query_params.get(name)
+        if value is not None and not value.isdigit():
+            raise ParseError(f"'{name}' must be an id.")
+        return value
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_fields_param())
+        kwargs.setdefault("expand", self.get_expand_param())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_prefetches(self) -> list[Prefetch]:
+        """Prefetch every expanded level, leaving out rows being deleted."""
+        prefetches: dict[str, Prefetch] = {}
+        for path in sorted(self.get_expand_param()):
+            serializer_class: type[KnowledgeSerializer] = self.serializer_class
+            names = path.split(".")
+            for depth, name in enumerate(names, start=1):
+                serializer_class = serializer_class.expandable[name]
+                lookup = "__".join(names[:depth])
+                if lookup not in prefetches:
+                    model = serializer_class.Meta.model
+                    prefetches[lookup] = Prefetch(lookup, model.objects.visible())
+        return list(prefetches.values())
+
+    def get_queryset(self):
+        return self.get_product_queryset().prefetch_related(*self.get_prefetches())
+
+    def get_product_queryset(self):
+        """The rows of ``queryset`` in the URL's product."""
+        return self.queryset.filter(product=self.product)
+
+
+class DomainViewSet(KnowledgeViewSet):
+    queryset = Domain.objects.visible()
+    serializer_class = DomainSerializer
+
+
+class SubDomainViewSet(KnowledgeViewSet):
+    queryset = SubDomain.objects.visible()
+    serializer_class = SubDomainSerializer
+
+    def get_product_queryset(self):
+        queryset = super().get_product_queryset()
+        if domain_id := self.get_id_param("domain"):
+            queryset = queryset.filter(domain_id=domain_id)
+        return queryset
+
+
+class CapabilityViewSet(KnowledgeViewSet):
+    queryset = Capability.objects.visible()
+    serializer_class = CapabilitySerializer
+
+    def get_product_queryset(self):
+        queryset = super().get_product_queryset()
+        if subdomain_id := self.get_id_param("subdomain"):
+            queryset = queryset.filter(subdomain_id=subdomain_id)
+        return queryset
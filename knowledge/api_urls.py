@@ -0,0 +1,25 @@
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
+
+from . import api
+
+app_name = "knowledge-api"
+
+router = SimpleRouter()
+router.register("domains", api.DomainViewSet, basename="domain")
+router.register("subdomains", api.SubDomainViewSet, basename="subdomain")
+router.register("capabilities", api.CapabilityViewSet, basename="capability")
+
+urlpatterns = [
+    path("products/<int:product_id>/", include(router.urls)),
+    path(
+        "products/<int:product_id>/tree/",
+        api.ProductTreeAPIView.as_view(),
+        name="product-tree",
+    ),
+    path(
+        "products/<int:product_id>/search/",
+        api.KnowledgeSearchAPIView.as_view(),
+        name="search",
+    ),
+]
@@ -0,0 +1,86 @@
+"""Versioned cache of product knowledge.
+
+Every product has a knowledge version stored in the cache. Cached snapshots
+(the hierarchy tree, rendered list fragments) are keyed by that version, so
+bumping it makes all of them unreachable at once and nothing is ever served
+stale. The version is bumped by the receivers in ``knowledge.signals``
+whenever a domain, subdomain or capability of the product is saved or
+deleted. Code that writes without signals (bulk operations) must call
+invalidate_product_knowledge. The cache must be shared by every worker
+process (see core.checks), or the others would keep their old version.
+
+The version is the time of the last change in nanoseconds (or of first use
+when the cache has lost it), and only ever moves forward, so it never
+repeats a version that snapshots were stored under before (nor an ETag
+built from it, see knowledge.conditional).
+"""
+
+import hashlib
+import time
+from collections.abc import Iterable
+
+from django.core.cache import cache
+
+
+def version_cache_key(product_id: int) -> str:
+    return f"knowledge:version:{product_id}"
+
+
+def get_knowledge_version(product_id: int) -> int:
+    """Return the product's current knowledge version."""
+    key = version_cache_key(product_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_knowledge_version(product_id: int) -> int:
+    """Async version of get_knowledge_version."""
+    key = version_cache_key(product_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def get_knowledge_versions(product_ids: Iterable[int]) -> dict[int, int]:
+    """Return the current knowledge version of each product, in one round trip."""
+    keys = {version_cache_key(product_id): product_id for product_id in product_ids}
+    found = cache.get_many(keys)
+    return {
+        product_id: found[key] if key in found else get_knowledge_version(product_id)
+        for key, product_id in keys.items()
+    }
+
+
+def tree_cache_key(product_id: int) -> str:
+    return f"knowledge:tree:{product_id}:{get_knowledge_version(product_id)}"
+
+
+def fragment_cache_key(product_id: int, name: str, query_string: str = "") -> str:
+    """Key for a rendered fragment of ``name`` for one set of GET parameters."""
+    digest = hashlib.md5(query_string.encode(), usedforsecurity=False).hexdigest()
+    version = get_knowledge_version(product_id)
+    return f"knowledge:fragment:{product_id}:{version}:{name}:{digest}"
+
+
+async def afragment_cache_key(
+    product_id: int, name: str, query_string: str = ""
+) -> str:
+    """Async version of fragment_cache_key."""
+    digest = hashlib.md5(query_string.encode(), usedforsecurity=False).hexdigest()
+    version = await aget_knowledge_version(product_id)
+    return f"knowledge:fragment:{product_id}:{version}:{name}:{digest}"
+
+
+def invalidate_product_knowledge(product_id: int) -> None:
+    """Move the product's knowledge version forward to now."""
+    key = version_cache_key(product_id)
+    version = time.time_ns()
+    current = cache.get(key)
+    if current is not None and current >= version:
+        version = current + 1
+    cache.set(key, version, None)
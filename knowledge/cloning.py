@@ -0,0 +1,136 @@
+"""Copying the knowledge hierarchy of one product into another.
+
+New products often start from the domains of an existing one (or of a
+product kept as a template). clone_knowledge() copies every domain,
+subdomain and capability in three ``bulk_create`` passes inside one
+transaction: the source rows are read with one query per level, each pass
+maps the old ids of the level above to the new ones, and the rows are
+inserted in batches of BATCH_SIZE.
+
+The counters of the copies are computed while reading the source, so they
+are written with the rows instead of by a recount afterwards. Subtrees
+being deleted in the source (``knowledge.deletion``) are not copied.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models.functions import Now
+
+from users.models import Product
+
+from .cache import invalidate_product_knowledge
+from .models import Capability, Domain, ProductKnowledgeStats, SubDomain
+
+BATCH_SIZE = 1000
+
+
+class KnowledgeCloneError(Exception):
+    """The knowledge cannot be copied into the target product."""
+
+
+@dataclass
+class CloneResult:
+    domains: int
+    subdomains: int
+    capabilities: int
+
+
+def clone_knowledge(source: Product, target: Product) -> CloneResult:
+    """Copy the whole hierarchy of ``source`` into ``target``, which must be empty."""
+    if source.pk == target.pk:
+        raise KnowledgeCloneError("A product cannot be copied into itself.")
+    with transaction.atomic():
+        # Serialises clones into the same product.
+        Product.objects.select_for_update().filter(pk=target.pk).first()
+        if Domain.objects.filter(product=target).exists():
+            raise KnowledgeCloneError(
+                f'"{target.name}" already has domains; knowledge can only be '
+                "copied into a product without any."
+            )
+
+        domains = list(
+            Domain.objects.visible()
+            .filter(product=source)
+            .order_by("pk")
+            .values_list("pk", "name", "description")
+        )
+        subdomains = list(
+            SubDomain.objects.visible()
+            .filter(product=source)
+            .order_by("pk")
+            .values_list("pk", "domain_id", "name", "description")
+        )
+        capabilities = list(
+            Capability.objects.visible()
+            .filter(product=source)
+            .order_by("pk")
+            .values_list("subdomain_id", "name", "description")
+        )
+
+        capabilities_of_subdomain = Counter(row[0] for row in capabilities)
+        subdomains_of_domain = Counter()
+        capabilities_of_domain = Counter()
+        for pk, domain_id, _, _ in subdomains:
+            subdomains_of_domain[domain_id] += 1
+            capabilities_of_domain[domain_id] += capabilities_of_subdomain[pk]
+
+        created = Domain.objects.bulk_create(
+            [
+                Domain(
+                    product=target,
+                    name=name,
+                    description=description,
+                    subdomain_count=subdomains_of_domain[pk],
+                    capability_count=capabilities_of_domain[pk],
+                )
+                for pk, name, description in domains
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        domain_ids = {row[0]: domain.pk for row, domain in zip(domains, created)}
+
+        created = SubDomain.objects.bulk_create(
+            [
+                SubDomain(
+                    domain_id=domain_ids[domain_id],
+                    product=target,
+                    name=name,
+                    description=description,
+                    capability_count=capabilities_of_subdomain[pk],
+                )
+                for pk, domain_id, name, description in subdomains
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        subdomain_ids = {
+            row[0]: subdomain.pk for row, subdomain in zip(subdomains, created)
+        }
+
+        Capability.objects.bulk_create(
+            [
+                Capability(
+                    subdomain_id=subdomain_ids[subdomain_id],
+                    product=target,
+                    name=name,
+                    description=description,
+                )
+                for subdomain_id, name, description in capabilities
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        result = CloneResult(len(domains), len(subdomains), len(capabilities))
+        ProductKnowledgeStats.objects.update_or_create(
+            product=target,
+            defaults={
+                "domain_count": result.domains,
+                "subdomain_count": result.subdomains,
+                "capability_count": result.capabilities,
+                "changed_at": Now(),
+            },
+        )
+        invalidate_product_knowledge(target.pk)
+        transaction.on_commit(lambda: invalidate_product_knowledge(target.pk))
+    return result
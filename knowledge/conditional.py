@@ -0,0 +1,53 @@
+"""Conditional GET (ETag) for views built on product knowledge.
+
+The ETag comes from the product's knowledge version (see knowledge.cache),
+which is read from the cache, so a 304 is answered before any list query or
+rendering. Responses are marked ``private, no-cache`` so browsers always
+revalidate.
+
+No Last-Modified is sent: HTTP dates have whole seconds, so a client
+revalidating with If-Modified-Since would get a 304 for a change made later
+in the same second and keep stale knowledge. If-Modified-Since alone is
+therefore answered in full.
+"""
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import quote_etag
+
+from .cache import aget_knowledge_version, get_knowledge_version
+
+
+class KnowledgeValidators:
+    """ETag of one representation of a product's knowledge.
+
+    Async views create them with ``await KnowledgeValidators.acreate(...)``.
+    """
+
+    def __init__(self, product_id: int, *variant: object, version: int | None = None):
+        if version is None:
+            version = get_knowledge_version(product_id)
+        self.etag = quote_etag("-".join(str(part) for part in (version, *variant)))
+
+    @classmethod
+    async def acreate(cls, product_id: int, *variant: object) -> "KnowledgeValidators":
+        version = await aget_knowledge_version(product_id)
+        return cls(product_id, *variant, version=version)
+
+    def not_modified(self, request: HttpRequest) -> HttpResponse | None:
+        """Return a 304 (or 412) response if the client's copy is current."""
+        response = get_conditional_response(request, etag=self.etag)
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response: HttpResponse) -> HttpResponse:
+        if response.status_code in (200, 304):
+            response.headers.setdefault("ETag", self.etag)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ["Cookie", "Authorization", "HX-Request"])
+        return response
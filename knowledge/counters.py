@@ -0,0 +1,233 @@
+"""Denormalised sizes of the knowledge hierarchy.
+
+Domain.subdomain_count and capability_count, SubDomain.capability_count and
+the product's ProductKnowledgeStats row are kept current by the receivers in
+``knowledge.signals``. They apply F() updates in the writing transaction, so
+concurrent writers never lose each other's changes. A cascading delete is
+counted once, by the object the delete started from (the ``origin`` of the
+delete signals), which removes its whole subtree from its ancestors.
+
+Every write also stamps ProductKnowledgeStats.changed_at (record_change).
+Bulk writes bypass the receivers and must call recount_product (or, for
+bulk moves, count_moved) and record_change.
+``manage.py recount_knowledge`` repairs counters that have drifted.
+Subtrees hidden for a background deletion (``knowledge.deletion``) are no
+longer counted.
+"""
+
+from django.db.models import (
+    Count,
+    Expression,
+    F,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, Greatest, Now
+
+from .models import Capability, Domain, HierarchyModel, ProductKnowledgeStats, SubDomain
+
+
+def _add(queryset: QuerySet, **deltas: int) -> int:
+    """Add each non-zero delta to its column, never going below zero."""
+    changes = {
+        name: Greatest(F(name) + delta, Value(0))
+        for name, delta in deltas.items()
+        if delta
+    }
+    return queryset.update(**changes) if changes else 0
+
+
+def _add_to_product(
+    product_id: int, domains: int = 0, subdomains: int = 0, capabilities: int = 0
+) -> None:
+    deltas = {
+        "domain_count": domains,
+        "subdomain_count": subdomains,
+        "capability_count": capabilities,
+    }
+    if not any(deltas.values()):
+        return
+    if not _add(ProductKnowledgeStats.objects.filter(product_id=product_id), **deltas):
+        # No stats row yet (the product predates it or was bulk created).
+        recount_product(product_id)
+
+
+def _apply(
+    instance: HierarchyModel, sign: int, parent_id: int, product_id: int
+) -> None:
+    """Add (sign 1) or remove (sign -1) instance's subtree from its ancestors."""
+    if isinstance(instance, Capability):
+        _add(SubDomain.objects.filter(pk=parent_id), capability_count=sign)
+        _add(Domain.objects.filter(subdomains=parent_id), capability_count=sign)
+        _add_to_product(product_id, capabilities=sign)
+    elif isinstance(instance, SubDomain):
+        capabilities = sign * instance.capability_count
+        _add(
+            Domain.objects.filter(pk=parent_id),
+            subdomain_count=sign,
+            capability_count=capabilities,
+        )
+        _add_to_product(product_id, subdomains=sign, capabilities=capabilities)
+    else:
+        _add_to_product(
+            product_id,
+            domains=sign,
+            subdomains=sign * instance.subdomain_count,
+            capabilities=sign * instance.capability_count,
+        )
+
+
+def _refresh_counters(instance: HierarchyModel, *fields: str) -> None:
+    # The instance may have been loaded before the latest changes.
+    if instance.counter_fields or fields:
+        instance.refresh_from_db(fields=[*instance.counter_fields, *fields])
+
+
+def deleted_directly(instance: HierarchyModel, origin) -> bool:
+    """Whether a row is the one a delete started at, not one cascaded to."""
+    if origin is None:
+        return True
+    if isinstance(origin, QuerySet):
+        return origin.model is type(instance)
+    return isinstance(origin, type(instance))
+
+
+def count_saved(instance: HierarchyModel, created: bool) -> None:
+    """Count a new row, or move a row's subtree if it changed parent."""
+    parent_id = getattr(instance, instance.parent_field)
+    if created:
+        _apply(instance, 1, parent_id, instance.product_id)
+        return
+    loaded_parent_id = instance.loaded(instance.parent_field)
+    if loaded_parent_id != parent_id:
+        _refresh_counters(instance)
+        _apply(instance, -1, loaded_parent_id, instance.loaded("product_id"))
+        _apply(instance, 1, parent_id, instance.product_id)
+
+
+def prepare_delete(instance: HierarchyModel, origin) -> None:
+    """Read the current place and size of a row before it is deleted."""
+    if deleted_directly(instance, origin):
+        _refresh_counters(instance, instance.parent_field, "product_id")
+
+
+def count_deleted(instance: HierarchyModel, origin) -> None:
+    """Uncount a deleted row, unless it went with a deleted ancestor."""
+    if deleted_directly(instance, origin):
+        parent_id = getattr(instance, instance.parent_field)
+        _apply(instance, -1, parent_id, instance.product_id)
+
+
+def _take(parents: QuerySet, moved: QuerySet, link: str, **amounts: Expression) -> int:
+    """Subtract from each parent the ``amounts`` of the moved rows below it.
+
+    ``link`` is the lookup from a moved row to its parent. One UPDATE for
+    all parents, with a correlated subquery per column.
+    """
+    changes = {}
+    for name, amount in amounts.items():
+        below = (
+            moved.filter(**{link: OuterRef("pk")})
+            .order_by()
+            .values(link)
+            .annotate(amount=amount)
+            .values("amount")
+        )
+        changes[name] = Greatest(F(name) - Coalesce(Subquery(below), 0), Value(0))
+    return parents.filter(pk__in=moved.values(link)).update(**changes)
+
+
+def count_moved(moved: QuerySet, target: HierarchyModel) -> None:
+    """Move the subtrees of ``moved`` under ``target`` in the counters.
+
+    For bulk moves, which bypass the receivers: call it before the rows are
+    moved. ``target`` must be in the rows' product, so its totals stay.
+    """
+    if moved.model is Capability:
+        moved_count = moved.count()
+        _take(SubDomain.objects.all(), moved, "subdomain", capability_count=Count("pk"))
+        _take(
+            Domain.objects.all(),
+            moved,
+            "subdomain__domain",
+            capability_count=Count("pk"),
+        )
+        _add(SubDomain.objects.filter(pk=target.pk), capability_count=moved_count)
+        _add(Domain.objects.filter(pk=target.domain_id), capability_count=moved_count)
+    else:
+        totals = moved.aggregate(
+            subdomains=Count("pk"),
+            capabilities=Coalesce(Sum("capability_count"), 0),
+        )
+        _take(
+            Domain.objects.all(),
+            moved,
+            "domain",
+            subdomain_count=Count("pk"),
+            capability_count=Sum("capability_count"),
+        )
+        _add(
+            Domain.objects.filter(pk=target.pk),
+            subdomain_count=totals["subdomains"],
+            capability_count=totals["capabilities"],
+        )
+
+
+def record_change(product_id: int) -> None:
+    """Stamp the product's knowledge as changed now."""
+    ProductKnowledgeStats.objects.filter(product_id=product_id).update(changed_at=Now())
+
+
+def _fix(queryset: QuerySet, **actual: Expression) -> int:
+    """Set the columns whose value differs from ``actual``; return how many."""
+    fixed = 0
+    for name, value in actual.items():
+        fixed += queryset.exclude(**{name: value}).update(**{name: value})
+    return fixed
+
+
+def recount_product(product_id: int) -> int:
+    """Recount all of the product's counters; return how many were wrong."""
+    capabilities = (
+        Capability.objects.filter(subdomain=OuterRef("pk"))
+        .order_by()
+        .values("subdomain")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    fixed = _fix(
+        SubDomain.objects.filter(product_id=product_id),
+        capability_count=Coalesce(Subquery(capabilities), 0),
+    )
+    # Subtrees being deleted were uncounted when they were hidden.
+    subdomains = (
+        SubDomain.objects.visible()
+        .filter(domain=OuterRef("pk"))
+        .order_by()
+        .values("domain")
+        .annotate(n=Count("pk"), capabilities=Sum("capability_count"))
+    )
+    fixed += _fix(
+        Domain.objects.filter(product_id=product_id),
+        subdomain_count=Coalesce(Subquery(subdomains.values("n")), 0),
+        capability_count=Coalesce(Subquery(subdomains.values("capabilities")), 0),
+    )
+    totals = (
+        Domain.objects.visible()
+        .filter(product_id=product_id)
+        .aggregate(
+            domain_count=Count("pk"),
+            subdomain_count=Coalesce(Sum("subdomain_count"), 0),
+            capability_count=Coalesce(Sum("capability_count"), 0),
+        )
+    )
+    stats, created = ProductKnowledgeStats.objects.get_or_create(
+        product_id=product_id, defaults=totals
+    )
+    if not created and any(getattr(stats, k) != v for k, v in totals.items()):
+        ProductKnowledgeStats.objects.filter(pk=stats.pk).update(**totals)
+        fixed += 1
+    return fixed
@@ -0,0 +1,152 @@
+"""Deleting large domains and subdomains in the background.
+
+Deleting a domain through the ORM cascade loads every subdomain and
+capability below it and deletes them in one transaction, which can outlast
+the request and hold locks on the whole subtree. delete_in_background()
+instead hides the object at once and records a KnowledgeDeletion:
+
+* the object (and, for a domain, its subdomains) get ``is_deleting`` and a
+  name that frees the original one, so the object can be created again;
+  ``.visible()`` querysets leave the subtree out;
+* the subtree is removed from its ancestors' counters right away.
+
+A ``delete_knowledge`` job (``knowledge.tasks``), enqueued in the same
+transaction, then removes the rows in batches of
+``KNOWLEDGE_DELETE_BATCH_SIZE``, each in its own short transaction, and
+records the progress after every batch. ``manage.py process_deletions``
+does the same for every pending deletion without a worker. The rows go with
+plain DELETEs: no signals are sent, as the counters and knowledge version
+were already updated when the subtree was hidden.
+
+Objects with no more than one batch of rows below them are deleted at once.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .cache import invalidate_product_knowledge
+from .counters import count_deleted, prepare_delete, record_change
+from .models import Capability, Domain, KnowledgeDeletion, SubDomain
+from .tasks import delete_knowledge
+
+
+def subtree_size(instance: Domain | SubDomain) -> int:
+    """Number of rows below ``instance``, from its counters."""
+    if isinstance(instance, Domain):
+        return instance.subdomain_count + instance.capability_count
+    return instance.capability_count
+
+
+def delete_in_background(instance: Domain | SubDomain) -> KnowledgeDeletion | None:
+    """Delete ``instance`` and its subtree, in the background if it is large.
+
+    Returns the KnowledgeDeletion tracking a background deletion, or None
+    when the instance was small enough to be deleted right away.
+    """
+    with transaction.atomic():
+        model = type(instance)
+        model._base_manager.select_for_update().filter(pk=instance.pk).first()
+        prepare_delete(instance, None)
+        size = subtree_size(instance)
+        if size <= settings.KNOWLEDGE_DELETE_BATCH_SIZE:
+            instance.delete()
+            return None
+
+        level = KnowledgeDeletion.Level(model._meta.model_name)
+        # Free the name (the pk keeps it unique) so it can be used again.
+        hidden_name = f"[deleting {instance.pk}] {instance.name}"
+        model._base_manager.filter(pk=instance.pk).update(
+            is_deleting=True,
+            name=hidden_name[: model._meta.get_field("name").max_length],
+            updated_at=Now(),
+        )
+        if level == KnowledgeDeletion.Level.DOMAIN:
+            SubDomain.objects.filter(domain=instance).update(is_deleting=True)
+        count_deleted(instance, None)
+        record_change(instance.product_id)
+        deletion = KnowledgeDeletion.objects.create(
+            product_id=instance.product_id,
+            level=level,
+            object_id=instance.pk,
+            name=instance.name,
+            total=size + 1,
+        )
+        product_id = instance.product_id
+        delete_knowledge.enqueue(deletion.pk, product_id=product_id)
+        invalidate_product_knowledge(product_id)
+        transaction.on_commit(lambda: invalidate_product_knowledge(product_id))
+    return deletion
+
+
+def _delete_some(queryset: QuerySet, batch_size: int) -> int:
+    """Delete up to ``batch_size`` rows of ``queryset`` in one statement."""
+    model = queryset.model
+    batch = queryset.order_by().values("pk")[:batch_size]
+    # _raw_delete is what the ORM's own fast deletes use: a plain DELETE,
+    # without collecting related rows or sending signals.
+    return model._base_manager.filter(pk__in=batch)._raw_delete(queryset.db)
+
+
+def _subtree(deletion: KnowledgeDeletion) -> list[QuerySet]:
+    """The querysets to empty, in order: bottom level first."""
+    if deletion.level == KnowledgeDeletion.Level.DOMAIN:
+        return [
+            Capability.objects.filter(subdomain__domain_id=deletion.object_id),
+            SubDomain.objects.filter(domain_id=deletion.object_id),
+            Domain.objects.filter(pk=deletion.object_id),
+        ]
+    return [
+        Capability.objects.filter(subdomain_id=deletion.object_id),
+        SubDomain.objects.filter(pk=deletion.object_id),
+    ]
+
+
+def delete_next_batch(
+    batch_size: int | None = None, deletion_id: int | None = None
+) -> KnowledgeDeletion | None:
+    """Delete one batch of the oldest pending deletion; return it.
+
+    Only looks at the deletion ``deletion_id`` if given. Returns None when
+    nothing is pending. Deletions being worked on by another process are
+    skipped, so several processes can share the work.
+    """
+    batch_size = batch_size or settings.KNOWLEDGE_DELETE_BATCH_SIZE
+    pending = KnowledgeDeletion.objects.filter(finished_at__isnull=True)
+    if deletion_id is not None:
+        pending = pending.filter(pk=deletion_id)
+    with transaction.atomic():
+        deletion = pending.select_for_update(skip_locked=True).first()
+        if deletion is None:
+            return None
+        deleted = 0
+        for queryset in _subtree(deletion):
+            deleted = _delete_some(queryset, batch_size)
+            if deleted:
+                break
+        if deleted:
+            deletion.deleted += deleted
+            deletion.save(update_fields=["deleted"])
+        else:
+            deletion.finished_at = timezone.now()
+            deletion.save(update_fields=["finished_at"])
+    return deletion
+
+
+def run_pending_deletions(
+    batch_size: int | None = None, report=None, deletion_id: int | None = None
+) -> int:
+    """Work through the pending deletions; return how many were finished.
+
+    Only works on the deletion ``deletion_id`` if given. ``report`` is
+    called with the deletion after every batch.
+    """
+    finished = 0
+    while (deletion := delete_next_batch(batch_size, deletion_id)) is not None:
+        if report is not None:
+            report(deletion)
+        if deletion.finished_at is not None:
+            finished += 1
+    return finished
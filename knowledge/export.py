@@ -0,0 +1,152 @@
+"""Streaming export of a product's domain knowledge as CSV or JSONL.
+
+Rows are read with server-side cursors (``.iterator()``) and written out as
+they arrive, so memory use stays flat no matter how large the product is.
+Responses served through ASGI need an async iterator (Django reads a sync
+one into a list first), which aiter_export provides.
+Each row describes one capability together with its subdomain and domain;
+subdomains without capabilities and domains without subdomains get a row of
+their own so an export can be imported back without losing anything.
+"""
+
+import csv
+import json
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+
+from users.models import Product
+
+from .models import Capability, Domain, SubDomain
+
+EXPORT_FIELDS = [
+    "domain",
+    "domain_description",
+    "subdomain",
+    "subdomain_description",
+    "capability",
+    "capability_description",
+]
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Rows are joined into buffers of about this many characters before being sent.
+BUFFER_SIZE = 64 * 1024
+
+
+def iter_export_rows(
+    product: Product, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[dict[str, str]]:
+    """Yield one export row per capability, then rows for empty parents."""
+    capabilities = (
+        Capability.objects.visible()
+        .filter(product=product)
+        .select_related("subdomain__domain")
+        .only(
+            "name",
+            "description",
+            "subdomain__name",
+            "subdomain__description",
+            "subdomain__domain__name",
+            "subdomain__domain__description",
+        )
+        .order_by("subdomain__domain__name", "subdomain__name", "name")
+    )
+    for capability in capabilities.iterator(chunk_size=chunk_size):
+        subdomain = capability.subdomain
+        yield _row(subdomain.domain, subdomain, capability)
+
+    empty_subdomains = (
+        SubDomain.objects.visible()
+        .filter(product=product, capabilities__isnull=True)
+        .select_related("domain")
+        .order_by("domain__name", "name")
+    )
+    for subdomain in empty_subdomains.iterator(chunk_size=chunk_size):
+        yield _row(subdomain.domain, subdomain)
+
+    # Domains with no subdomain that is not being deleted.
+    empty_domains = (
+        Domain.objects.visible()
+        .filter(product=product)
+        .exclude(subdomains__is_deleting=False)
+        .order_by("name")
+    )
+    for domain in empty_domains.iterator(chunk_size=chunk_size):
+        yield _row(domain)
+
+
+def _row(
+    domain: Domain,
+    subdomain: SubDomain | None = None,
+    capability: Capability | None = None,
+) -> dict[str, str]:
+    return {
+        "domain": domain.name,
+        "domain_description": domain.description,
+        "subdomain": subdomain.name if subdomain else "",
+        "subdomain_description": subdomain.description if subdomain else "",
+        "capability": capability.name if capability else "",
+        "capability_description": capability.description if capability else "",
+    }
+
+
+class _Echo:
+    """File-like object whose write() returns the value instead of storing it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(rows: Iterable[dict[str, str]]) -> Iterator[str]:
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(rows: Iterable[dict[str, str]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+# format -> (line writer, content type)
+FORMATS: dict[str, tuple[Callable[[Iterable[dict[str, str]]], Iterator[str]], str]] = {
+    "csv": (iter_csv, "text/csv"),
+    "jsonl": (iter_jsonl, "application/x-ndjson"),
+}
+
+
+def iter_export(
+    product: Product, format: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """Yield the export of ``product`` in ``format`` as buffered text chunks."""
+    write_lines, _ = FORMATS[format]
+    buffer: list[str] = []
+    size = 0
+    for line in write_lines(iter_export_rows(product, chunk_size)):
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+async def aiter_export(
+    product: Product, format: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> AsyncIterator[str]:
+    """Async version of iter_export, for responses served through ASGI.
+
+    The rows are still read by iter_export, one buffer at a time in the
+    thread that runs sync code, so memory use stays as flat.
+    """
+    chunks = iter_export(product, format, chunk_size)
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # Closes the server-side cursor if the client went away early.
+        await sync_to_async(chunks.close)()
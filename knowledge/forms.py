@@ -0,0 +1,58 @@
+from django import forms
+
+from .importer import IMPORT_FORMATS, detect_format
+
+
+class KnowledgeImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV, JSON Lines or YAML in the same format as an export"
+    )
+    format = forms.ChoiceField(
+        choices=[("", "Detect from file name")]
+        + [(f, f.upper()) for f in IMPORT_FORMATS],
+        required=False,
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        initial=True,
+        label="Dry run",
+        help_text="Show what would change without saving anything",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        file = cleaned_data.get("file")
+        if file and not cleaned_data.get("format"):
+            cleaned_data["format"] = detect_format(file.name)
+            if not cleaned_data["format"]:
+                self.add_error("format", "Choose a format for this file")
+        return cleaned_data
+
+
+class MoveForm(forms.Form):
+    """Move the rows picked on a list page (``items``) to a new ``target`` parent."""
+
+    items = forms.ModelMultipleChoiceField(
+        queryset=None, widget=forms.MultipleHiddenInput
+    )
+    target = forms.ModelChoiceField(queryset=None)
+
+    def __init__(self, *args, items, targets, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["items"].queryset = items
+        self.fields["target"].queryset = targets
+
+
+class KnowledgeCloneForm(forms.Form):
+    """Pick the product whose knowledge is copied into the current one."""
+
+    source = forms.ModelChoiceField(
+        queryset=None,
+        label="Copy from",
+        empty_label="Choose a product",
+        help_text="Every domain, subdomain and capability of it is copied",
+    )
+
+    def __init__(self, *args, products, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["source"].queryset = products
@@ -0,0 +1,310 @@
+"""Bulk import of domains, subdomains and capabilities with upsert semantics.
+
+Files use the same flat row format as ``knowledge.export`` (CSV, JSONL or a
+YAML list of mappings), so an export can be imported back as-is. The whole
+file is parsed and validated before anything is written; the write itself is
+three ``bulk_create(update_conflicts=True)`` passes inside one transaction,
+keyed on the models' ``unique_together`` constraints.
+"""
+
+import csv
+import io
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any
+
+import yaml
+from django.db import transaction
+
+from users.models import Product
+
+from .cache import invalidate_product_knowledge
+from .counters import record_change, recount_product
+from .export import EXPORT_FIELDS
+from .models import Capability, Domain, SubDomain
+
+IMPORT_FORMATS = ["csv", "jsonl", "yaml"]
+
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+BATCH_SIZE = 1000
+
+# Only this many validation errors are reported back.
+MAX_ERRORS = 50
+
+NAME_MAX_LENGTH = 255
+
+
+class KnowledgeImportError(Exception):
+    """The import file could not be parsed or failed validation."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def detect_format(filename: str) -> str | None:
+    return FORMAT_EXTENSIONS.get(Path(filename).suffix.lower())
+
+
+def parse_rows(stream: IO[str], import_format: str) -> list[dict[str, Any]]:
+    """Read every row of an import file into a list of dicts."""
+    try:
+        if import_format == "csv":
+            reader = csv.DictReader(stream)
+            if not reader.fieldnames or "domain" not in reader.fieldnames:
+                raise KnowledgeImportError(["The file must have a 'domain' column."])
+            return list(reader)
+        if import_format == "jsonl":
+            return [json.loads(line) for line in stream if line.strip()]
+        if import_format == "yaml":
+            rows = yaml.safe_load(stream) or []
+            if not isinstance(rows, list):
+                raise KnowledgeImportError(
+                    ["The YAML document must be a list of rows."]
+                )
+            return rows
+    except (csv.Error, json.JSONDecodeError, yaml.YAMLError, UnicodeDecodeError) as e:
+        raise KnowledgeImportError([f"The file could not be parsed: {e}"]) from e
+    raise KnowledgeImportError([f"Unsupported import format: {import_format}"])
+
+
+@dataclass
+class ImportPlan:
+    """Validated contents of an import file, keyed by natural key."""
+
+    domains: dict[str, str] = field(default_factory=dict)
+    subdomains: dict[tuple[str, str], str] = field(default_factory=dict)
+    capabilities: dict[tuple[str, str, str], str] = field(default_factory=dict)
+
+
+def build_plan(rows: Iterable[dict[str, Any]]) -> ImportPlan:
+    """Validate every row and collect them into an ImportPlan.
+
+    All errors are collected (up to MAX_ERRORS) and raised together.
+    """
+    plan = ImportPlan()
+    errors: list[str] = []
+
+    def put(target: dict, key: tuple | str, description: str, label: str, line: int):
+        if key in target and target[key] != description:
+            errors.append(
+                f"Row {line}: {label} has a different description on another row."
+            )
+        target.setdefault(key, description)
+
+    for line, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append(
+                f"Row {line}: expected a mapping of {', '.join(EXPORT_FIELDS)}."
+            )
+            continue
+        values = {name: str(row.get(name) or "").strip() for name in EXPORT_FIELDS}
+        domain, subdomain, capability = (
+            values["domain"],
+            values["subdomain"],
+            values["capability"],
+        )
+        row_errors = []
+        if not domain:
+            row_errors.append(f"Row {line}: domain is required.")
+        if capability and not subdomain:
+            row_errors.append(f"Row {line}: subdomain is required for a capability.")
+        for name in (domain, subdomain, capability):
+            if len(name) > NAME_MAX_LENGTH:
+                row_errors.append(
+                    f"Row {line}: names can be at most {NAME_MAX_LENGTH} characters."
+                )
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+
+        put(
+            plan.domains,
+            domain,
+            values["domain_description"],
+            f'Domain "{domain}"',
+            line,
+        )
+        if subdomain:
+            put(
+                plan.subdomains,
+                (domain, subdomain),
+                values["subdomain_description"],
+                f'SubDomain "{subdomain}"',
+                line,
+            )
+        if capability:
+            put(
+                plan.capabilities,
+                (domain, subdomain, capability),
+                values["capability_description"],
+                f'Capability "{capability}"',
+                line,
+            )
+
+    if errors:
+        raise KnowledgeImportError(errors[:MAX_ERRORS])
+    return plan
+
+
+@dataclass
+class LevelDiff:
+    """What an import does to one level of the hierarchy."""
+
+    created: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+
+@dataclass
+class ImportResult:
+    domains: LevelDiff
+    subdomains: LevelDiff
+    capabilities: LevelDiff
+    dry_run: bool
+
+    @property
+    def levels(self) -> list[tuple[str, LevelDiff]]:
+        return [
+            ("Domains", self.domains),
+            ("SubDomains", self.subdomains),
+            ("Capabilities", self.capabilities),
+        ]
+
+
+def _diff(planned: dict, existing: dict[Any, tuple[int, str]]) -> LevelDiff:
+    diff = LevelDiff()
+    for key, description in planned.items():
+        label = " / ".join(key) if isinstance(key, tuple) else key
+        if key not in existing:
+            diff.created.append(label)
+        elif existing[key][1] != description:
+            diff.updated.append(label)
+        else:
+            diff.unchanged += 1
+    return diff
+
+
+def import_knowledge(
+    product: Product, plan: ImportPlan, dry_run: bool = False
+) -> ImportResult:
+    """Upsert ``plan`` into ``product`` (or only diff it when ``dry_run``)."""
+    with transaction.atomic():
+        existing_domains = {
+            name: (pk, description)
+            for pk, name, description in Domain.objects.filter(
+                product=product
+            ).values_list("pk", "name", "description")
+        }
+        existing_subdomains = {
+            (domain, name): (pk, description)
+            for pk, domain, name, description in SubDomain.objects.filter(
+                product=product
+            ).values_list("pk", "domain__name", "name", "description")
+        }
+        existing_capabilities = {
+            (domain, subdomain, name): (pk, description)
+            for pk, domain, subdomain, name, description in Capability.objects.filter(
+                product=product
+            ).values_list(
+                "pk",
+                "subdomain__domain__name",
+                "subdomain__name",
+                "name",
+                "description",
+            )
+        }
+        result = ImportResult(
+            domains=_diff(plan.domains, existing_domains),
+            subdomains=_diff(plan.subdomains, existing_subdomains),
+            capabilities=_diff(plan.capabilities, existing_capabilities),
+            dry_run=dry_run,
+        )
+        if dry_run:
+            return result
+
+        domain_ids = {name: pk for name, (pk, _) in existing_domains.items()}
+        domains = Domain.objects.bulk_create(
+            [
+                Domain(product=product, name=name, description=description)
+                for name, description in plan.domains.items()
+                if _changed(existing_domains, name, description)
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["product", "name"],
+            update_fields=["description", "updated_at"],
+        )
+        domain_ids.update((domain.name, domain.pk) for domain in domains)
+
+        subdomain_ids = {key: pk for key, (pk, _) in existing_subdomains.items()}
+        subdomains = SubDomain.objects.bulk_create(
+            [
+                SubDomain(
+                    domain_id=domain_ids[domain],
+                    product=product,
+                    name=name,
+                    description=description,
+                )
+                for (domain, name), description in plan.subdomains.items()
+                if _changed(existing_subdomains, (domain, name), description)
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["domain", "name"],
+            update_fields=["description", "updated_at"],
+        )
+        domain_names = {pk: name for name, pk in domain_ids.items()}
+        subdomain_ids.update(
+            ((domain_names[subdomain.domain_id], subdomain.name), subdomain.pk)
+            for subdomain in subdomains
+        )
+
+        Capability.objects.bulk_create(
+            [
+                Capability(
+                    subdomain_id=subdomain_ids[(domain, subdomain)],
+                    product=product,
+                    name=name,
+                    description=description,
+                )
+                for (domain, subdomain, name), description in plan.capabilities.items()
+                if _changed(
+                    existing_capabilities, (domain, subdomain, name), description
+                )
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["subdomain", "name"],
+            update_fields=["description", "updated_at"],
+        )
+
+        recount_product(product.pk)
+        record_change(product.pk)
+        transaction.on_commit(lambda: invalidate_product_knowledge(product.pk))
+    return result
+
+
+def _changed(existing: dict, key, description: str) -> bool:
+    return key not in existing or existing[key][1] != description
+
+
+def import_file(
+    product: Product, file: IO[bytes], import_format: str, dry_run: bool = False
+) -> ImportResult:
+    """Parse, validate and import a binary file object."""
+    stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        rows = parse_rows(stream, import_format)
+    finally:
+        stream.detach()
+    return import_knowledge(product, build_plan(rows), dry_run=dry_run)
@@ -0,0 +1,40 @@
+"""Copy the knowledge hierarchy of one product into another."""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge.cloning import KnowledgeCloneError, clone_knowledge
+from users.models import Product
+
+
+class Command(BaseCommand):
+    help = "Copy every domain, subdomain and capability of a product into an empty one"
+
+    def add_arguments(self, parser):
+        parser.add_argument("source_id", type=int, help="The product to copy from")
+        parser.add_argument("target_id", type=int, help="The product to copy into")
+
+    def handle(self, *args, **options):
+        products = Product.objects.in_bulk([options["source_id"], options["target_id"]])
+        for key in ("source_id", "target_id"):
+            if options[key] not in products:
+                raise CommandError(f"Product {options[key]} does not exist.")
+        source = products[options["source_id"]]
+        target = products[options["target_id"]]
+
+        started = time.monotonic()
+        try:
+            result = clone_knowledge(source, target)
+        except KnowledgeCloneError as e:
+            raise CommandError(str(e)) from e
+        self.stdout.write(
+            f"Domains: {result.domains}, subdomains: {result.subdomains}, "
+            f"capabilities: {result.capabilities}"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Copied "{source.name}" into "{target.name}" '
+                f"in {time.monotonic() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,33 @@
+"""Export a product's domain knowledge as CSV or JSONL."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge.export import DEFAULT_CHUNK_SIZE, FORMATS, iter_export
+from users.models import Product
+
+
+class Command(BaseCommand):
+    help = "Export a product's domains, subdomains and capabilities as CSV or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("product_id", type=int)
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument(
+            "--output", "-o", help="File to write to (defaults to standard output)"
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            product = Product.objects.get(pk=options["product_id"])
+        except Product.DoesNotExist:
+            raise CommandError(f"Product {options['product_id']} does not exist.")
+
+        chunks = iter_export(product, options["format"], options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,58 @@
+"""Import domains, subdomains and capabilities into a product from a file."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge.importer import (
+    IMPORT_FORMATS,
+    KnowledgeImportError,
+    detect_format,
+    import_file,
+)
+from users.models import Product
+
+
+class Command(BaseCommand):
+    help = "Import (upsert) domain knowledge into a product from CSV, JSONL or YAML"
+
+    def add_arguments(self, parser):
+        parser.add_argument("product_id", type=int)
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=IMPORT_FORMATS, help="Defaults to the file extension"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Show the changes without saving"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            product = Product.objects.get(pk=options["product_id"])
+        except Product.DoesNotExist:
+            raise CommandError(f"Product {options['product_id']} does not exist.")
+
+        import_format = options["format"] or detect_format(options["path"])
+        if not import_format:
+            raise CommandError("Cannot detect the format; pass --format.")
+
+        try:
+            with open(options["path"], "rb") as file:
+                result = import_file(product, file, import_format, options["dry_run"])
+        except OSError as e:
+            raise CommandError(str(e))
+        except KnowledgeImportError as e:
+            raise CommandError("\n".join(e.errors))
+
+        for label, diff in result.levels:
+            self.stdout.write(
+                f"{label}: {len(diff.created)} created, {len(diff.updated)} updated, "
+                f"{diff.unchanged} unchanged"
+            )
+            if options["verbosity"] > 1:
+                for name in diff.created:
+                    self.stdout.write(f"  + {name}")
+                for name in diff.updated:
+                    self.stdout.write(f"  ~ {name}")
+        if result.dry_run:
+            self.stdout.write(self.style.WARNING("Dry run: nothing was saved."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Imported into "{product.name}".'))
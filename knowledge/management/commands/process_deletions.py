@@ -0,0 +1,34 @@
+"""Delete the rows of domains and subdomains deleted in the background.
+
+Their delete_knowledge jobs normally do this; the command finishes every
+pending deletion at once, without a job worker.
+"""
+
+from django.core.management.base import BaseCommand
+
+from knowledge.deletion import run_pending_deletions
+from knowledge.models import KnowledgeDeletion
+
+
+class Command(BaseCommand):
+    help = "Delete pending background deletions in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Rows per batch, defaults to KNOWLEDGE_DELETE_BATCH_SIZE",
+        )
+
+    def handle(self, *args, **options):
+        verbosity = options["verbosity"]
+
+        def report(deletion: KnowledgeDeletion) -> None:
+            if deletion.finished_at is not None or verbosity > 1:
+                self.stdout.write(
+                    f"{deletion}: {deletion.deleted}/{deletion.total} rows "
+                    f"({deletion.progress}%)"
+                )
+
+        finished = run_pending_deletions(options["batch_size"], report=report)
+        self.stdout.write(self.style.SUCCESS(f"Finished {finished} deletions."))
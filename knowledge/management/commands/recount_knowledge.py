@@ -0,0 +1,36 @@
+"""Recount the denormalised sizes of products' knowledge hierarchies."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from knowledge.counters import recount_product
+from users.models import Product
+
+
+class Command(BaseCommand):
+    help = "Recount domain, subdomain and product knowledge counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "product_ids", nargs="*", type=int, help="Defaults to every product"
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.order_by("pk")
+        if options["product_ids"]:
+            products = products.filter(pk__in=options["product_ids"])
+            missing = set(options["product_ids"]) - {p.pk for p in products}
+            if missing:
+                ids = ", ".join(str(pk) for pk in sorted(missing))
+                raise CommandError(f"Product {ids} does not exist.")
+
+        for product in products:
+            with transaction.atomic():
+                fixed = recount_product(product.pk)
+            if fixed:
+                self.stdout.write(
+                    self.style.WARNING(f'"{product.name}": fixed {fixed} counters')
+                )
+            elif options["verbosity"] > 1:
+                self.stdout.write(f'"{product.name}": counters are correct')
+        self.stdout.write(self.style.SUCCESS("Knowledge counters recounted."))
@@ -0,0 +1,42 @@
+"""Trigram indexes for the domain and subdomain typeahead (see knowledge.typeahead).
+
+pg_trgm ships with PostgreSQL's contrib package and is a trusted extension,
+so the database owner can create it. Where it is not installed the indexes
+are skipped and the typeahead uses plain prefix/substring matching.
+"""
+
+from django.db import migrations
+
+INDEXES = [
+    ("domain_name_trgm_idx", "knowledge_domain"),
+    ("subdomain_name_trgm_idx", "knowledge_subdomain"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, table in INDEXES:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+                f"USING gin (UPPER(name) gin_trgm_ops)"
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for name, _ in INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("knowledge", "0002_search_vectors"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
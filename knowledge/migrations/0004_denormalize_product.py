@@ -0,0 +1,92 @@
+"""Copy the product id onto subdomains and capabilities.
+
+The column is added as nullable, backfilled with one UPDATE ... FROM per
+table and only then made NOT NULL, so existing rows are never rejected.
+"""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_SUBDOMAINS = """
+UPDATE knowledge_subdomain AS s
+SET product_id = d.product_id
+FROM knowledge_domain AS d
+WHERE s.domain_id = d.id AND s.product_id IS DISTINCT FROM d.product_id
+"""
+
+BACKFILL_CAPABILITIES = """
+UPDATE knowledge_capability AS c
+SET product_id = s.product_id
+FROM knowledge_subdomain AS s
+WHERE c.subdomain_id = s.id AND c.product_id IS DISTINCT FROM s.product_id
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("knowledge", "0003_trigram_indexes"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subdomain",
+            name="product",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="subdomains",
+                to="users.product",
+            ),
+        ),
+        migrations.AddField(
+            model_name="capability",
+            name="product",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="capabilities",
+                to="users.product",
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_SUBDOMAINS, migrations.RunSQL.noop),
+        migrations.RunSQL(BACKFILL_CAPABILITIES, migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name="subdomain",
+            name="product",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="subdomains",
+                to="users.product",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="capability",
+            name="product",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="capabilities",
+                to="users.product",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subdomain",
+            index=models.Index(
+                fields=["product", "name", "id"], name="subdomain_product_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="capability",
+            index=models.Index(
+                fields=["product", "name", "id"], name="capability_product_name_idx"
+            ),
+        ),
+    ]
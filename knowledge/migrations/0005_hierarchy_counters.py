@@ -0,0 +1,85 @@
+"""Counter columns on domains and subdomains, and per-product totals.
+
+Existing rows are counted with one aggregate UPDATE ... FROM per table;
+afterwards ``knowledge.counters`` keeps the numbers current.
+"""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_SUBDOMAINS = """
+UPDATE knowledge_subdomain AS s
+SET capability_count = c.n
+FROM (
+    SELECT subdomain_id, count(*) AS n FROM knowledge_capability GROUP BY subdomain_id
+) AS c
+WHERE s.id = c.subdomain_id
+"""
+
+BACKFILL_DOMAINS = """
+UPDATE knowledge_domain AS d
+SET subdomain_count = s.n, capability_count = s.capabilities
+FROM (
+    SELECT domain_id, count(*) AS n, sum(capability_count) AS capabilities
+    FROM knowledge_subdomain GROUP BY domain_id
+) AS s
+WHERE d.id = s.domain_id
+"""
+
+BACKFILL_PRODUCTS = """
+INSERT INTO knowledge_productknowledgestats
+    (product_id, domain_count, subdomain_count, capability_count)
+SELECT p.id, count(d.id), coalesce(sum(d.subdomain_count), 0),
+       coalesce(sum(d.capability_count), 0)
+FROM users_product AS p LEFT JOIN knowledge_domain AS d ON d.product_id = p.id
+GROUP BY p.id
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("knowledge", "0004_denormalize_product"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductKnowledgeStats",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="knowledge_stats",
+                        serialize=False,
+                        to="users.product",
+                    ),
+                ),
+                ("domain_count", models.PositiveIntegerField(default=0)),
+                ("subdomain_count", models.PositiveIntegerField(default=0)),
+                ("capability_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "product knowledge stats",
+            },
+        ),
+        migrations.AddField(
+            model_name="domain",
+            name="capability_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="domain",
+            name="subdomain_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="subdomain",
+            name="capability_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_SUBDOMAINS, migrations.RunSQL.noop),
+        migrations.RunSQL(BACKFILL_DOMAINS, migrations.RunSQL.noop),
+        migrations.RunSQL(BACKFILL_PRODUCTS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,39 @@
+"""When each product's knowledge last changed.
+
+Existing products start from the latest ``updated_at`` of their domains,
+subdomains and capabilities, found in one grouped pass over the tables.
+"""
+
+from django.db import migrations, models
+
+BACKFILL_CHANGED_AT = """
+UPDATE knowledge_productknowledgestats AS s
+SET changed_at = k.changed_at
+FROM (
+    SELECT product_id, max(updated_at) AS changed_at
+    FROM (
+        SELECT product_id, updated_at FROM knowledge_domain
+        UNION ALL
+        SELECT product_id, updated_at FROM knowledge_subdomain
+        UNION ALL
+        SELECT product_id, updated_at FROM knowledge_capability
+    ) AS rows
+    GROUP BY product_id
+) AS k
+WHERE s.product_id = k.product_id
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("knowledge", "0005_hierarchy_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productknowledgestats",
+            name="changed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_CHANGED_AT, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.1.2 on 2026-10-18 17:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0006_knowledge_changed_at'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='domain',
+            name='is_deleting',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='subdomain',
+            name='is_deleting',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name='KnowledgeDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('domain', 'Domain'), ('subdomain', 'SubDomain')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('name', models.CharField(max_length=255)),
+                ('total', models.PositiveIntegerField()),
+                ('deleted', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='knowledge_deletions', to='users.product')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('finished_at__isnull', True)), fields=['created_at', 'id'], name='knowledgedeletion_pending_idx')],
+            },
+        ),
+    ]
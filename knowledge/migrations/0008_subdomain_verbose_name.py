@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-18 18:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0007_background_deletion'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='subdomain',
+            options={'ordering': ['name'], 'verbose_name': 'subdomain'},
+        ),
+    ]
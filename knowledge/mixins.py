@@ -1,15 +1,42 @@
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.messages import get_messages
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
-from django.shortcuts import get_object_or_404
+from django.db.models import QuerySet
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+from django.views.generic import View
+from django.views.generic.edit import BaseCreateView, DeletionMixin
+
+from users.access import (
+    aget_active_product,
+    aget_membership_role,
+    get_active_product,
+    get_membership_role,
+)
+from users.models import ProductMembership
 
-from users.models import Product, ProductMembership
+from .cache import afragment_cache_key, fragment_cache_key
+from .conditional import KnowledgeValidators
+from .deletion import delete_in_background, subtree_size
+from .forms import MoveForm
+from .models import HierarchyModel
+from .moving import MoveConflictError, move_rows
 
 
 class ProductAccessMixin(LoginRequiredMixin):
     """Mixin that checks user has access to the product.
 
     Expects 'product_id' in URL kwargs.
-    Sets self.product for use in views.
+    Sets self.product and self.membership_role for use in views. Both lookups
+    are cached (see users.access), so repeat requests need no queries.
     """
 
     # Roles that can access (override in subclass for different permissions)
@@ -20,29 +47,57 @@ class ProductAccessMixin(LoginRequiredMixin):
     ]
 
     def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+
         # Get product from URL
-        product_id = kwargs.get("product_id")
-        self.product = get_object_or_404(Product, pk=product_id, is_active=True)
+        product = get_active_product(kwargs.get("product_id"))
+        role = get_membership_role(request.user.pk, product.pk) if product else None
+        self.check_product_access(request.user, product, role)
+
+        return super().dispatch(request, *args, **kwargs)
+
+    def check_product_access(self, user, product, role: str | None) -> None:
+        """Set self.product and self.membership_role, or deny the request."""
+        if product is None:
+            raise Http404("No Product matches the given query.")
+        self.product = product
+        self.membership_role = role
 
         # Check user has membership with allowed role
-        if not request.user.is_superuser:
-            has_access = ProductMembership.objects.filter(
-                user=request.user,
-                product=self.product,
-                role__in=self.allowed_roles,
-            ).exists()
-
-            if not has_access:
+        if not user.is_superuser:
+            if self.membership_role not in self.allowed_roles:
                 raise PermissionDenied("You do not have access to this product.")
 
-        return super().dispatch(request, *args, **kwargs)
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["product"] = self.product
         return context
 
 
+class AsyncProductAccessMixin(ProductAccessMixin):
+    """ProductAccessMixin for views with async handlers.
+
+    Loads the user, product and role with the async auth, cache and ORM APIs
+    and then dispatches straight to View.dispatch, skipping the synchronous
+    login check of LoginRequiredMixin.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        # Later sync code (templates, handle_no_permission) reads request.user;
+        # give it the loaded user instead of a lazy object that would query.
+        request.user = user
+        if not user.is_authenticated:
+            return self.handle_no_permission()
+
+        product = await aget_active_product(kwargs.get("product_id"))
+        role = await aget_membership_role(user.pk, product.pk) if product else None
+        self.check_product_access(user, product, role)
+
+        return await View.dispatch(self, request, *args, **kwargs)
+
+
 class ProductEditMixin(ProductAccessMixin):
     """Mixin for views that require edit access (Manager or Contributor)."""
 
@@ -58,3 +113,278 @@ class ProductManagerMixin(ProductAccessMixin):
     allowed_roles = [
         ProductMembership.Role.MANAGER,
     ]
+
+
+class KnowledgeConditionalMixin:
+    """Answer conditional GETs with 304 from the product's knowledge version.
+
+    Must follow ProductAccessMixin. The ETag also varies on the user (the page
+    shows who is logged in) and on HTMX requests, which get a fragment. Pages
+    with pending flash messages are always rendered so the messages are shown.
+    """
+
+    def get_validator_variant(self, request) -> tuple:
+        return (request.user.pk, "hx" if request.headers.get("HX-Request") else "page")
+
+    def get(self, request, *args, **kwargs):
+        if len(get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        validators = KnowledgeValidators(
+            self.product.pk, *self.get_validator_variant(request)
+        )
+        if response := validators.not_modified(request):
+            return response
+        return validators.apply(super().get(request, *args, **kwargs))
+
+
+class AsyncKnowledgeConditionalMixin(KnowledgeConditionalMixin):
+    """KnowledgeConditionalMixin for async views (the next get() is async)."""
+
+    async def get(self, request, *args, **kwargs):
+        if len(get_messages(request)):
+            return await super(KnowledgeConditionalMixin, self).get(
+                request, *args, **kwargs
+            )
+        validators = await KnowledgeValidators.acreate(
+            self.product.pk, *self.get_validator_variant(request)
+        )
+        if response := validators.not_modified(request):
+            return response
+        response = await super(KnowledgeConditionalMixin, self).get(
+            request, *args, **kwargs
+        )
+        return validators.apply(response)
+
+
+class FragmentCacheMixin:
+    """ListView mixin that serves the rendered table from the versioned cache.
+
+    ``table_template_name`` (or ``rows_template_name`` for HTMX requests) is
+    rendered once per knowledge version and value of the ``fragment_params``
+    GET parameters, so a hit runs no knowledge queries at all. Other GET
+    parameters are ignored: they must not change the fragment, and do not
+    make new cache entries. The page template gets the fragment as
+    ``table``. Fragments must not contain anything user-specific.
+    """
+
+    table_template_name: str | None = None
+    active_section: str | None = None
+    fragment_params: tuple[str, ...] = ("cursor",)
+
+    def get_fragment_query(self) -> str:
+        """The fragment's GET parameters, sorted and urlencoded."""
+        params = sorted(
+            (name, self.request.GET[name])
+            for name in self.fragment_params
+            if name in self.request.GET
+        )
+        return urlencode(params)
+
+    def get_fragment_template_name(self) -> str:
+        if self.request.headers.get("HX-Request") and self.rows_template_name:
+            return self.rows_template_name
+        return self.table_template_name
+
+    def get(self, request, *args, **kwargs):
+        fragment_template_name = self.get_fragment_template_name()
+        key = fragment_cache_key(
+            self.product.pk, fragment_template_name, self.get_fragment_query()
+        )
+        html = cache.get(key)
+        if html is None:
+            self.object_list = self.get_queryset()
+            html = render_to_string(
+                fragment_template_name, self.get_context_data(), request
+            )
+            cache.set(key, html, settings.KNOWLEDGE_CACHE_TTL)
+        return self.fragment_response(fragment_template_name, html)
+
+    def fragment_response(self, fragment_template_name: str, html: str):
+        if fragment_template_name != self.table_template_name:
+            return HttpResponse(html)
+        return self.response_class(
+            request=self.request,
+            template=[self.template_name],
+            context={
+                "view": self,
+                "product": self.product,
+                "active_section": self.active_section,
+                "table": mark_safe(html),
+            },
+            using=self.template_engine,
+        )
+
+
+class AsyncFragmentCacheMixin(FragmentCacheMixin):
+    """FragmentCacheMixin for async views.
+
+    On a miss the page is fetched with KeysetPaginationMixin.aload_page(), so
+    rendering the fragment runs no queries; its templates must only follow
+    relations the queryset select_related()s.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        fragment_template_name = self.get_fragment_template_name()
+        key = await afragment_cache_key(
+            self.product.pk, fragment_template_name, self.get_fragment_query()
+        )
+        html = await cache.aget(key)
+        if html is None:
+            await self.aload_page()
+            self.object_list = self.get_queryset()
+            html = render_to_string(
+                fragment_template_name, self.get_context_data(), request
+            )
+            await cache.aset(key, html, settings.KNOWLEDGE_CACHE_TTL)
+        return self.fragment_response(fragment_template_name, html)
+
+
+class BackgroundDeleteMixin:
+    """DeleteView mixin that hides a large object and deletes it in the background.
+
+    See knowledge.deletion. ``self.deletion`` is the KnowledgeDeletion, or
+    None if the object was small enough to be deleted at once. The
+    confirmation page gets the size of what will be deleted from the
+    object's counters, without counting the subtree.
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        size = subtree_size(self.object)
+        context["subtree_size"] = size
+        context["deletes_in_background"] = size > settings.KNOWLEDGE_DELETE_BATCH_SIZE
+        return context
+
+    def form_valid(self, form):
+        self.deletion = delete_in_background(self.object)
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class HtmxDialogMixin:
+    """Views whose HTMX requests are shown in the list pages' dialog.
+
+    An HX-Request renders the view's template without the page around it
+    (``base_template`` is knowledge/dialog.html).
+    """
+
+    def is_htmx(self) -> bool:
+        return bool(self.request.headers.get("HX-Request"))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.is_htmx():
+            context["base_template"] = "knowledge/dialog.html"
+            context["dialog"] = True
+        return context
+
+
+class HtmxEditMixin(HtmxDialogMixin):
+    """Create, update and delete views that answer HTMX requests with fragments.
+
+    An HX-Request GET renders the form in the list pages' dialog (see
+    HtmxDialogMixin). A successful HX-Request POST answers with only the
+    changed row of the list the user is on (from HX-Current-URL), swapped in
+    out of band, plus the flash messages as out-of-band toasts; the empty
+    main content closes the dialog. Requests without HX-Request keep the
+    page-and-redirect flow.
+    """
+
+    row_template_name: str | None = None
+
+    def get_row_id(self) -> str:
+        return f"{self.object._meta.model_name}-{self.object.pk}"
+
+    def form_valid(self, form):
+        deleting = isinstance(self, DeletionMixin)
+        # A deleted object has no pk any more.
+        row_id = self.get_row_id() if deleting else None
+        response = super().form_valid(form)
+        if not self.is_htmx() or not isinstance(response, HttpResponseRedirect):
+            return response
+        context = {"product": self.product}
+        current_path = urlsplit(self.request.headers.get("HX-Current-URL", "")).path
+        if current_path == urlsplit(response.url).path:
+            if deleting:
+                context["removed_row_id"] = row_id
+            else:
+                model_name = self.object._meta.model_name
+                context.update(
+                    {
+                        model_name: self.object,
+                        "row_template_name": self.row_template_name,
+                        "rows_id": f"{model_name}-rows",
+                        "created": isinstance(self, BaseCreateView),
+                    }
+                )
+        return TemplateResponse(self.request, "knowledge/partials/saved.html", context)
+
+
+class BulkMoveMixin(HtmxDialogMixin):
+    """FormView mixin that moves the rows picked on a list to another parent.
+
+    The list's checkboxes send ``items`` to a GET of the view, which shows
+    the form (in the dialog for HTMX); posting it with a ``target`` moves
+    them all at once (see knowledge.moving). Afterwards the list page is
+    reloaded, as the moved rows changed parents.
+    """
+
+    form_class = MoveForm
+    template_name = "knowledge/move_form.html"
+    # Set by subclasses: the moved rows and their parents, the list page, and
+    # the typeahead picking the target.
+    model: type[HierarchyModel]
+    target_model: type[HierarchyModel]
+    list_url_name: str
+    lookup_url_name: str
+
+    def get_items(self) -> QuerySet:
+        return self.model.objects.visible().filter(product=self.product)
+
+    def get_targets(self) -> QuerySet:
+        return self.target_model.objects.visible().filter(product=self.product)
+
+    def move(self, ids: list[int], target) -> int:
+        return move_rows(self.model, self.product.pk, ids, target)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs.update(items=self.get_items(), targets=self.get_targets())
+        return kwargs
+
+    def get_selected_ids(self) -> list[int]:
+        data = self.request.POST if self.request.method == "POST" else self.request.GET
+        return [int(pk) for pk in data.getlist("items") if pk.isdigit()]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["selected"] = self.get_items().filter(pk__in=self.get_selected_ids())
+        context["opts"] = self.model._meta
+        context["target_opts"] = self.target_model._meta
+        context["list_url"] = self.get_success_url()
+        context["lookup_url"] = reverse(
+            self.lookup_url_name, kwargs={"product_id": self.product.pk}
+        )
+        return context
+
+    def form_valid(self, form):
+        target = form.cleaned_data["target"]
+        ids = [item.pk for item in form.cleaned_data["items"]]
+        opts = self.model._meta
+        try:
+            moved = self.move(ids, target)
+        except MoveConflictError as e:
+            names = ", ".join(f'"{name}"' for name in e.names)
+            form.add_error(
+                None,
+                f'Nothing was moved: "{target}" would have more than one '
+                f"{opts.verbose_name} named {names}.",
+            )
+            return self.form_invalid(form)
+        name = opts.verbose_name if moved == 1 else opts.verbose_name_plural
+        messages.success(self.request, f'Moved {moved} {name} to "{target}".')
+        if self.is_htmx():
+            return HttpResponse(headers={"HX-Refresh": "true"})
+        return HttpResponseRedirect(self.get_success_url())
+
+    def get_success_url(self):
+        return reverse(self.list_url_name, kwargs={"product_id": self.product.pk})
@@ -1,9 +1,108 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 
 from users.models import Product
 
+from .cache import invalidate_product_knowledge
 
-class Domain(models.Model):
+# Text search configuration used for the stored search vectors and queries.
+SEARCH_CONFIG = "english"
+
+
+def search_vector_field() -> models.GeneratedField:
+    """Stored tsvector over name (weight A) and description (weight B)."""
+    return models.GeneratedField(
+        expression=SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+
+class HierarchyQuerySet(models.QuerySet):
+    def visible(self) -> "HierarchyQuerySet":
+        """Exclude rows that are being deleted (see knowledge.deletion)."""
+        return self.filter(**{self.model.deleting_lookup: False})
+
+
+class HierarchyModel(models.Model):
+    """A level of the knowledge hierarchy: domain, subdomain or capability.
+
+    Remembers the parent and product ids a row was loaded with, so save() and
+    the receivers in ``knowledge.signals`` can tell that it moved (the ids
+    are read again when a save changes the parent, as the copy in hand may
+    be stale). product_changed() runs after a move to another product. A full
+    save() of an existing row leaves the counter columns out: they are only
+    written with F() updates by ``knowledge.counters``, and writing back the
+    value read earlier would lose concurrent increments. Nor does it write
+    is_deleting, which only knowledge.deletion sets.
+    """
+
+    # Attribute name of the foreign key to the level above.
+    parent_field: str = "product_id"
+    counter_fields: tuple[str, ...] = ()
+    # Lookup that is true for rows hidden by a pending deletion.
+    deleting_lookup: str = "is_deleting"
+
+    objects = HierarchyQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        parent_id = getattr(self, self.parent_field)
+        if not self._state.adding and self.loaded(self.parent_field) != parent_id:
+            self._loaded = (
+                type(self)
+                ._base_manager.filter(pk=self.pk)
+                .values(*self._tracked_fields())
+                .first()
+                or {}
+            )
+        previous_product_id = self.loaded("product_id")
+        if (
+            self.counter_fields
+            and not self._state.adding
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and not field.generated
+                and field.name not in self.counter_fields
+                and field.name != "is_deleting"
+            ]
+        super().save(*args, **kwargs)
+        self._loaded = {name: getattr(self, name) for name in self._tracked_fields()}
+        if previous_product_id != self.product_id:
+            self.product_changed(previous_product_id)
+
+    @classmethod
+    def from_db(cls, db, field_names, values, **kwargs):
+        instance = super().from_db(db, field_names, values, **kwargs)
+        instance._loaded = {
+            name: instance.__dict__[name]
+            for name in cls._tracked_fields()
+            if name in instance.__dict__
+        }
+        return instance
+
+    @classmethod
+    def _tracked_fields(cls) -> set[str]:
+        return {cls.parent_field, "product_id"}
+
+    def loaded(self, attname: str):
+        """Value of ``attname`` when the row was loaded or last saved."""
+        return getattr(self, "_loaded", {}).get(attname, getattr(self, attname))
+
+    def product_changed(self, previous_product_id: int) -> None:
+        invalidate_product_knowledge(previous_product_id)
+
+
+class Domain(HierarchyModel):
     """Top-level area of concern within a product."""
 
     name = models.CharField(max_length=255)
@@ -13,19 +112,37 @@ class Domain(models.Model):
         on_delete=models.CASCADE,
         related_name="domains",
     )
+    subdomain_count = models.PositiveIntegerField(default=0, editable=False)
+    capability_count = models.PositiveIntegerField(default=0, editable=False)
+    is_deleting = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = search_vector_field()
+
+    counter_fields = ("subdomain_count", "capability_count")
 
     class Meta:
         unique_together = ["product", "name"]
         ordering = ["name"]
+        indexes = [GinIndex(fields=["search_vector"], name="domain_search_idx")]
 
     def __str__(self) -> str:
         return self.name
 
+    def product_changed(self, previous_product_id: int) -> None:
+        SubDomain.objects.filter(domain=self).update(product_id=self.product_id)
+        Capability.objects.filter(subdomain__domain=self).update(
+            product_id=self.product_id
+        )
+        super().product_changed(previous_product_id)
+
 
-class SubDomain(models.Model):
-    """Nested area within a domain containing entities, capabilities, and glossary."""
+class SubDomain(HierarchyModel):
+    """Nested area within a domain containing entities, capabilities, and glossary.
+
+    ``product`` is kept equal to ``domain.product`` by save() (and by
+    Domain.save() when a domain moves). Bulk writes must set it themselves.
+    """
 
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -34,19 +151,56 @@ class SubDomain(models.Model):
         on_delete=models.CASCADE,
         related_name="subdomains",
     )
+    # Copy of domain.product_id, so product-scoped queries need no join.
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="subdomains",
+        editable=False,
+        db_index=False,  # covered by subdomain_product_name_idx
+    )
+    capability_count = models.PositiveIntegerField(default=0, editable=False)
+    is_deleting = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = search_vector_field()
+
+    parent_field = "domain_id"
+    counter_fields = ("capability_count",)
 
     class Meta:
         unique_together = ["domain", "name"]
         ordering = ["name"]
+        verbose_name = "subdomain"
+        indexes = [
+            GinIndex(fields=["search_vector"], name="subdomain_search_idx"),
+            models.Index(
+                fields=["product", "name", "id"], name="subdomain_product_name_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.product_id = self.domain.product_id
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "domain" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "product"}
+        super().save(*args, **kwargs)
+
+    def product_changed(self, previous_product_id: int) -> None:
+        Capability.objects.filter(subdomain=self).update(product_id=self.product_id)
+        super().product_changed(previous_product_id)
 
-class Capability(models.Model):
-    """What the system can do. Verb-like actions at the subdomain level."""
+
+class Capability(HierarchyModel):
+    """What the system can do. Verb-like actions at the subdomain level.
+
+    ``product`` is kept equal to ``subdomain.product`` by save() (and by the
+    parent's save() when a subdomain or domain moves). Bulk writes must set
+    it themselves.
+    """
 
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -55,13 +209,107 @@ class Capability(models.Model):
         on_delete=models.CASCADE,
         related_name="capabilities",
     )
+    # Copy of subdomain.product_id, so product-scoped queries need no join.
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="capabilities",
+        editable=False,
+        db_index=False,  # covered by capability_product_name_idx
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = search_vector_field()
+
+    parent_field = "subdomain_id"
+    deleting_lookup = "subdomain__is_deleting"
 
     class Meta:
         unique_together = ["subdomain", "name"]
         ordering = ["name"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="capability_search_idx"),
+            models.Index(
+                fields=["product", "name", "id"], name="capability_product_name_idx"
+            ),
+        ]
         verbose_name_plural = "capabilities"
 
     def __str__(self) -> str:
         return self.name
+
+    def save(self, *args, **kwargs):
+        self.product_id = self.subdomain.product_id
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "subdomain" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "product"}
+        super().save(*args, **kwargs)
+
+
+class ProductKnowledgeStats(models.Model):
+    """Size of a product's knowledge and when it last changed.
+
+    Maintained by ``knowledge.counters`` together with the counter columns
+    of Domain and SubDomain.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="knowledge_stats",
+    )
+    domain_count = models.PositiveIntegerField(default=0)
+    subdomain_count = models.PositiveIntegerField(default=0)
+    capability_count = models.PositiveIntegerField(default=0)
+    changed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "product knowledge stats"
+
+    def __str__(self) -> str:
+        return f"Knowledge stats of product {self.product_id}"
+
+
+class KnowledgeDeletion(models.Model):
+    """A domain or subdomain being deleted in the background, and its progress.
+
+    See ``knowledge.deletion``. ``total`` rows (the object and everything
+    below it) are removed in batches; ``deleted`` counts them as they go.
+    """
+
+    class Level(models.TextChoices):
+        DOMAIN = "domain", "Domain"
+        SUBDOMAIN = "subdomain", "SubDomain"
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="knowledge_deletions",
+    )
+    level = models.CharField(max_length=20, choices=Level.choices)
+    # Not a foreign key: the row is deleted while this record remains.
+    object_id = models.BigIntegerField()
+    name = models.CharField(max_length=255)
+    total = models.PositiveIntegerField()
+    deleted = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(finished_at__isnull=True),
+                name="knowledgedeletion_pending_idx",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"Deletion of {self.get_level_display()} {self.name!r}"
+
+    @property
+    def progress(self) -> int:
+        """Share of the rows deleted so far, in percent."""
+        return min(100, self.deleted * 100 // self.total) if self.total else 100
@@ -0,0 +1,74 @@
+"""Moving many capabilities or subdomains to another parent at once.
+
+The rows are moved with one ``UPDATE ... WHERE id IN (...)``; the counters
+of the old and new parents are adjusted with set-based updates (see
+counters.count_moved) instead of one save() per row.
+
+A parent cannot have two children of the same name. Before anything is
+written, one grouped query looks for names the moved rows would share with
+each other or with the target's children, so every clash is reported
+together and nothing is moved.
+"""
+
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Now
+
+from .cache import invalidate_product_knowledge
+from .counters import count_moved, record_change
+from .models import HierarchyModel
+
+
+class MoveConflictError(Exception):
+    """The target already has (or would get two) children of these names."""
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        super().__init__(f"Name conflicts: {', '.join(names)}")
+
+
+def conflicting_names(model: type[HierarchyModel], ids: list[int], target) -> list[str]:
+    """Names the rows ``ids`` would share with each other or target's children."""
+    parent = {model.parent_field: target.pk}
+    return list(
+        model._base_manager.filter(Q(**parent) | Q(pk__in=ids))
+        .values("name")
+        .annotate(rows=Count("pk"))
+        .filter(rows__gt=1)
+        .order_by("name")
+        .values_list("name", flat=True)
+    )
+
+
+def move_rows(
+    model: type[HierarchyModel], product_id: int, ids: Iterable[int], target
+) -> int:
+    """Move the product's ``model`` rows ``ids`` to ``target``; return how many.
+
+    ``target`` must be of the parent model and belong to the product. Raises
+    MoveConflictError.
+    """
+    with transaction.atomic():
+        ids = list(
+            model.objects.visible()
+            .filter(product_id=product_id, pk__in=ids)
+            .exclude(**{model.parent_field: target.pk})
+            .select_for_update(of=("self",))
+            .values_list("pk", flat=True)
+        )
+        if not ids:
+            return 0
+        conflicts = conflicting_names(model, ids, target)
+        if conflicts:
+            raise MoveConflictError(conflicts)
+
+        moved = model.objects.filter(pk__in=ids)
+        count_moved(moved, target)
+        moved.update(**{model.parent_field: target.pk, "updated_at": Now()})
+
+        record_change(product_id)
+        invalidate_product_knowledge(product_id)
+        transaction.on_commit(lambda: invalidate_product_knowledge(product_id))
+    return len(ids)
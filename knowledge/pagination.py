@@ -0,0 +1,154 @@
+"""Keyset (cursor) pagination over the (name, id) ordering of knowledge models.
+
+Unlike offset pagination, every page is a single index range scan, so the
+cost of a page does not grow with its position or the size of the product.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+
+def encode_cursor(name: str, pk: int, reverse: bool = False) -> str:
+    """Encode a (name, id) position as an opaque URL-safe token."""
+    payload = json.dumps([name, pk, reverse], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[str, int, bool]:
+    """Decode a token from encode_cursor, raising Http404 if it is malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        name, pk, reverse = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(name, str) or not isinstance(pk, int):
+            raise ValueError
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise Http404("Invalid cursor.") from None
+    return name, pk, bool(reverse)
+
+
+@dataclass
+class KeysetPage:
+    """One page of results with tokens for the neighbouring pages."""
+
+    object_list: list = field(default_factory=list)
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(
+    queryset: QuerySet, cursor: str | None, page_size: int
+) -> KeysetPage:
+    """Return the page of ``queryset`` that starts after (or ends before) ``cursor``."""
+    rows_queryset, reverse = _keyset_slice(queryset, cursor, page_size)
+    return _keyset_page(list(rows_queryset), cursor, reverse, page_size)
+
+
+async def apaginate_keyset(
+    queryset: QuerySet, cursor: str | None, page_size: int
+) -> KeysetPage:
+    """Async version of paginate_keyset."""
+    rows_queryset, reverse = _keyset_slice(queryset, cursor, page_size)
+    rows = [row async for row in rows_queryset]
+    return _keyset_page(rows, cursor, reverse, page_size)
+
+
+def _keyset_slice(
+    queryset: QuerySet, cursor: str | None, page_size: int
+) -> tuple[QuerySet, bool]:
+    """Return the rows to fetch (one more than a page) and the direction."""
+    if not cursor:
+        return queryset.order_by("name", "id")[: page_size + 1], False
+
+    name, pk, reverse = decode_cursor(cursor)
+    if reverse:
+        return (
+            queryset.filter(Q(name__lt=name) | Q(name=name, id__lt=pk)).order_by(
+                "-name", "-id"
+            )[: page_size + 1],
+            True,
+        )
+    return (
+        queryset.filter(Q(name__gt=name) | Q(name=name, id__gt=pk)).order_by(
+            "name", "id"
+        )[: page_size + 1],
+        False,
+    )
+
+
+def _keyset_page(
+    rows: list, cursor: str | None, reverse: bool, page_size: int
+) -> KeysetPage:
+    if reverse:
+        page = KeysetPage(rows[:page_size][::-1])
+        if page.object_list:
+            page.next_cursor = _cursor_for(page.object_list[-1])
+        if len(rows) > page_size:
+            page.previous_cursor = _cursor_for(page.object_list[0], reverse=True)
+        return page
+
+    page = KeysetPage(rows[:page_size])
+    if cursor and page.object_list:
+        page.previous_cursor = _cursor_for(page.object_list[0], reverse=True)
+    if len(rows) > page_size:
+        page.next_cursor = _cursor_for(page.object_list[-1])
+    return page
+
+
+def _cursor_for(obj, reverse: bool = False) -> str:
+    return encode_cursor(obj.name, obj.pk, reverse)
+
+
+class KeysetPaginationMixin:
+    """ListView mixin that swaps offset pagination for keyset pagination.
+
+    Reads the cursor from ``?cursor=`` and exposes the page as ``page_obj``.
+    HTMX requests (infinite scroll) get ``rows_template_name`` only. Async
+    views await aload_page() first; get_context_data() then uses that page.
+    """
+
+    paginate_by = 50
+    cursor_kwarg = "cursor"
+    rows_template_name: str | None = None
+    keyset_page: KeysetPage | None = None
+
+    def paginate_queryset(self, queryset, page_size):
+        page = self.keyset_page
+        if page is None:
+            page = paginate_keyset(
+                queryset, self.request.GET.get(self.cursor_kwarg), page_size
+            )
+        return (None, page, page.object_list, page.has_other_pages())
+
+    async def aload_page(self) -> None:
+        """Fetch the current page with the async ORM."""
+        queryset = self.get_queryset()
+        self.keyset_page = await apaginate_keyset(
+            queryset,
+            self.request.GET.get(self.cursor_kwarg),
+            self.get_paginate_by(queryset),
+        )
+
+    def get_template_names(self):
+        if self.request.headers.get("HX-Request") and self.rows_template_name:
+            return [self.rows_template_name]
+        return super().get_template_names()
@@ -0,0 +1,154 @@
+"""Ranked full-text search over the domains, subdomains and capabilities of a product.
+
+Each model has a stored ``search_vector`` column (name weighted A, description
+weighted B) with a GIN index, so matching is an index lookup rather than a
+scan of the product. Each level is ranked with one query; only the top
+``limit`` rows of each are highlighted and the three lists are merged by rank.
+"""
+
+from dataclasses import dataclass
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F, QuerySet
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+
+from users.models import Product
+
+from .models import SEARCH_CONFIG, Capability, Domain, SubDomain
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# ts_headline does not escape its input, so matches are marked with control
+# characters and the text is escaped before they are turned into <mark> tags.
+_START_SEL = "\x02"
+_STOP_SEL = "\x03"
+
+
+@dataclass
+class SearchResult:
+    kind: str
+    id: int
+    name: SafeString
+    description: SafeString
+    rank: float
+    path: list[str]
+    url: str
+
+
+def _highlight(text: str) -> SafeString:
+    return mark_safe(
+        escape(text).replace(_START_SEL, "<mark>").replace(_STOP_SEL, "</mark>")
+    )
+
+
+def _headline(field: str, query: SearchQuery, **options) -> SearchHeadline:
+    return SearchHeadline(
+        field,
+        query,
+        config=SEARCH_CONFIG,
+        start_sel=_START_SEL,
+        stop_sel=_STOP_SEL,
+        **options,
+    )
+
+
+def _ranked(
+    queryset: QuerySet, query: SearchQuery, limit: int, *fields: str
+) -> QuerySet:
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(
+            rank=SearchRank(F("search_vector"), query),
+            name_headline=_headline("name", query, highlight_all=True),
+            description_headline=_headline("description", query, max_fragments=2),
+        )
+        .order_by("-rank", "name", "id")
+        .values("id", "rank", "name_headline", "description_headline", *fields)[:limit]
+    )
+
+
+def search_knowledge(
+    product: Product, text: str, limit: int = DEFAULT_LIMIT
+) -> list[SearchResult]:
+    """Return the ``limit`` best matches for ``text`` across all three levels.
+
+    ``text`` uses web search syntax: quoted phrases, ``or`` and ``-word``.
+    """
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    results: list[SearchResult] = []
+
+    for row in _ranked(Domain.objects.visible().filter(product=product), query, limit):
+        results.append(
+            _result(
+                "domain",
+                row,
+                [],
+                reverse(
+                    "knowledge:domain_update",
+                    kwargs={"product_id": product.pk, "domain_id": row["id"]},
+                ),
+            )
+        )
+
+    subdomains = SubDomain.objects.visible().filter(product=product)
+    for row in _ranked(subdomains, query, limit, "domain_id", "domain__name"):
+        results.append(
+            _result(
+                "subdomain",
+                row,
+                [row["domain__name"]],
+                reverse(
+                    "knowledge:subdomain_update",
+                    kwargs={
+                        "product_id": product.pk,
+                        "domain_id": row["domain_id"],
+                        "subdomain_id": row["id"],
+                    },
+                ),
+            )
+        )
+
+    capabilities = Capability.objects.visible().filter(product=product)
+    for row in _ranked(
+        capabilities,
+        query,
+        limit,
+        "subdomain_id",
+        "subdomain__name",
+        "subdomain__domain_id",
+        "subdomain__domain__name",
+    ):
+        results.append(
+            _result(
+                "capability",
+                row,
+                [row["subdomain__domain__name"], row["subdomain__name"]],
+                reverse(
+                    "knowledge:capability_update",
+                    kwargs={
+                        "product_id": product.pk,
+                        "domain_id": row["subdomain__domain_id"],
+                        "subdomain_id": row["subdomain_id"],
+                        "capability_id": row["id"],
+                    },
+                ),
+            )
+        )
+
+    results.sort(key=lambda result: -result.rank)
+    return results[:limit]
+
+
+def _result(kind: str, row: dict, path: list[str], url: str) -> SearchResult:
+    return SearchResult(
+        kind=kind,
+        id=row["id"],
+        name=_highlight(row["name_headline"]),
+        description=_highlight(row["description_headline"]),
+        rank=row["rank"],
+        path=path,
+        url=url,
+    )
@@ -0,0 +1,82 @@
+from collections.abc import Set as AbstractSet
+
+from rest_framework import serializers
+
+from .models import Capability, Domain, SubDomain
+
+
+def _nested(paths: AbstractSet[str], name: str) -> set[str]:
+    """Return the dotted paths below ``name``, e.g. {"a.b", "c"} -> {"b"} for "a"."""
+    prefix = f"{name}."
+    return {path[len(prefix) :] for path in paths if path.startswith(prefix)}
+
+
+class KnowledgeSerializer(serializers.ModelSerializer):
+    """Base serializer with sparse fieldsets and expandable child collections.
+
+    ``fields`` limits the output to the given names; dotted names such as
+    ``subdomains.name`` limit the fields of an expanded child. ``expand`` adds
+    the children listed in ``expandable``; ``subdomains.capabilities`` expands
+    two levels. The view is responsible for prefetching expanded children.
+    """
+
+    expandable: dict[str, type["KnowledgeSerializer"]] = {}
+
+    def __init__(
+        self,
+        *args,
+        fields: set[str] | None = None,
+        expand: AbstractSet[str] = frozenset(),
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        for name in {path.split(".")[0] for path in expand} & set(self.expandable):
+            nested_fields = _nested(fields, name) if fields is not None else set()
+            self.fields[name] = self.expandable[name](
+                many=True,
+                read_only=True,
+                fields=nested_fields or None,
+                expand=_nested(expand, name),
+            )
+        if fields is not None:
+            wanted = {path.split(".")[0] for path in fields}
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+
+class CapabilitySerializer(KnowledgeSerializer):
+    class Meta:
+        model = Capability
+        fields = ["id", "name", "description", "subdomain", "created_at", "updated_at"]
+
+
+class SubDomainSerializer(KnowledgeSerializer):
+    expandable = {"capabilities": CapabilitySerializer}
+
+    class Meta:
+        model = SubDomain
+        fields = [
+            "id",
+            "name",
+            "description",
+            "domain",
+            "capability_count",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class DomainSerializer(KnowledgeSerializer):
+    expandable = {"subdomains": SubDomainSerializer}
+
+    class Meta:
+        model = Domain
+        fields = [
+            "id",
+            "name",
+            "description",
+            "subdomain_count",
+            "capability_count",
+            "created_at",
+            "updated_at",
+        ]
@@ -0,0 +1,71 @@
+"""Keep counters and cached product knowledge current when the hierarchy or its
+product changes.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import Product
+
+from .cache import invalidate_product_knowledge
+from .counters import (
+    count_deleted,
+    count_saved,
+    deleted_directly,
+    prepare_delete,
+    record_change,
+)
+from .models import Capability, Domain, ProductKnowledgeStats, SubDomain
+
+
+@receiver([post_save, post_delete], sender=Domain)
+@receiver([post_save, post_delete], sender=SubDomain)
+@receiver([post_save, post_delete], sender=Capability)
+def knowledge_changed(sender, instance, signal, origin=None, **kwargs) -> None:
+    # A delete reaches every row of the subtree below the deleted one; record
+    # it once, for the row it started at.
+    if signal is post_delete and not deleted_directly(instance, origin):
+        return
+    product_id = instance.product_id
+    record_change(product_id)
+    # Bump again on commit: a request may have cached a fragment rendered
+    # from the pre-commit rows under the version bumped here.
+    invalidate_product_knowledge(product_id)
+    transaction.on_commit(lambda: invalidate_product_knowledge(product_id))
+
+
+@receiver(post_save, sender=Domain)
+@receiver(post_save, sender=SubDomain)
+@receiver(post_save, sender=Capability)
+def knowledge_saved(sender, instance, created, raw=False, **kwargs) -> None:
+    if not raw:
+        count_saved(instance, created)
+
+
+@receiver(pre_delete, sender=Domain)
+@receiver(pre_delete, sender=SubDomain)
+@receiver(pre_delete, sender=Capability)
+def knowledge_deleting(sender, instance, origin=None, **kwargs) -> None:
+    prepare_delete(instance, origin)
+
+
+@receiver(post_delete, sender=Domain)
+@receiver(post_delete, sender=SubDomain)
+@receiver(post_delete, sender=Capability)
+def knowledge_deleted(sender, instance, origin=None, **kwargs) -> None:
+    count_deleted(instance, origin)
+
+
+@receiver(post_save, sender=Product)
+def product_created(sender, instance, created, raw=False, **kwargs) -> None:
+    if created and not raw:
+        ProductKnowledgeStats.objects.get_or_create(product=instance)
+
+
+@receiver(post_save, sender=Product)
+def product_changed(sender, instance, created, raw=False, **kwargs) -> None:
+    # Pages, the tree and the snapshot show the product's name and description.
+    if not created and not raw:
+        invalidate_product_knowledge(instance.pk)
+        transaction.on_commit(lambda: invalidate_product_knowledge(instance.pk))
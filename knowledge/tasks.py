@@ -0,0 +1,14 @@
+"""Background jobs of the knowledge app, run by ``manage.py run_worker``."""
+
+from django.tasks import task
+
+
+@task(max_attempts=3)
+def delete_knowledge(deletion_id: int, product_id: int) -> int:
+    """Delete the rows of a background deletion (see knowledge.deletion).
+
+    Returns 1 once the deletion is finished, 0 if another process has it.
+    """
+    from .deletion import run_pending_deletions
+
+    return run_pending_deletions(deletion_id=deletion_id)
@@ -0,0 +1,51 @@
+"""Product -> Domain -> SubDomain -> Capability tree, built in three queries."""
+
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+
+from users.models import Product
+
+from .cache import tree_cache_key
+from .models import Capability, Domain, SubDomain
+
+
+def build_product_tree(product: Product) -> dict[str, Any]:
+    """Fetch each level with one flat query and assemble the tree in memory."""
+    domains = list(
+        Domain.objects.visible()
+        .filter(product=product)
+        .order_by("name", "id")
+        .values("id", "name", "description")
+    )
+    subdomains = (
+        SubDomain.objects.visible().filter(product=product).order_by("name", "id")
+    )
+    # Capabilities of hidden subdomains (knowledge.deletion) find no parent
+    # below and are left out without joining their subdomain here.
+    capabilities = Capability.objects.filter(product=product).order_by("name", "id")
+
+    subdomains_by_domain: dict[int, list[dict[str, Any]]] = {}
+    capabilities_by_subdomain: dict[int, list[dict[str, Any]]] = {}
+    for capability in capabilities.values("id", "name", "description", "subdomain_id"):
+        subdomain_id = capability.pop("subdomain_id")
+        capabilities_by_subdomain.setdefault(subdomain_id, []).append(capability)
+    for subdomain in subdomains.values("id", "name", "description", "domain_id"):
+        domain_id = subdomain.pop("domain_id")
+        subdomain["capabilities"] = capabilities_by_subdomain.get(subdomain["id"], [])
+        subdomains_by_domain.setdefault(domain_id, []).append(subdomain)
+    for domain in domains:
+        domain["subdomains"] = subdomains_by_domain.get(domain["id"], [])
+
+    return {"id": product.pk, "name": product.name, "domains": domains}
+
+
+def get_product_tree(product: Product) -> dict[str, Any]:
+    """Return the cached tree snapshot, building it on a miss."""
+    key = tree_cache_key(product.pk)
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_product_tree(product)
+        cache.set(key, tree, settings.KNOWLEDGE_CACHE_TTL)
+    return tree
@@ -0,0 +1,55 @@
+"""Typeahead lookups for picking a domain or subdomain by name.
+
+Prefix matches come first, then fuzzy matches ranked by trigram word
+similarity. Migration 0003 creates ``pg_trgm`` and GIN trigram indexes on
+``UPPER(name)`` where the extension is available; without it lookups fall
+back to case-insensitive prefix and substring matching.
+"""
+
+from functools import lru_cache
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, QuerySet, Value, When
+from django.db.models.functions import Upper
+
+DEFAULT_LIMIT = 10
+
+
+@lru_cache
+def _has_trigram_extension(alias: str, database: str) -> bool:
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def trigram_enabled(alias: str = "default") -> bool:
+    """Whether pg_trgm is installed in the database behind ``alias``."""
+    return _has_trigram_extension(alias, connections[alias].settings_dict["NAME"])
+
+
+def suggest(queryset: QuerySet, text: str, limit: int = DEFAULT_LIMIT) -> QuerySet:
+    """Return up to ``limit`` rows of ``queryset`` whose name matches ``text``."""
+    text = text.strip().upper()
+    if not text:
+        return queryset.order_by("name", "id")[:limit]
+
+    queryset = queryset.annotate(match_name=Upper("name"))
+    is_prefix = Q(match_name__startswith=text)
+    prefix_first = Case(
+        When(is_prefix, then=Value(0)), default=Value(1), output_field=IntegerField()
+    )
+    if trigram_enabled(queryset.db):
+        return (
+            queryset.filter(is_prefix | Q(match_name__trigram_word_similar=text))
+            .annotate(
+                prefix_first=prefix_first,
+                similarity=TrigramWordSimilarity(text, "match_name"),
+            )
+            .order_by("prefix_first", "-similarity", "name", "id")[:limit]
+        )
+    return (
+        queryset.filter(match_name__contains=text)
+        .annotate(prefix_first=prefix_first)
+        .order_by("prefix_first", "name", "id")[:limit]
+    )
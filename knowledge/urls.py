@@ -5,12 +5,43 @@ from . import views
 app_name = "knowledge"
 
 urlpatterns = [
+    # Hierarchy URLs
+    path(
+        "products/<int:product_id>/tree/",
+        views.ProductTreeView.as_view(),
+        name="product_tree",
+    ),
+    path(
+        "products/<int:product_id>/search/",
+        views.KnowledgeSearchView.as_view(),
+        name="knowledge_search",
+    ),
+    path(
+        "products/<int:product_id>/export/",
+        views.KnowledgeExportView.as_view(),
+        name="knowledge_export",
+    ),
+    path(
+        "products/<int:product_id>/import/",
+        views.KnowledgeImportView.as_view(),
+        name="knowledge_import",
+    ),
+    path(
+        "products/<int:product_id>/clone/",
+        views.KnowledgeCloneView.as_view(),
+        name="knowledge_clone",
+    ),
     # Domain URLs
     path(
         "products/<int:product_id>/domains/",
         views.DomainListView.as_view(),
         name="domain_list",
     ),
+    path(
+        "products/<int:product_id>/domains/lookup/",
+        views.DomainLookupView.as_view(),
+        name="domain_lookup",
+    ),
     path(
         "products/<int:product_id>/domains/new/",
         views.DomainCreateView.as_view(),
@@ -32,6 +63,16 @@ urlpatterns = [
         views.SubDomainListView.as_view(),
         name="subdomain_list",
     ),
+    path(
+        "products/<int:product_id>/subdomains/lookup/",
+        views.SubDomainLookupView.as_view(),
+        name="subdomain_lookup",
+    ),
+    path(
+        "products/<int:product_id>/subdomains/move/",
+        views.SubDomainMoveView.as_view(),
+        name="subdomain_move",
+    ),
     path(
         "products/<int:product_id>/domains/<int:domain_id>/subdomains/new/",
         views.SubDomainCreateView.as_view(),
@@ -53,6 +94,11 @@ urlpatterns = [
         views.CapabilityListView.as_view(),
         name="capability_list",
     ),
+    path(
+        "products/<int:product_id>/capabilities/move/",
+        views.CapabilityMoveView.as_view(),
+        name="capability_move",
+    ),
     path(
         "products/<int:product_id>/domains/<int:domain_id>/subdomains/<int:subdomain_id>/capabilities/new/",
         views.CapabilityCreateView.as_view(),
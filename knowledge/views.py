@@ -1,38 +1,253 @@
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
 from django.db import IntegrityError, transaction
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
-from django.views.generic import CreateView, DeleteView, ListView, UpdateView
-
-from .mixins import ProductAccessMixin, ProductEditMixin
+from django.utils.text import slugify
+from django.views.generic import (
+    CreateView,
+    DeleteView,
+    FormView,
+    ListView,
+    TemplateView,
+    UpdateView,
+    View,
+)
+
+from users.models import Product
+
+from .cloning import KnowledgeCloneError, clone_knowledge
+from .export import FORMATS, aiter_export, iter_export
+from .forms import KnowledgeCloneForm, KnowledgeImportForm
+from .importer import KnowledgeImportError, import_file
+from .mixins import (
+    AsyncFragmentCacheMixin,
+    AsyncKnowledgeConditionalMixin,
+    AsyncProductAccessMixin,
+    BackgroundDeleteMixin,
+    BulkMoveMixin,
+    HtmxEditMixin,
+    KnowledgeConditionalMixin,
+    ProductAccessMixin,
+    ProductEditMixin,
+)
 from .models import Capability, Domain, SubDomain
+from .pagination import KeysetPaginationMixin
+from .search import search_knowledge
+from .tree import get_product_tree
+from .typeahead import suggest
+
+# =============================================================================
+# Product Views
+# =============================================================================
+
+
+class ProductTreeView(ProductAccessMixin, KnowledgeConditionalMixin, TemplateView):
+    """Show the whole Domain -> SubDomain -> Capability tree of a product."""
+
+    template_name = "knowledge/product_tree.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["tree"] = get_product_tree(self.product)
+        context["active_section"] = "tree"
+        return context
+
+
+class KnowledgeSearchView(ProductAccessMixin, TemplateView):
+    """Ranked full-text search across the product's knowledge (?q=)."""
+
+    template_name = "knowledge/search.html"
+    results_template_name = "knowledge/partials/search_results.html"
+
+    def get_template_names(self):
+        if self.request.headers.get("HX-Request"):
+            return [self.results_template_name]
+        return [self.template_name]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "").strip()
+        context["query"] = query
+        context["results"] = search_knowledge(self.product, query) if query else []
+        context["active_section"] = "search"
+        return context
+
+
+class KnowledgeExportView(ProductAccessMixin, KnowledgeConditionalMixin, View):
+    """Stream the product's knowledge as CSV or JSONL (?format=csv|jsonl)."""
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get("format", "csv")
+        if export_format not in FORMATS:
+            return HttpResponseBadRequest(f"Unsupported export format: {export_format}")
+        _, content_type = FORMATS[export_format]
+        # Under ASGI a sync iterator would be read into memory in one go.
+        export = aiter_export if isinstance(request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(
+            export(self.product, export_format), content_type=content_type
+        )
+        filename = f"{slugify(self.product.name) or 'product'}-knowledge.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class KnowledgeImportView(ProductEditMixin, FormView):
+    """Upload a CSV/JSONL/YAML file and upsert its rows into the product."""
+
+    template_name = "knowledge/knowledge_import.html"
+    form_class = KnowledgeImportForm
+
+    def form_valid(self, form):
+        try:
+            result = import_file(
+                self.product,
+                form.cleaned_data["file"],
+                form.cleaned_data["format"],
+                dry_run=form.cleaned_data["dry_run"],
+            )
+        except KnowledgeImportError as e:
+            for error in e.errors:
+                form.add_error("file", error)
+            return self.form_invalid(form)
+
+        if result.dry_run:
+            return self.render_to_response(self.get_context_data(form=form, result=result))
+
+        created = sum(len(diff.created) for _, diff in result.levels)
+        updated = sum(len(diff.updated) for _, diff in result.levels)
+        messages.success(self.request, f"Import finished: {created} created, {updated} updated.")
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse("knowledge:product_tree", kwargs={"product_id": self.product.pk})
+
+
+class KnowledgeCloneView(ProductEditMixin, FormView):
+    """Copy the whole hierarchy of another product into this (empty) one."""
+
+    template_name = "knowledge/knowledge_clone.html"
+    form_class = KnowledgeCloneForm
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        products = Product.objects.filter(is_active=True).exclude(pk=self.product.pk)
+        if not self.request.user.is_superuser:
+            products = products.filter(memberships__user=self.request.user)
+        kwargs["products"] = products.order_by("name")
+        return kwargs
+
+    def form_valid(self, form):
+        source = form.cleaned_data["source"]
+        try:
+            result = clone_knowledge(source, self.product)
+        except KnowledgeCloneError as e:
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
+
+        messages.success(
+            self.request,
+            f"Copied {result.domains} domains, {result.subdomains} subdomains and "
+            f'{result.capabilities} capabilities from "{source.name}".',
+        )
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse("knowledge:product_tree", kwargs={"product_id": self.product.pk})
+
+
+class KnowledgeLookupView(ProductAccessMixin, TemplateView):
+    """Typeahead of a level of the hierarchy, for picking a parent (?q=).
+
+    Each option opens the form for a new row below the parent it names.
+    With ?pick=<field> the options are instead radio buttons setting the
+    form field ``<field>`` to the parent, for forms that take a parent.
+    """
+
+    template_name = "knowledge/partials/lookup_options.html"
+    model: type[Domain | SubDomain]
+    # The form for a new row below a parent, and its URL kwargs other than
+    # product_id, each taken from the named attribute of the parent.
+    option_url_name: str
+    option_url_kwargs: dict[str, str]
+
+    def get_queryset(self):
+        return self.model.objects.visible().filter(product=self.product)
+
+    def get_label(self, parent) -> str:
+        return parent.name
+
+    def get_option_url(self, parent) -> str:
+        kwargs = {"product_id": self.product.pk}
+        for key, attr in self.option_url_kwargs.items():
+            kwargs[key] = getattr(parent, attr)
+        return reverse(self.option_url_name, kwargs=kwargs)
+
+    def get_pick(self) -> str:
+        pick = self.request.GET.get("pick", "")
+        return pick if pick.isidentifier() else ""
+
+    def get_template_names(self):
+        if self.get_pick():
+            return ["knowledge/partials/lookup_choices.html"]
+        return super().get_template_names()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        parents = suggest(self.get_queryset(), self.request.GET.get("q", ""))
+        if pick := self.get_pick():
+            context["field_name"] = pick
+            context["choices"] = [(self.get_label(p), p.pk) for p in parents]
+        else:
+            context["options"] = [
+                (self.get_label(p), self.get_option_url(p)) for p in parents
+            ]
+        return context
+
 
 # =============================================================================
 # Domain Views
 # =============================================================================
 
 
-class DomainListView(ProductAccessMixin, ListView):
+class DomainListView(
+    AsyncProductAccessMixin,
+    AsyncKnowledgeConditionalMixin,
+    AsyncFragmentCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """List all domains in a product."""
 
     model = Domain
     template_name = "knowledge/domain_list.html"
+    table_template_name = "knowledge/partials/domain_table.html"
+    rows_template_name = "knowledge/partials/domain_rows.html"
     context_object_name = "domains"
+    active_section = "domains"
 
     def get_queryset(self):
-        return Domain.objects.filter(product=self.product)
+        return Domain.objects.visible().filter(product=self.product)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["active_section"] = "domains"
-        return context
 
+class DomainLookupView(KnowledgeLookupView):
+    """Typeahead options for picking the domain of a new subdomain (?q=).
+
+    With ?pick=<field>, radio buttons choosing the domain (of a move form).
+    """
 
-class DomainCreateView(ProductEditMixin, CreateView):
+    model = Domain
+    option_url_name = "knowledge:subdomain_create"
+    option_url_kwargs = {"domain_id": "pk"}
+
+
+class DomainCreateView(ProductEditMixin, HtmxEditMixin, CreateView):
     """Create a new domain in a product."""
 
     model = Domain
     template_name = "knowledge/domain_form.html"
+    row_template_name = "knowledge/partials/domain_row.html"
     fields = ["name", "description"]
 
     def form_valid(self, form):
@@ -49,16 +264,17 @@ class DomainCreateView(ProductEditMixin, CreateView):
         return reverse("knowledge:domain_list", kwargs={"product_id": self.product.pk})
 
 
-class DomainUpdateView(ProductEditMixin, UpdateView):
+class DomainUpdateView(ProductEditMixin, HtmxEditMixin, UpdateView):
     """Update a domain."""
 
     model = Domain
     template_name = "knowledge/domain_form.html"
+    row_template_name = "knowledge/partials/domain_row.html"
     fields = ["name", "description"]
     pk_url_kwarg = "domain_id"
 
     def get_queryset(self):
-        return Domain.objects.filter(product=self.product)
+        return Domain.objects.visible().filter(product=self.product)
 
     def form_valid(self, form):
         try:
@@ -73,18 +289,24 @@ class DomainUpdateView(ProductEditMixin, UpdateView):
         return reverse("knowledge:domain_list", kwargs={"product_id": self.product.pk})
 
 
-class DomainDeleteView(ProductEditMixin, DeleteView):
-    """Delete a domain (cascades to subdomains and capabilities)."""
+class DomainDeleteView(
+    ProductEditMixin, HtmxEditMixin, BackgroundDeleteMixin, DeleteView
+):
+    """Delete a domain (cascades to subdomains and capabilities).
+
+    Large domains are hidden at once and deleted in the background.
+    """
 
     model = Domain
     template_name = "knowledge/domain_confirm_delete.html"
     pk_url_kwarg = "domain_id"
 
     def get_queryset(self):
-        return Domain.objects.filter(product=self.product)
+        return Domain.objects.visible().filter(product=self.product)
 
     def get_success_url(self):
-        messages.success(self.request, f'Domain "{self.object.name}" deleted.')
+        status = "is being deleted" if self.deletion else "deleted"
+        messages.success(self.request, f'Domain "{self.object.name}" {status}.')
         return reverse("knowledge:domain_list", kwargs={"product_id": self.product.pk})
 
 
@@ -93,42 +315,63 @@ class DomainDeleteView(ProductEditMixin, DeleteView):
 # =============================================================================
 
 
-class SubDomainListView(ProductAccessMixin, ListView):
+class SubDomainListView(
+    AsyncProductAccessMixin,
+    AsyncKnowledgeConditionalMixin,
+    AsyncFragmentCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """List all subdomains in a product."""
 
     model = SubDomain
     template_name = "knowledge/subdomain_list.html"
+    table_template_name = "knowledge/partials/subdomain_table.html"
+    rows_template_name = "knowledge/partials/subdomain_rows.html"
     context_object_name = "subdomains"
+    active_section = "subdomains"
 
     def get_queryset(self):
-        return SubDomain.objects.filter(domain__product=self.product).select_related(
+        return SubDomain.objects.visible().filter(product=self.product).select_related(
             "domain"
         )
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["active_section"] = "subdomains"
-        return context
+
+class SubDomainLookupView(KnowledgeLookupView):
+    """Typeahead options for picking the subdomain of a new capability (?q=).
+
+    With ?pick=<field>, radio buttons choosing the subdomain (of a move form).
+    """
+
+    model = SubDomain
+    option_url_name = "knowledge:capability_create"
+    option_url_kwargs = {"domain_id": "domain_id", "subdomain_id": "pk"}
+
+    def get_queryset(self):
+        return super().get_queryset().select_related("domain")
+
+    def get_label(self, subdomain):
+        return f"{subdomain.domain.name} / {subdomain.name}"
 
 
-class SubDomainCreateView(ProductEditMixin, CreateView):
+class SubDomainCreateView(ProductEditMixin, HtmxEditMixin, CreateView):
     """Create a new subdomain in a domain."""
 
     model = SubDomain
     template_name = "knowledge/subdomain_form.html"
+    row_template_name = "knowledge/partials/subdomain_row.html"
     fields = ["name", "description"]
 
     def get_domain(self):
         if not hasattr(self, "_domain"):
             self._domain = get_object_or_404(
-                Domain, pk=self.kwargs.get("domain_id"), product=self.product
+                Domain.objects.visible(), pk=self.kwargs.get("domain_id"), product=self.product
             )
         return self._domain
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["domain"] = self.get_domain()
-        context["all_domains"] = Domain.objects.filter(product=self.product)
         return context
 
     def form_valid(self, form):
@@ -148,28 +391,28 @@ class SubDomainCreateView(ProductEditMixin, CreateView):
         )
 
 
-class SubDomainUpdateView(ProductEditMixin, UpdateView):
+class SubDomainUpdateView(ProductEditMixin, HtmxEditMixin, UpdateView):
     """Update a subdomain."""
 
     model = SubDomain
     template_name = "knowledge/subdomain_form.html"
+    row_template_name = "knowledge/partials/subdomain_row.html"
     fields = ["name", "description"]
     pk_url_kwarg = "subdomain_id"
 
     def get_domain(self):
         if not hasattr(self, "_domain"):
             self._domain = get_object_or_404(
-                Domain, pk=self.kwargs.get("domain_id"), product=self.product
+                Domain.objects.visible(), pk=self.kwargs.get("domain_id"), product=self.product
             )
         return self._domain
 
     def get_queryset(self):
-        return SubDomain.objects.filter(domain__product=self.product)
+        return SubDomain.objects.visible().filter(product=self.product)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["domain"] = self.get_domain()
-        context["all_domains"] = Domain.objects.filter(product=self.product)
         return context
 
     def form_valid(self, form):
@@ -188,8 +431,13 @@ class SubDomainUpdateView(ProductEditMixin, UpdateView):
         )
 
 
-class SubDomainDeleteView(ProductEditMixin, DeleteView):
-    """Delete a subdomain (cascades to capabilities)."""
+class SubDomainDeleteView(
+    ProductEditMixin, HtmxEditMixin, BackgroundDeleteMixin, DeleteView
+):
+    """Delete a subdomain (cascades to capabilities).
+
+    Large subdomains are hidden at once and deleted in the background.
+    """
 
     model = SubDomain
     template_name = "knowledge/subdomain_confirm_delete.html"
@@ -198,68 +446,85 @@ class SubDomainDeleteView(ProductEditMixin, DeleteView):
     def get_domain(self):
         if not hasattr(self, "_domain"):
             self._domain = get_object_or_404(
-                Domain, pk=self.kwargs.get("domain_id"), product=self.product
+                Domain.objects.visible(), pk=self.kwargs.get("domain_id"), product=self.product
             )
         return self._domain
 
     def get_queryset(self):
-        return SubDomain.objects.filter(domain__product=self.product)
+        return SubDomain.objects.visible().filter(product=self.product).select_related("domain")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["domain"] = self.get_domain()
-        context["all_domains"] = Domain.objects.filter(product=self.product)
         return context
 
     def get_success_url(self):
-        messages.success(self.request, f'SubDomain "{self.object.name}" deleted.')
+        status = "is being deleted" if self.deletion else "deleted"
+        messages.success(self.request, f'SubDomain "{self.object.name}" {status}.')
         return reverse(
             "knowledge:subdomain_list",
             kwargs={"product_id": self.product.pk},
         )
 
 
+class SubDomainMoveView(ProductEditMixin, BulkMoveMixin, FormView):
+    """Move the subdomains picked on the list to another domain."""
+
+    model = SubDomain
+    target_model = Domain
+    list_url_name = "knowledge:subdomain_list"
+    lookup_url_name = "knowledge:domain_lookup"
+
+    def get_items(self):
+        return super().get_items().select_related("domain")
+
+
 # =============================================================================
 # Capability Views
 # =============================================================================
 
 
-class CapabilityListView(ProductAccessMixin, ListView):
+class CapabilityListView(
+    AsyncProductAccessMixin,
+    AsyncKnowledgeConditionalMixin,
+    AsyncFragmentCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """List all capabilities in a product."""
 
     model = Capability
     template_name = "knowledge/capability_list.html"
+    table_template_name = "knowledge/partials/capability_table.html"
+    rows_template_name = "knowledge/partials/capability_rows.html"
     context_object_name = "capabilities"
+    active_section = "capabilities"
 
     def get_queryset(self):
-        return Capability.objects.filter(
-            subdomain__domain__product=self.product
-        ).select_related("subdomain", "subdomain__domain")
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["active_section"] = "capabilities"
-        return context
+        return Capability.objects.visible().filter(product=self.product).select_related(
+            "subdomain", "subdomain__domain"
+        )
 
 
-class CapabilityCreateView(ProductEditMixin, CreateView):
+class CapabilityCreateView(ProductEditMixin, HtmxEditMixin, CreateView):
     """Create a new capability in a subdomain."""
 
     model = Capability
     template_name = "knowledge/capability_form.html"
+    row_template_name = "knowledge/partials/capability_row.html"
     fields = ["name", "description"]
 
     def get_domain(self):
         if not hasattr(self, "_domain"):
             self._domain = get_object_or_404(
-                Domain, pk=self.kwargs.get("domain_id"), product=self.product
+                Domain.objects.visible(), pk=self.kwargs.get("domain_id"), product=self.product
             )
         return self._domain
 
     def get_subdomain(self):
         if not hasattr(self, "_subdomain"):
             self._subdomain = get_object_or_404(
-                SubDomain, pk=self.kwargs.get("subdomain_id"), domain=self.get_domain()
+                SubDomain.objects.visible(), pk=self.kwargs.get("subdomain_id"), domain=self.get_domain()
             )
         return self._subdomain
 
@@ -267,7 +532,6 @@ class CapabilityCreateView(ProductEditMixin, CreateView):
         context = super().get_context_data(**kwargs)
         context["domain"] = self.get_domain()
         context["subdomain"] = self.get_subdomain()
-        context["all_subdomains"] = SubDomain.objects.filter(domain=self.get_domain())
         return context
 
     def form_valid(self, form):
@@ -287,36 +551,36 @@ class CapabilityCreateView(ProductEditMixin, CreateView):
         )
 
 
-class CapabilityUpdateView(ProductEditMixin, UpdateView):
+class CapabilityUpdateView(ProductEditMixin, HtmxEditMixin, UpdateView):
     """Update a capability."""
 
     model = Capability
     template_name = "knowledge/capability_form.html"
+    row_template_name = "knowledge/partials/capability_row.html"
     fields = ["name", "description"]
     pk_url_kwarg = "capability_id"
 
     def get_domain(self):
         if not hasattr(self, "_domain"):
             self._domain = get_object_or_404(
-                Domain, pk=self.kwargs.get("domain_id"), product=self.product
+                Domain.objects.visible(), pk=self.kwargs.get("domain_id"), product=self.product
             )
         return self._domain
 
     def get_subdomain(self):
         if not hasattr(self, "_subdomain"):
             self._subdomain = get_object_or_404(
-                SubDomain, pk=self.kwargs.get("subdomain_id"), domain=self.get_domain()
+                SubDomain.objects.visible(), pk=self.kwargs.get("subdomain_id"), domain=self.get_domain()
             )
         return self._subdomain
 
     def get_queryset(self):
-        return Capability.objects.filter(subdomain__domain__product=self.product)
+        return Capability.objects.visible().filter(product=self.product)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["domain"] = self.get_domain()
         context["subdomain"] = self.get_subdomain()
-        context["all_subdomains"] = SubDomain.objects.filter(domain=self.get_domain())
         return context
 
     def form_valid(self, form):
@@ -335,7 +599,7 @@ class CapabilityUpdateView(ProductEditMixin, UpdateView):
         )
 
 
-class CapabilityDeleteView(ProductEditMixin, DeleteView):
+class CapabilityDeleteView(ProductEditMixin, HtmxEditMixin, DeleteView):
     """Delete a capability."""
 
     model = Capability
@@ -345,25 +609,24 @@ class CapabilityDeleteView(ProductEditMixin, DeleteView):
     def get_domain(self):
         if not hasattr(self, "_domain"):
             self._domain = get_object_or_404(
-                Domain, pk=self.kwargs.get("domain_id"), product=self.product
+                Domain.objects.visible(), pk=self.kwargs.get("domain_id"), product=self.product
             )
         return self._domain
 
     def get_subdomain(self):
         if not hasattr(self, "_subdomain"):
             self._subdomain = get_object_or_404(
-                SubDomain, pk=self.kwargs.get("subdomain_id"), domain=self.get_domain()
+                SubDomain.objects.visible(), pk=self.kwargs.get("subdomain_id"), domain=self.get_domain()
             )
         return self._subdomain
 
     def get_queryset(self):
-        return Capability.objects.filter(subdomain__domain__product=self.product)
+        return Capability.objects.visible().filter(product=self.product)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["domain"] = self.get_domain()
         context["subdomain"] = self.get_subdomain()
-        context["all_subdomains"] = SubDomain.objects.filter(domain=self.get_domain())
         return context
 
     def get_success_url(self):
@@ -372,3 +635,15 @@ class CapabilityDeleteView(ProductEditMixin, DeleteView):
             "knowledge:capability_list",
             kwargs={"product_id": self.product.pk},
         )
+
+
+class CapabilityMoveView(ProductEditMixin, BulkMoveMixin, FormView):
+    """Move the capabilities picked on the list to another subdomain."""
+
+    model = Capability
+    target_model = SubDomain
+    list_url_name = "knowledge:capability_list"
+    lookup_url_name = "knowledge:subdomain_lookup"
+
+    def get_items(self):
+        return super().get_items().select_related("subdomain__domain")
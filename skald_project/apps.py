@@ -0,0 +1,7 @@
+from django.contrib.staticfiles.apps import StaticFilesConfig
+
+
+class SkaldStaticFilesConfig(StaticFilesConfig):
+    # static/css/input.css is the Tailwind source of output.css; its
+    # @import "tailwindcss" would fail collectstatic's URL rewriting.
+    ignore_patterns = [*StaticFilesConfig.ignore_patterns, "input.css"]
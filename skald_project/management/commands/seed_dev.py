@@ -1,15 +1,53 @@
-"""Seed the development database with test data."""
+"""Seed the development database with test data.
 
-from django.core.management.base import BaseCommand
+With --scale, generates a large deterministic data set instead, written with
+batched bulk_create so production-sized products can be built in minutes.
+"""
 
+import random
+import time
+from itertools import batched
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from knowledge.cache import invalidate_product_knowledge
+from knowledge.counters import record_change, recount_product
 from knowledge.models import Capability, Domain, SubDomain
 from users.models import Product, ProductMembership, User
 
+# Vocabulary for generated descriptions
+WORDS = (
+    "account access audit billing catalog checkout customer data delivery "
+    "document event export import inventory invoice message notification order "
+    "payment policy pricing profile report request review schedule search "
+    "session shipment subscription support task team user workflow"
+).split()
+
 
 class Command(BaseCommand):
     help = "Seed the development database with test data"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            action="store_true",
+            help="Generate a large synthetic data set instead of the demo data",
+        )
+        parser.add_argument("--products", type=int, default=1)
+        parser.add_argument("--domains", type=int, default=20, help="Per product")
+        parser.add_argument("--subdomains", type=int, default=10, help="Per domain")
+        parser.add_argument("--capabilities", type=int, default=50, help="Per subdomain")
+        parser.add_argument("--members", type=int, default=10, help="Per product")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
     def handle(self, *args, **options):
+        if options["scale"]:
+            self._seed_scale(**options)
+            return
+
         self.stdout.write("Seeding development database...")
 
         # Create users
@@ -133,3 +171,109 @@ class Command(BaseCommand):
             defaults={"description": description},
         )
         return capability
+
+    def _seed_scale(
+        self,
+        products: int,
+        domains: int,
+        subdomains: int,
+        capabilities: int,
+        members: int,
+        seed: int,
+        batch_size: int,
+        **options,
+    ) -> None:
+        """Generate products of the requested size, deterministically by seed."""
+        rng = random.Random(seed)
+        names = [f"Scale {seed}-{p + 1}" for p in range(products)]
+        if Product.objects.filter(name__in=names).exists():
+            raise CommandError(
+                f"Products for seed {seed} already exist; use another --seed or delete them."
+            )
+
+        started = time.monotonic()
+        self.stdout.write(f"Creating {members} users...")
+        password = make_password("scale")
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"scale_user_{n}",
+                    email=f"scale_user_{n}@example.com",
+                    password=password,
+                )
+                for n in range(members)
+            ],
+            ignore_conflicts=True,
+        )
+        user_ids = list(
+            User.objects.filter(username__startswith="scale_user_")
+            .order_by("pk")
+            .values_list("pk", flat=True)[:members]
+        )
+        roles = list(ProductMembership.Role.values)
+
+        for name in names:
+            with transaction.atomic():
+                product = Product.objects.create(
+                    name=name, description=self._sentence(rng), is_active=True
+                )
+                ProductMembership.objects.bulk_create(
+                    ProductMembership(
+                        user_id=user_id, product=product, role=rng.choice(roles)
+                    )
+                    for user_id in user_ids
+                )
+                domain_objs = Domain.objects.bulk_create(
+                    (
+                        Domain(
+                            product=product,
+                            name=f"Domain {d:04d}",
+                            description=self._sentence(rng),
+                        )
+                        for d in range(domains)
+                    ),
+                    batch_size=batch_size,
+                )
+                subdomain_ids = []
+                for batch in batched(
+                    (
+                        SubDomain(
+                            domain=domain,
+                            product=product,
+                            name=f"SubDomain {s:04d}",
+                            description=self._sentence(rng),
+                        )
+                        for domain in domain_objs
+                        for s in range(subdomains)
+                    ),
+                    batch_size,
+                ):
+                    subdomain_ids.extend(o.pk for o in SubDomain.objects.bulk_create(batch))
+                for batch in batched(
+                    (
+                        Capability(
+                            subdomain_id=subdomain_id,
+                            product=product,
+                            name=f"Capability {c:05d}",
+                            description=self._sentence(rng),
+                        )
+                        for subdomain_id in subdomain_ids
+                        for c in range(capabilities)
+                    ),
+                    batch_size,
+                ):
+                    Capability.objects.bulk_create(batch)
+                recount_product(product.pk)
+                record_change(product.pk)
+            invalidate_product_knowledge(product.pk)
+            self.stdout.write(
+                f"  {name}: {domains} domains, {len(subdomain_ids)} subdomains, "
+                f"{len(subdomain_ids) * capabilities} capabilities"
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"✓ Scale data seeded in {elapsed:.1f}s"))
+        self.stdout.write(f"Users scale_user_0..{members - 1} have password 'scale'.")
+
+    def _sentence(self, rng: random.Random) -> str:
+        return " ".join(rng.choices(WORDS, k=8)).capitalize() + "."
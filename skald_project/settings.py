@@ -45,19 +45,23 @@ INSTALLED_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
-    "django.contrib.staticfiles",
+    "whitenoise.runserver_nostatic",
+    "skald_project.apps.SkaldStaticFilesConfig",
+    "django.contrib.postgres",
     "rest_framework",
     "widget_tweaks",
     "skald_project",
     "core",
     "users",
     "knowledge",
+    "jobs",
 ]
 
 AUTH_USER_MODEL = "users.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -68,6 +72,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "skald_project.urls"
 
+# Without explicit "loaders", Django wraps the app directories loader in the
+# cached loader, so each worker compiles a template once. gunicorn workers
+# compile all of them at boot (core.warmup).
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -102,6 +109,85 @@ DATABASES = {
     }
 }
 
+# Connections come from psycopg's pool, one pool per worker process, so
+# requests do not pay for connection setup. Size it so that workers x
+# DB_POOL_MAX_SIZE stays below PostgreSQL's max_connections; /metrics/
+# reports each pool's utilization and wait time. With DB_POOL=false (e.g.
+# behind PgBouncer) connections are kept open for DB_CONN_MAX_AGE seconds.
+if os.getenv("DB_POOL", "true").lower() in ("true", "1", "yes"):
+    from psycopg_pool import ConnectionPool
+
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            # Seconds a request waits for a free connection before failing.
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "600")),
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+            # Check connections when they are handed out, so one dropped by
+            # the server or a failover is replaced instead of failing a request.
+            "check": ConnectionPool.check_connection,
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Must be a shared backend (e.g. Redis or the database) when running several
+# workers, so signal-based invalidation reaches every process: gunicorn
+# refuses to start more than one worker on LocMemCache (core.checks).
+# DatabaseCache needs `manage.py createcachetable` once.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Seconds to cache product and membership lookups used for access checks
+PRODUCT_ACCESS_CACHE_TTL = int(os.getenv("PRODUCT_ACCESS_CACHE_TTL", "300"))
+
+# Seconds to keep cached knowledge snapshots (they are also invalidated on write)
+KNOWLEDGE_CACHE_TTL = int(os.getenv("KNOWLEDGE_CACHE_TTL", "3600"))
+
+# Domains and subdomains with more rows below them than this are deleted by a
+# background job, this many rows at a time.
+KNOWLEDGE_DELETE_BATCH_SIZE = int(os.getenv("KNOWLEDGE_DELETE_BATCH_SIZE", "1000"))
+
+
+# Background jobs (django.tasks), stored in PostgreSQL and run by
+# `manage.py run_worker` with JOBS_WORKER_PROCESSES processes. At most
+# JOBS_PRODUCT_CONCURRENCY jobs of one product run at a time; failed attempts
+# are retried after JOBS_RETRY_DELAY seconds (doubling each time). Workers
+# report back on their running job every JOBS_HEARTBEAT seconds; a job not
+# reported on for JOBS_STALE_AFTER seconds is assumed lost with its worker.
+# https://docs.djangoproject.com/en/6.0/topics/tasks/
+
+TASKS = {
+    "default": {
+        "BACKEND": "jobs.backends.DatabaseBackend",
+        "QUEUES": ["default"],
+        "OPTIONS": {
+            "product_concurrency": int(os.getenv("JOBS_PRODUCT_CONCURRENCY", "1")),
+            "retry_delay": int(os.getenv("JOBS_RETRY_DELAY", "30")),
+            "heartbeat": int(os.getenv("JOBS_HEARTBEAT", "30")),
+            "stale_after": int(os.getenv("JOBS_STALE_AFTER", "300")),
+        },
+    }
+}
+JOBS_WORKER_PROCESSES = int(os.getenv("JOBS_WORKER_PROCESSES", "2"))
+
+
+# Bearer token that lets a scraper read /metrics/ (staff users always can)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -143,11 +229,39 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# collectstatic writes content-hashed copies of every file plus gzip and
+# brotli variants; WhiteNoise serves them from the workers with
+# "Cache-Control: immutable" and the encoding the client accepts. With
+# DEBUG on, files are served unhashed straight from STATICFILES_DIRS.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        if DEBUG
+        else "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+    "DEFAULT_PERMISSION_CLASSES": [
+        "rest_framework.permissions.IsAuthenticated",
+    ],
+}
+
 # Authentication
 LOGIN_URL = reverse_lazy("users:login")
 LOGIN_REDIRECT_URL = reverse_lazy("core:home")
@@ -23,4 +23,5 @@ urlpatterns = [
     path("", include("core.urls")),
     path("", include("users.urls")),
     path("", include("knowledge.urls")),
+    path("api/", include("knowledge.api_urls")),
 ]
@@ -1 +1,25 @@
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+
 pytest_plugins = ["pytest_bdd"]
+
+
+@pytest.fixture(autouse=True, scope="session")
+def unhashed_static_files():
+    """Render static URLs without the manifest, which only collectstatic builds."""
+    storages = {
+        **settings.STORAGES,
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+    with override_settings(STORAGES=storages):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    """Start every test with an empty cache so cached lookups never leak."""
+    cache.clear()
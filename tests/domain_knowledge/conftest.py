@@ -3,9 +3,11 @@
 from typing import Any
 
 import pytest
+from django.http import HttpResponse
 from django.test import Client
-from pytest_bdd import given, parsers
+from pytest_bdd import given, parsers, then, when
 
+from knowledge.counters import recount_product
 from knowledge.models import Capability, Domain, SubDomain
 from users.models import Product, ProductMembership, User
 
@@ -212,3 +214,73 @@ def capabilities_exist_in_subdomain(
             name=row[0],
             defaults={"description": ""},
         )
+
+
+@given(parsers.parse('{count:d} capabilities exist in subdomain "{subdomain_name}"'))
+def many_capabilities_exist_in_subdomain(
+    db: Any, count: int, subdomain_name: str, current_product: dict[str, Any]
+) -> None:
+    """Create a numbered batch of capabilities in a subdomain."""
+    domain = current_product.get("domain")
+    if not domain:
+        raise ValueError("Domain context required - ensure a domain step runs before this step")
+    subdomain = SubDomain.objects.get(domain=domain, name=subdomain_name)
+    current_product["subdomain"] = subdomain
+    Capability.objects.bulk_create(
+        Capability(subdomain=subdomain, product=subdomain.product, name=f"Capability {i:03d}")
+        for i in range(count)
+    )
+    recount_product(subdomain.product_id)
+
+
+@given(parsers.parse('{count:d} subdomains exist in domain "{domain_name}"'))
+def many_subdomains_exist_in_domain(
+    db: Any, count: int, domain_name: str, current_product: dict[str, Any]
+) -> None:
+    """Create a numbered batch of subdomains in a domain."""
+    domain = Domain.objects.get(product=current_product["product"], name=domain_name)
+    SubDomain.objects.bulk_create(
+        SubDomain(domain=domain, product=domain.product, name=f"SubDomain {i:03d}")
+        for i in range(count)
+    )
+    recount_product(domain.product_id)
+
+
+@when(
+    parsers.parse('I look up {kind} matching "{text}"'),
+    target_fixture="lookup_response",
+)
+def look_up(client: Client, db: Any, kind: str, text: str, current_product: dict[str, Any]) -> HttpResponse:
+    """Request the typeahead options for domains or subdomains."""
+    product = current_product["product"]
+    return client.get(f"/products/{product.pk}/{kind}/lookup/", {"q": text}, HTTP_HX_REQUEST="true")
+
+
+@then(parsers.parse('the suggestions are "{labels}"'))
+def suggestions_are(lookup_response: HttpResponse, labels: str) -> None:
+    """Verify the suggested options and their order."""
+    assert lookup_response.status_code == 200
+    expected = [label.strip() for label in labels.split(",")]
+    assert [label for label, _ in lookup_response.context["options"]] == expected
+
+
+@then(parsers.parse("there are {count:d} suggestions"))
+def suggestion_count(lookup_response: HttpResponse, count: int) -> None:
+    """Verify the number of suggested options."""
+    assert lookup_response.status_code == 200
+    assert len(lookup_response.context["options"]) == count
+
+
+@then(
+    parsers.re(
+        r'the domain "(?P<domain_name>[^"]+)" holds (?P<subdomains>\d+) subdomains? '
+        r"and (?P<capabilities>\d+) capabilit(?:y|ies)"
+    ),
+    converters={"subdomains": int, "capabilities": int},
+)
+def domain_holds(
+    db: Any, domain_name: str, subdomains: int, capabilities: int, current_product: dict
+) -> None:
+    """Verify the stored counters of a domain."""
+    domain = Domain.objects.get(product=current_product["product"], name=domain_name)
+    assert (domain.subdomain_count, domain.capability_count) == (subdomains, capabilities)
@@ -1,12 +1,19 @@
 """E2E tests for capability management feature."""
 
+import html
+import re
 from typing import Any
 
+from asgiref.sync import async_to_sync
+from django.db import connection
 from django.http import HttpResponse
-from django.test import Client
-from pytest_bdd import parsers, scenarios, then, when
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from pytest_bdd import given, parsers, scenarios, then, when
 
 from knowledge.models import Capability, SubDomain
+from users.models import Product
 
 scenarios("domain-knowledge/requirements/capability-management.feature")
 
@@ -62,6 +69,20 @@ def view_capabilities_in_subdomain(
     return client.get(f"/products/{domain.product.pk}/capabilities/")
 
 
+@when("I scroll to the next page of capabilities", target_fixture="list_response")
+def scroll_to_next_page(
+    client: Client, list_response: HttpResponse, current_product: dict
+) -> HttpResponse:
+    """Load the next page the way the infinite-scroll row does."""
+    match = re.search(r'hx-get="(\?[^"]*cursor=[^"]+)"', list_response.content.decode())
+    assert match, "Expected an infinite-scroll row on the page"
+    domain = current_product.get("domain")
+    return client.get(
+        f"/products/{domain.product.pk}/capabilities/{html.unescape(match.group(1))}",
+        headers={"HX-Request": "true"},
+    )
+
+
 @when(
     parsers.parse('I view the capability "{capability_name}"'),
     target_fixture="detail_response",
@@ -175,11 +196,9 @@ def see_error_message(create_response: HttpResponse, error_message: str) -> None
 @then(parsers.parse("I see {count:d} capabilities"))
 def see_capability_count(list_response: HttpResponse, count: int) -> None:
     """Verify number of capabilities displayed."""
-    import re
-
     content = list_response.content.decode()
     # Count table rows in the capability list (hover pattern for table rows)
-    row_count = len(re.findall(r'<tr class="hover">', content))
+    row_count = len(re.findall(r'<tr id="capability-\d+" class="hover">', content))
     assert row_count == count
 
 
@@ -195,3 +214,156 @@ def see_capability_description(detail_response: HttpResponse, description: str)
     """Verify capability description is displayed."""
     content = detail_response.content.decode()
     assert description in content
+
+
+@given(parsers.parse('I have viewed the capabilities of "{product_name}"'))
+def have_viewed_capabilities(
+    client: Client, db: Any, product_name: str, current_product: dict
+) -> None:
+    """View the capability list once so its table is cached."""
+    product = Product.objects.get(name=product_name)
+    response = client.get(f"/products/{product.pk}/capabilities/")
+    assert response.status_code == 200
+    current_product["etag"] = response["ETag"]
+
+
+@when(
+    parsers.parse('I view the capabilities of "{product_name}" again'),
+    target_fixture="cached_list",
+)
+@when(
+    parsers.parse('I view the capabilities of "{product_name}" again with "{query}"'),
+    target_fixture="cached_list",
+)
+def view_capabilities_again(
+    client: Client, db: Any, product_name: str, query: str = ""
+) -> dict[str, Any]:
+    """View the capability list and record the queries it ran."""
+    product = Product.objects.get(name=product_name)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/products/{product.pk}/capabilities/{query}")
+    assert response.status_code == 200
+    knowledge_queries = [q for q in queries if '"knowledge_' in q["sql"]]
+    return {"response": response, "knowledge_queries": len(knowledge_queries)}
+
+
+@then(parsers.parse('the capability list shows "{capability_name}"'))
+def capability_list_shows(cached_list: dict[str, Any], capability_name: str) -> None:
+    """Verify the capability is listed."""
+    assert capability_name in cached_list["response"].content.decode()
+
+
+@then("the capability list did not query the knowledge tables")
+def capability_list_not_queried(cached_list: dict[str, Any]) -> None:
+    """Verify the table came from the cache."""
+    assert cached_list["knowledge_queries"] == 0
+
+
+@when(
+    parsers.parse('I revalidate the capabilities of "{product_name}"'),
+    target_fixture="cached_list",
+)
+def revalidate_capabilities(
+    client: Client, db: Any, product_name: str, current_product: dict
+) -> dict[str, Any]:
+    """Request the list with the ETag of the earlier view."""
+    product = Product.objects.get(name=product_name)
+    response = client.get(
+        f"/products/{product.pk}/capabilities/",
+        HTTP_IF_NONE_MATCH=current_product["etag"],
+    )
+    return {"response": response}
+
+
+@then("the capability list is not sent again")
+def capability_list_not_sent(cached_list: dict[str, Any]) -> None:
+    """Verify the server answered 304."""
+    assert cached_list["response"].status_code == 304
+
+
+@given(parsers.parse('the product "{product_name}" exists'))
+def product_exists(db: Any, product_name: str) -> None:
+    """Create a product without logging anyone in."""
+    Product.objects.get_or_create(name=product_name, defaults={"is_active": True})
+
+
+@when(
+    parsers.parse('I view the capabilities of "{product_name}" through ASGI'),
+    target_fixture="cached_list",
+)
+def view_capabilities_through_asgi(client: Client, db: Any, product_name: str) -> dict[str, Any]:
+    """View the capability list through Django's ASGI request handler."""
+    product = Product.objects.get(name=product_name)
+    async_client = AsyncClient()
+    async_client.cookies = client.cookies
+    response = async_to_sync(async_client.get)(f"/products/{product.pk}/capabilities/")
+    return {"response": response}
+
+
+@then("I am sent to the login page")
+def sent_to_login_page(cached_list: dict[str, Any]) -> None:
+    """Verify the request was redirected to log in."""
+    response = cached_list["response"]
+    assert response.status_code == 302
+    assert response["Location"].startswith(reverse("users:login"))
+
+
+@when(
+    parsers.parse(
+        'I move the capabilities "{names}" of "{subdomain_name}" to the subdomain "{target_name}"'
+    ),
+    target_fixture="move_response",
+)
+def move_capabilities(
+    client: Client, db: Any, names: str, subdomain_name: str, target_name: str, current_product: dict
+) -> HttpResponse:
+    """Tick capabilities on the list and move them from the move dialog."""
+    product = current_product["product"]
+    capabilities = Capability.objects.filter(
+        subdomain__product=product,
+        subdomain__name=subdomain_name,
+        name__in=[name.strip() for name in names.split(",")],
+    )
+    target = SubDomain.objects.get(product=product, name=target_name)
+    return client.post(
+        f"/products/{product.pk}/capabilities/move/",
+        {"items": [capability.pk for capability in capabilities], "target": target.pk},
+        HTTP_HX_REQUEST="true",
+    )
+
+
+@then(parsers.parse('the capabilities "{names}" are in the subdomain "{subdomain_name}"'))
+def capabilities_are_in(db: Any, names: str, subdomain_name: str, current_product: dict) -> None:
+    """Verify the capabilities now belong to the subdomain."""
+    expected = sorted(name.strip() for name in names.split(","))
+    subdomain = SubDomain.objects.get(product=current_product["product"], name=subdomain_name)
+    assert sorted(subdomain.capabilities.values_list("name", flat=True)) == expected
+
+
+@then(
+    parsers.re(
+        r'the subdomain "(?P<subdomain_name>[^"]+)" holds (?P<count>\d+) capabilit(?:y|ies)'
+    ),
+    converters={"count": int},
+)
+def subdomain_holds(db: Any, subdomain_name: str, count: int, current_product: dict) -> None:
+    """Verify the stored capability counter of a subdomain."""
+    subdomain = SubDomain.objects.get(product=current_product["product"], name=subdomain_name)
+    assert subdomain.capability_count == count
+
+
+@then("the capability list is reloaded")
+def capability_list_reloaded(move_response: HttpResponse) -> None:
+    """Verify htmx is told to reload the list the capabilities moved on."""
+    assert move_response.status_code == 200
+    assert move_response["HX-Refresh"] == "true"
+
+
+@then(parsers.parse('the move to "{target_name}" is refused for the names "{names}"'))
+def move_refused(move_response: HttpResponse, target_name: str, names: str) -> None:
+    """Verify the form names every clash at once."""
+    assert move_response.status_code == 200
+    clashes = ", ".join(f'"{name.strip()}"' for name in names.split(","))
+    assert move_response.context["form"].non_field_errors() == [
+        f'Nothing was moved: "{target_name}" would have more than one capability named {clashes}.'
+    ]
@@ -1,12 +1,24 @@
 """E2E tests for domain management feature."""
 
+import re
+from io import StringIO
 from typing import Any
 
+from django.core.management import call_command
+from django.db import connection
 from django.http import HttpResponse
 from django.test import Client
-from pytest_bdd import parsers, scenarios, then, when
-
-from knowledge.models import Domain
+from django.test.utils import CaptureQueriesContext
+from django.utils.html import escape, strip_tags
+from pytest_bdd import given, parsers, scenarios, then, when
+
+from knowledge.models import (
+    Capability,
+    Domain,
+    KnowledgeDeletion,
+    ProductKnowledgeStats,
+    SubDomain,
+)
 from users.models import Product
 
 scenarios("domain-knowledge/requirements/domain-management.feature")
@@ -113,6 +125,25 @@ def delete_domain(
     )
 
 
+@when(
+    parsers.parse('I open the delete page of the domain "{domain_name}"'),
+    target_fixture="delete_page",
+)
+def open_delete_page(
+    client: Client, db: Any, domain_name: str, current_product: dict
+) -> HttpResponse:
+    """Open the delete confirmation page of a domain."""
+    domain = Domain.objects.get(name=domain_name, product=current_product["product"])
+    return client.get(f"/products/{domain.product.pk}/domains/{domain.pk}/delete/")
+
+
+@then(parsers.parse("I am warned that {contents} will also be deleted"))
+def warned_about_cascade(delete_page: HttpResponse, contents: str) -> None:
+    """Verify the confirmation page names what goes with the domain."""
+    text = " ".join(strip_tags(delete_page.content.decode()).split())
+    assert f"This will also delete {contents}." in text
+
+
 @then(parsers.parse('the domain "{domain_name}" exists in "{product_name}"'))
 def domain_exists(db: Any, domain_name: str, product_name: str) -> None:
     """Verify domain exists."""
@@ -147,11 +178,9 @@ def see_error_message(create_response: HttpResponse, error_message: str) -> None
 @then(parsers.parse("I see {count:d} domains"))
 def see_domain_count(list_response: HttpResponse, count: int) -> None:
     """Verify number of domains displayed."""
-    import re
-
     content = list_response.content.decode()
     # Count table rows in the domain list (hover pattern for table rows)
-    row_count = len(re.findall(r'<tr class="hover">', content))
+    row_count = len(re.findall(r'<tr id="domain-\d+" class="hover">', content))
     assert row_count == count
 
 
@@ -177,3 +206,212 @@ def subdomain_no_longer_exists(
     from knowledge.models import SubDomain
     domain = current_product.get("domain")
     assert not SubDomain.objects.filter(name=subdomain_name, domain=domain).exists()
+
+
+@given(parsers.parse('the counters of "{product_name}" have drifted'))
+def counters_drifted(db: Any, product_name: str) -> None:
+    """Corrupt the stored counters of a product."""
+    product = Product.objects.get(name=product_name)
+    Domain.objects.filter(product=product).update(subdomain_count=7, capability_count=0)
+    ProductKnowledgeStats.objects.filter(product=product).update(domain_count=5)
+
+
+@when(parsers.parse('the capability "{capability_name}" is moved to the subdomain "{subdomain_name}"'))
+def move_capability(
+    db: Any, capability_name: str, subdomain_name: str, current_product: dict
+) -> None:
+    """Reassign a capability to another subdomain of the product."""
+    product = current_product["product"]
+    capability = Capability.objects.get(product=product, name=capability_name)
+    capability.subdomain = SubDomain.objects.get(product=product, name=subdomain_name)
+    capability.save()
+
+
+@when(parsers.parse('I recount the knowledge of "{product_name}"'))
+def recount_knowledge(db: Any, product_name: str) -> None:
+    """Run the recount_knowledge management command for a product."""
+    product = Product.objects.get(name=product_name)
+    call_command("recount_knowledge", str(product.pk))
+
+
+
+@given(parsers.parse("knowledge is deleted in batches of {batch_size:d} rows"))
+def delete_batch_size(settings: Any, batch_size: int) -> None:
+    """Delete anything with more rows below it in the background."""
+    settings.KNOWLEDGE_DELETE_BATCH_SIZE = batch_size
+
+
+@then(parsers.parse('the domain "{domain_name}" is being deleted'))
+def domain_being_deleted(
+    delete_response: HttpResponse, domain_name: str, current_product: dict
+) -> None:
+    """Verify the domain was hidden and its deletion has not run yet."""
+    content = delete_response.content.decode()
+    assert escape(f'Domain "{domain_name}" is being deleted') in content
+    deletion = KnowledgeDeletion.objects.get(
+        product=current_product["product"], name=domain_name
+    )
+    assert deletion.finished_at is None
+    assert deletion.progress == 0
+    assert Domain.objects.filter(pk=deletion.object_id, is_deleting=True).exists()
+
+
+@when("the background jobs have run")
+def background_jobs_run(db: Any) -> None:
+    """Run the ready background jobs in this process."""
+    call_command("run_worker", "--burst", "--processes", "1", stdout=StringIO())
+
+
+@then(parsers.parse('the deletion of "{domain_name}" is finished'))
+def deletion_finished(db: Any, domain_name: str, current_product: dict) -> None:
+    """Verify every row of the domain was deleted."""
+    deletion = KnowledgeDeletion.objects.get(
+        product=current_product["product"], name=domain_name
+    )
+    assert deletion.finished_at is not None
+    assert deletion.deleted == deletion.total == 4
+    assert deletion.progress == 100
+    assert not Domain.objects.filter(pk=deletion.object_id).exists()
+
+@then(parsers.parse('the domain "{domain_name}" is listed with "{contents}"'))
+def domain_listed_with(list_response: HttpResponse, domain_name: str, contents: str) -> None:
+    """Verify the contents shown in a domain's row."""
+    content = re.sub(r"\s+", " ", list_response.content.decode())
+    row = content[content.index(domain_name):]
+    row = row[: row.index("</tr>")]
+    assert contents in row
+
+
+@then(
+    parsers.re(
+        r'"(?P<product_name>[^"]+)" holds (?P<domains>\d+) domains?, '
+        r"(?P<subdomains>\d+) subdomains? and (?P<capabilities>\d+) capabilit(?:y|ies)"
+    ),
+    converters={"domains": int, "subdomains": int, "capabilities": int},
+)
+def product_holds(
+    db: Any, product_name: str, domains: int, subdomains: int, capabilities: int
+) -> None:
+    """Verify the stored knowledge totals of a product."""
+    stats = ProductKnowledgeStats.objects.get(product__name=product_name)
+    assert (stats.domain_count, stats.subdomain_count, stats.capability_count) == (
+        domains,
+        subdomains,
+        capabilities,
+    )
+
+
+def htmx_headers(product: Product) -> dict[str, str]:
+    """Headers htmx sends from the product's domain list."""
+    return {
+        "HX-Request": "true",
+        "HX-Current-URL": f"http://testserver/products/{product.pk}/domains/",
+    }
+
+
+@when(
+    parsers.parse('I open the edit form of the domain "{domain_name}" from the domain list'),
+    target_fixture="htmx_response",
+)
+def open_edit_form_in_place(
+    client: Client, db: Any, domain_name: str, current_product: dict
+) -> HttpResponse:
+    """Request the edit form the way the list's Edit button does."""
+    product = current_product["product"]
+    domain = Domain.objects.get(name=domain_name, product=product)
+    return client.get(
+        f"/products/{product.pk}/domains/{domain.pk}/edit/",
+        headers=htmx_headers(product),
+    )
+
+
+@when(
+    parsers.parse(
+        'I rename the domain "{domain_name}" to "{new_name}" from the domain list'
+    ),
+    target_fixture="htmx_response",
+)
+def rename_domain_in_place(
+    client: Client, db: Any, domain_name: str, new_name: str, current_product: dict
+) -> HttpResponse:
+    """Submit the edit form from the list's dialog."""
+    product = current_product["product"]
+    domain = Domain.objects.get(name=domain_name, product=product)
+    return client.post(
+        f"/products/{product.pk}/domains/{domain.pk}/edit/",
+        {"name": new_name, "description": domain.description},
+        headers=htmx_headers(product),
+    )
+
+
+@when(
+    parsers.parse('I delete the domain "{domain_name}" from the domain list'),
+    target_fixture="htmx_response",
+)
+def delete_domain_in_place(
+    client: Client, db: Any, domain_name: str, current_product: dict
+) -> HttpResponse:
+    """Confirm the deletion from the list's dialog."""
+    product = current_product["product"]
+    domain = Domain.objects.get(name=domain_name, product=product)
+    current_product["deleted_row_id"] = f"domain-{domain.pk}"
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(
+            f"/products/{product.pk}/domains/{domain.pk}/delete/",
+            headers=htmx_headers(product),
+        )
+    current_product["stats_updates"] = sum(
+        q["sql"].startswith('UPDATE "knowledge_productknowledgestats"') for q in queries
+    )
+    return response
+
+
+@then("I receive the form without the page layout")
+def form_without_layout(htmx_response: HttpResponse) -> None:
+    """Verify only the form is rendered, set up to post back with htmx."""
+    content = htmx_response.content.decode()
+    assert htmx_response.status_code == 200
+    assert "<html" not in content
+    assert "Back to Products" not in content
+    assert 'hx-post="' in content
+    assert 'name="name"' in content
+
+
+@then(parsers.parse('I receive only the row of the domain "{domain_name}"'))
+def only_domain_row(
+    htmx_response: HttpResponse, domain_name: str, current_product: dict
+) -> None:
+    """Verify the response swaps the domain's row out of band and nothing else."""
+    content = htmx_response.content.decode()
+    domain = Domain.objects.get(name=domain_name, product=current_product["product"])
+    assert htmx_response.status_code == 200
+    assert content.count("<tr") == 1
+    assert f'<tr id="domain-{domain.pk}" class="hover" hx-swap-oob="true">' in content
+    assert domain_name in content
+    assert "<html" not in content
+
+
+@then(parsers.parse('the toast "{message}" is shown'))
+def toast_shown(htmx_response: HttpResponse, message: str) -> None:
+    """Verify the flash message comes along as an out-of-band toast."""
+    content = htmx_response.content.decode()
+    toasts = content[content.index('<div id="toasts" hx-swap-oob="beforeend">') :]
+    assert escape(message) in toasts
+
+
+@then(parsers.parse('the row of the domain "{domain_name}" is removed'))
+def domain_row_removed(
+    htmx_response: HttpResponse, domain_name: str, current_product: dict
+) -> None:
+    """Verify the response deletes the domain's row out of band."""
+    row_id = current_product["deleted_row_id"]
+    content = htmx_response.content.decode()
+    assert f'<tr id="{row_id}" hx-swap-oob="delete"></tr>' in content
+    assert "<html" not in content
+
+
+@then(parsers.parse('the statistics of "{product_name}" were updated {count:d} times'))
+def stats_updated(product_name: str, count: int, current_product: dict) -> None:
+    """Verify the delete wrote the product's statistics row once per change."""
+    # One write takes the subtree off the counters, one records the change.
+    assert current_product["stats_updates"] == count
@@ -0,0 +1,205 @@
+"""E2E tests for the knowledge API feature."""
+
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from pytest_bdd import given, parsers, scenarios, then, when
+
+from knowledge.deletion import delete_in_background
+from knowledge.models import SubDomain
+from users.models import Product
+
+scenarios("domain-knowledge/requirements/knowledge-api.feature")
+
+
+@when(
+    parsers.parse('I request the domains API with "{query}"'),
+    target_fixture="api_response",
+)
+def request_domains_api(
+    client: Client, db: Any, query: str, current_product: dict
+) -> dict[str, Any]:
+    """Request the domain list endpoint of the current product."""
+    product = current_product["product"]
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/api/products/{product.pk}/domains/?{query}")
+    return {"response": response, "queries": len(queries)}
+
+
+@when(
+    parsers.parse('I request the domains API of "{product_name}"'),
+    target_fixture="api_response",
+)
+def request_domains_api_of(
+    client: Client, db: Any, product_name: str
+) -> dict[str, Any]:
+    """Request the domain list endpoint of a named product."""
+    product = Product.objects.get(name=product_name)
+    return {"response": client.get(f"/api/products/{product.pk}/domains/")}
+
+
+@then(
+    parsers.parse(
+        'the API lists domain "{domain_name}" with subdomain "{subdomain_name}" '
+        'and capability "{capability_name}"'
+    )
+)
+def api_lists_tree(
+    api_response: dict[str, Any],
+    domain_name: str,
+    subdomain_name: str,
+    capability_name: str,
+) -> None:
+    """Verify the nested structure of the response."""
+    response = api_response["response"]
+    assert response.status_code == 200
+    (domain,) = [d for d in response.json()["results"] if d["name"] == domain_name]
+    (subdomain,) = [s for s in domain["subdomains"] if s["name"] == subdomain_name]
+    assert [c["name"] for c in subdomain["capabilities"]] == [capability_name]
+
+
+@given(
+    parsers.parse('the subdomain "{subdomain_name}" is being deleted in the background')
+)
+def subdomain_deleted_in_background(
+    db: Any, settings: Any, subdomain_name: str, current_product: dict
+) -> None:
+    """Hide the subdomain for a background deletion that has not run yet."""
+    settings.KNOWLEDGE_DELETE_BATCH_SIZE = 0
+    subdomain = SubDomain.objects.get(
+        product=current_product["product"], name=subdomain_name
+    )
+    assert delete_in_background(subdomain) is not None
+
+
+@then(
+    parsers.parse(
+        'the API lists domain "{domain_name}" with only the subdomains "{subdomain_names}"'
+    )
+)
+def api_lists_only_subdomains(
+    api_response: dict[str, Any], domain_name: str, subdomain_names: str
+) -> None:
+    """Verify the expanded subdomains and the domain's counter agree."""
+    response = api_response["response"]
+    assert response.status_code == 200
+    (domain,) = [d for d in response.json()["results"] if d["name"] == domain_name]
+    expected = [name.strip() for name in subdomain_names.split(",")]
+    assert [s["name"] for s in domain["subdomains"]] == expected
+    assert domain["subdomain_count"] == len(expected)
+
+
+@then(parsers.parse("the API response took at most {count:d} queries"))
+def api_query_count(api_response: dict[str, Any], count: int) -> None:
+    """Verify the number of queries run for the request."""
+    assert api_response["response"].status_code == 200
+    assert api_response["queries"] <= count
+
+
+@then(parsers.parse('each API result has exactly the fields "{fields}"'))
+def api_result_fields(api_response: dict[str, Any], fields: str) -> None:
+    """Verify sparse fieldsets."""
+    results = api_response["response"].json()["results"]
+    assert results
+    for result in results:
+        assert set(result) == set(fields.split(","))
+
+
+@then("the API denies access")
+def api_denies_access(api_response: dict[str, Any]) -> None:
+    """Verify the request was rejected."""
+    assert api_response["response"].status_code == 403
+
+
+@given(
+    "I have fetched the domains API and kept its ETag",
+    target_fixture="validators",
+)
+def fetch_and_keep_etag(
+    client: Client, db: Any, current_product: dict
+) -> dict[str, str]:
+    """Fetch the domain list once and remember its ETag."""
+    product = current_product["product"]
+    response = client.get(f"/api/products/{product.pk}/domains/")
+    assert response.status_code == 200
+    return {"HTTP_IF_NONE_MATCH": response["ETag"]}
+
+
+@given(
+    "I have fetched the domains API and kept the date of that second",
+    target_fixture="validators",
+)
+def fetch_and_keep_date(
+    client: Client, db: Any, current_product: dict
+) -> dict[str, str]:
+    """Fetch the domain list once and remember when, to the second."""
+    product = current_product["product"]
+    response = client.get(f"/api/products/{product.pk}/domains/")
+    assert response.status_code == 200
+    return {"HTTP_IF_MODIFIED_SINCE": http_date(current_product["second"])}
+
+
+@given("every change to the knowledge falls within the same second")
+def knowledge_changes_in_one_second(monkeypatch, current_product: dict) -> None:
+    """Stop the clock of the knowledge versions halfway through a second."""
+    second = int(time.time())
+    now_ns = second * 1_000_000_000 + 500_000_000
+    monkeypatch.setattr("knowledge.cache.time", SimpleNamespace(time_ns=lambda: now_ns))
+    current_product["second"] = second
+
+
+@given(parsers.parse('the product "{product_name}" is renamed to "{new_name}"'))
+def rename_product(db: Any, product_name: str, new_name: str) -> None:
+    """Rename a product."""
+    product = Product.objects.get(name=product_name)
+    product.name = new_name
+    product.save()
+
+
+@when(
+    parsers.re("I request the domains API again with that (ETag|date)"),
+    target_fixture="api_response",
+)
+def request_domains_api_again(
+    client: Client, db: Any, validators: dict[str, str], current_product: dict
+) -> dict[str, Any]:
+    """Send a conditional request with the remembered validator."""
+    product = current_product["product"]
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/api/products/{product.pk}/domains/", **validators)
+    knowledge_queries = [q for q in queries if '"knowledge_' in q["sql"]]
+    return {"response": response, "knowledge_queries": len(knowledge_queries)}
+
+
+@then("the API answers 304 Not Modified")
+def api_not_modified(api_response: dict[str, Any]) -> None:
+    """Verify the response was a 304 with validators."""
+    response = api_response["response"]
+    assert response.status_code == 304
+    assert response.has_header("ETag")
+    assert not response.content
+
+
+@then("the API response has no Last-Modified date")
+def api_no_last_modified(api_response: dict[str, Any]) -> None:
+    """Verify only the exact ETag validator was sent."""
+    assert not api_response["response"].has_header("Last-Modified")
+
+
+@then("the API response ran no knowledge queries")
+def api_no_knowledge_queries(api_response: dict[str, Any]) -> None:
+    """Verify the knowledge tables were not touched."""
+    assert api_response["knowledge_queries"] == 0
+
+
+@then(parsers.re(r"the API lists (?P<count>\d+) domains?"), converters={"count": int})
+def api_lists_domains(api_response: dict[str, Any], count: int) -> None:
+    """Verify a full response was sent."""
+    response = api_response["response"]
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == count
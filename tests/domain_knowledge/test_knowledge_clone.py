@@ -0,0 +1,83 @@
+"""E2E tests for the knowledge clone feature."""
+
+from typing import Any
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils.html import escape
+from pytest_bdd import parsers, scenarios, then, when
+
+from knowledge.models import Capability, Domain, SubDomain
+from users.models import Product
+
+scenarios("domain-knowledge/requirements/knowledge-clone.feature")
+
+
+def _hierarchy(product: Product) -> list[tuple[str, ...]]:
+    """Every row of a product's knowledge by name, with its description."""
+    return sorted(
+        [
+            *Domain.objects.filter(product=product).values_list("name", "description"),
+            *SubDomain.objects.filter(product=product).values_list(
+                "domain__name", "name", "description"
+            ),
+            *Capability.objects.filter(product=product).values_list(
+                "subdomain__domain__name", "subdomain__name", "name", "description"
+            ),
+        ]
+    )
+
+
+@when(
+    parsers.parse('I copy the knowledge of "{source_name}" into "{target_name}"'),
+    target_fixture="clone_result",
+)
+def copy_knowledge(
+    client: Client, db: Any, source_name: str, target_name: str
+) -> dict[str, Any]:
+    """Pick the source product on the copy page of the target."""
+    source = Product.objects.get(name=source_name)
+    target = Product.objects.get(name=target_name)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(f"/products/{target.pk}/clone/", {"source": source.pk})
+    return {"response": response, "queries": len(queries)}
+
+
+@then(parsers.parse('"{target_name}" has the same hierarchy as "{source_name}"'))
+def same_hierarchy(
+    clone_result: dict[str, Any], target_name: str, source_name: str
+) -> None:
+    """Verify every row was copied and the tree page is shown next."""
+    assert clone_result["response"].status_code == 302
+    target = Product.objects.get(name=target_name)
+    source = Product.objects.get(name=source_name)
+    assert _hierarchy(target) == _hierarchy(source)
+    assert (
+        target.knowledge_stats.capability_count
+        == source.knowledge_stats.capability_count
+    )
+
+
+@then(parsers.parse("copying took at most {count:d} queries"))
+def copy_query_count(clone_result: dict[str, Any], count: int) -> None:
+    """Verify the copy does not query once per row."""
+    assert clone_result["queries"] <= count
+
+
+@then(parsers.parse('I am told that "{target_name}" already has domains'))
+def told_target_has_domains(clone_result: dict[str, Any], target_name: str) -> None:
+    """Verify the copy form explains why nothing was copied."""
+    response = clone_result["response"]
+    assert response.status_code == 200
+    assert escape(f'"{target_name}" already has domains') in response.content.decode()
+
+
+@then(parsers.parse('"{product_name}" only has the domain "{domain_name}"'))
+def only_has_domain(db: Any, product_name: str, domain_name: str) -> None:
+    """Verify nothing was copied into the product."""
+    product = Product.objects.get(name=product_name)
+    assert list(
+        Domain.objects.filter(product=product).values_list("name", flat=True)
+    ) == [domain_name]
+    assert not SubDomain.objects.filter(product=product).exists()
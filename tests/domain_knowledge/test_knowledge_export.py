@@ -0,0 +1,92 @@
+"""E2E tests for the knowledge export feature."""
+
+import json
+from typing import Any
+
+from asgiref.sync import async_to_sync
+from django.http import StreamingHttpResponse
+from django.test import AsyncClient, Client
+from pytest_bdd import parsers, scenarios, then, when
+
+from users.models import Product
+
+scenarios("domain-knowledge/requirements/knowledge-export.feature")
+
+
+@when(
+    parsers.parse('I export the knowledge of "{product_name}" as "{export_format}"'),
+    target_fixture="export_response",
+)
+def export_knowledge(
+    client: Client, db: Any, product_name: str, export_format: str
+) -> dict[str, Any]:
+    """Download an export and read the streamed body."""
+    product = Product.objects.get(name=product_name)
+    response = client.get(f"/products/{product.pk}/export/?format={export_format}")
+    body = ""
+    if isinstance(response, StreamingHttpResponse):
+        body = b"".join(response.streaming_content).decode()
+    return {"response": response, "body": body}
+
+
+@when(
+    parsers.parse(
+        'I export the knowledge of "{product_name}" as "{export_format}" through ASGI'
+    ),
+    target_fixture="export_response",
+)
+def export_knowledge_through_asgi(
+    client: Client, db: Any, product_name: str, export_format: str
+) -> dict[str, Any]:
+    """Download an export through Django's ASGI request handler."""
+    product = Product.objects.get(name=product_name)
+    async_client = AsyncClient()
+    async_client.cookies = client.cookies
+
+    async def download() -> dict[str, Any]:
+        response = await async_client.get(
+            f"/products/{product.pk}/export/?format={export_format}"
+        )
+        chunks = [chunk async for chunk in response.streaming_content]
+        return {"response": response, "body": b"".join(chunks).decode()}
+
+    return async_to_sync(download)()
+
+
+@then("the export is streamed asynchronously")
+def export_streamed_asynchronously(export_response: dict[str, Any]) -> None:
+    """Verify the body is an async iterator, which ASGI streams as it goes."""
+    assert export_response["response"].is_async
+
+
+@then(parsers.parse('the export has the row "{row}"'))
+def export_has_row(export_response: dict[str, Any], row: str) -> None:
+    """Verify a CSV row is in the export."""
+    assert export_response["response"].status_code == 200
+    assert row in export_response["body"].splitlines()
+
+
+@then(parsers.parse("the export has {count:d} JSON records"))
+def export_record_count(export_response: dict[str, Any], count: int) -> None:
+    """Verify the number of JSONL records."""
+    assert export_response["response"].status_code == 200
+    assert len(export_response["body"].splitlines()) == count
+
+
+@then(
+    parsers.parse(
+        'the export has a record for domain "{domain_name}" without subdomain'
+    )
+)
+def export_has_empty_domain(export_response: dict[str, Any], domain_name: str) -> None:
+    """Verify a domain without subdomains is exported on its own."""
+    records = [json.loads(line) for line in export_response["body"].splitlines()]
+    assert {"domain": domain_name, "subdomain": ""}.items() <= next(
+        r for r in records if r["domain"] == domain_name
+    ).items()
+
+
+@then("the export is rejected")
+def export_rejected(export_response: dict[str, Any]) -> None:
+    """Verify the export request failed."""
+    assert export_response["response"].status_code == 400
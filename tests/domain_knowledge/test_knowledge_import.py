@@ -0,0 +1,98 @@
+"""E2E tests for the knowledge import feature."""
+
+import csv
+import io
+from typing import Any
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import Client
+from pytest_bdd import parsers, scenarios, then, when
+
+from knowledge.models import Capability, Domain
+from users.models import Product
+
+scenarios("domain-knowledge/requirements/knowledge-import.feature")
+
+
+def _post_import(
+    client: Client, product_name: str, datatable: list[list[str]], dry_run: bool
+) -> HttpResponse:
+    product = Product.objects.get(name=product_name)
+    content = io.StringIO()
+    csv.writer(content).writerows(datatable)
+    data = {"file": SimpleUploadedFile("knowledge.csv", content.getvalue().encode())}
+    if dry_run:
+        data["dry_run"] = "on"
+    return client.post(f"/products/{product.pk}/import/", data, follow=True)
+
+
+@when(
+    parsers.parse('I import the following rows into "{product_name}":'),
+    target_fixture="import_response",
+)
+def import_rows(
+    client: Client, db: Any, product_name: str, datatable: list[list[str]]
+) -> HttpResponse:
+    """Upload the data table as a CSV file."""
+    return _post_import(client, product_name, datatable, dry_run=False)
+
+
+@when(
+    parsers.parse('I dry-run the import of the following rows into "{product_name}":'),
+    target_fixture="import_response",
+)
+def dry_run_import_rows(
+    client: Client, db: Any, product_name: str, datatable: list[list[str]]
+) -> HttpResponse:
+    """Upload the data table as a CSV file in dry-run mode."""
+    return _post_import(client, product_name, datatable, dry_run=True)
+
+
+@then(
+    parsers.parse(
+        'the domain "{domain_name}" has {subdomains:d} subdomain with {capabilities:d} capabilities'
+    )
+)
+def domain_has_children(
+    current_product: dict, domain_name: str, subdomains: int, capabilities: int
+) -> None:
+    """Verify the size of a domain's subtree."""
+    domain = Domain.objects.get(product=current_product["product"], name=domain_name)
+    assert domain.subdomains.count() == subdomains
+    assert sum(s.capabilities.count() for s in domain.subdomains.all()) == capabilities
+
+
+@then(parsers.parse('the domain "{domain_name}" exists in the product'))
+def domain_exists(current_product: dict, domain_name: str) -> None:
+    """Verify a domain was imported."""
+    assert Domain.objects.filter(
+        product=current_product["product"], name=domain_name
+    ).exists()
+
+
+@then(parsers.parse('I see "{text}"'))
+def see_text(import_response: HttpResponse, text: str) -> None:
+    """Verify text on the import page."""
+    assert text in import_response.content.decode()
+
+
+@then("the product has no domains")
+def product_has_no_domains(current_product: dict) -> None:
+    """Verify nothing was written."""
+    assert not Domain.objects.filter(product=current_product["product"]).exists()
+
+
+@then(
+    parsers.parse(
+        'the capability "{capability_name}" now has description "{description}"'
+    )
+)
+def capability_has_description(
+    current_product: dict, capability_name: str, description: str
+) -> None:
+    """Verify an existing capability was updated in place."""
+    capability = Capability.objects.get(
+        product=current_product["product"], name=capability_name
+    )
+    assert capability.description == description
@@ -0,0 +1,82 @@
+"""E2E tests for the knowledge search feature."""
+
+from typing import Any
+
+from django.http import HttpResponse
+from django.test import Client
+from pytest_bdd import parsers, scenarios, then, when
+
+from users.models import Product
+
+scenarios("domain-knowledge/requirements/knowledge-search.feature")
+
+
+@when(
+    parsers.parse('I search "{product_name}" for "{query}"'),
+    target_fixture="search_response",
+)
+def search_product(
+    client: Client, db: Any, product_name: str, query: str
+) -> HttpResponse:
+    """Run a search from the search page."""
+    product = Product.objects.get(name=product_name)
+    return client.get(f"/products/{product.pk}/search/", {"q": query})
+
+
+@when(
+    parsers.parse('I search the API of "{product_name}" for "{query}"'),
+    target_fixture="search_api_response",
+)
+def search_api(client: Client, db: Any, product_name: str, query: str) -> HttpResponse:
+    """Run a search through the API."""
+    product = Product.objects.get(name=product_name)
+    return client.get(f"/api/products/{product.pk}/search/", {"q": query})
+
+
+@then(parsers.parse('the search results are "{names}"'))
+def search_results_are(search_response: HttpResponse, names: str) -> None:
+    """Verify the results and their order."""
+    assert search_response.status_code == 200
+    results = search_response.context["results"]
+    assert [r.name.replace("<mark>", "").replace("</mark>", "") for r in results] == [
+        name.strip() for name in names.split(",")
+    ]
+
+
+@then(parsers.parse('the result "{name}" is shown in "{path}"'))
+def result_path(search_response: HttpResponse, name: str, path: str) -> None:
+    """Verify the parent path shown for a result."""
+    (result,) = search_response.context["results"]
+    assert " / ".join(result.path) == path
+    assert f"in {path}" in search_response.content.decode()
+
+
+@then(parsers.parse('the match "{word}" is highlighted'))
+def match_highlighted(search_response: HttpResponse, word: str) -> None:
+    """Verify matches are wrapped in <mark> tags."""
+    assert f"<mark>{word}</mark>" in search_response.content.decode()
+
+
+@then(parsers.parse('the page does not contain "{text}"'))
+def page_does_not_contain(search_response: HttpResponse, text: str) -> None:
+    """Verify the text is not rendered unescaped."""
+    assert search_response.status_code == 200
+    assert search_response.context["results"]
+    assert text not in search_response.content.decode()
+
+
+@then(parsers.parse('the API search returns the subdomain "{name}"'))
+def api_search_returns(search_api_response: HttpResponse, name: str) -> None:
+    """Verify the API result payload."""
+    assert search_api_response.status_code == 200
+    (result,) = search_api_response.json()["results"]
+    assert result["kind"] == "subdomain"
+    assert result["name"] == f"<mark>{name}</mark>"
+    assert result["path"] == ["User Access"]
+
+
+@then("there are no search results")
+def no_search_results(search_response: HttpResponse) -> None:
+    """Verify nothing matched."""
+    assert search_response.status_code == 200
+    assert search_response.context["results"] == []
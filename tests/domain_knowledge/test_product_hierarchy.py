@@ -0,0 +1,111 @@
+"""E2E tests for the product hierarchy feature."""
+
+from typing import Any
+
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from pytest_bdd import given, parsers, scenarios, then, when
+
+from knowledge.models import SubDomain
+from users.models import Product
+
+scenarios("domain-knowledge/requirements/product-hierarchy.feature")
+
+
+@when(
+    parsers.parse('I view the hierarchy of "{product_name}"'),
+    target_fixture="tree_response",
+)
+def view_hierarchy(client: Client, db: Any, product_name: str) -> HttpResponse:
+    """View the hierarchy page."""
+    product = Product.objects.get(name=product_name)
+    return client.get(f"/products/{product.pk}/tree/")
+
+
+@given(parsers.parse('I have requested the hierarchy JSON of "{product_name}"'))
+def have_requested_hierarchy_json(client: Client, db: Any, product_name: str) -> None:
+    """Request the hierarchy once so the snapshot is cached."""
+    product = Product.objects.get(name=product_name)
+    assert client.get(f"/api/products/{product.pk}/tree/").status_code == 200
+
+
+@when(
+    parsers.parse(
+        'I add the capability "{capability_name}" to subdomain "{subdomain_name}"'
+    )
+)
+def add_capability(
+    client: Client,
+    db: Any,
+    capability_name: str,
+    subdomain_name: str,
+    current_product: dict,
+) -> None:
+    """Create a capability through the form."""
+    domain = current_product["domain"]
+    subdomain = SubDomain.objects.get(domain=domain, name=subdomain_name)
+    response = client.post(
+        f"/products/{domain.product.pk}/domains/{domain.pk}/subdomains/{subdomain.pk}/capabilities/new/",
+        {"name": capability_name, "description": ""},
+    )
+    assert response.status_code == 302
+
+
+@when(
+    parsers.parse('I request the hierarchy JSON of "{product_name}"'),
+    target_fixture="tree_json",
+)
+def request_hierarchy_json(
+    client: Client, db: Any, product_name: str
+) -> dict[str, Any]:
+    """Request the hierarchy endpoint and record the queries it ran."""
+    product = Product.objects.get(name=product_name)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/api/products/{product.pk}/tree/")
+    assert response.status_code == 200
+    knowledge_queries = [q for q in queries if '"knowledge_' in q["sql"]]
+    return {"tree": response.json(), "knowledge_queries": len(knowledge_queries)}
+
+
+@then(
+    parsers.parse(
+        'I see "{domain_name}", "{subdomain_name}" and "{capability_name}" in the hierarchy'
+    )
+)
+def see_hierarchy(
+    tree_response: HttpResponse,
+    domain_name: str,
+    subdomain_name: str,
+    capability_name: str,
+) -> None:
+    """Verify the hierarchy page lists every level."""
+    assert tree_response.status_code == 200
+    content = tree_response.content.decode()
+    for name in (domain_name, subdomain_name, capability_name):
+        assert name in content
+
+
+@then(
+    parsers.parse(
+        "the JSON hierarchy has {domains:d} domain, {subdomains:d} subdomains "
+        "and {capabilities:d} capabilities"
+    )
+)
+def json_hierarchy_counts(
+    tree_json: dict[str, Any], domains: int, subdomains: int, capabilities: int
+) -> None:
+    """Verify the size of each level of the tree."""
+    tree = tree_json["tree"]
+    all_subdomains = [s for d in tree["domains"] for s in d["subdomains"]]
+    all_capabilities = [c for s in all_subdomains for c in s["capabilities"]]
+    assert len(tree["domains"]) == domains
+    assert len(all_subdomains) == subdomains
+    assert len(all_capabilities) == capabilities
+
+
+@then(parsers.parse("the knowledge tables were queried {count:d} times"))
+def knowledge_query_count(tree_json: dict[str, Any], count: int) -> None:
+    """Verify how many queries touched the knowledge tables."""
+    assert tree_json["knowledge_queries"] == count
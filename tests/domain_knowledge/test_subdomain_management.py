@@ -4,9 +4,11 @@ from typing import Any
 
 from django.http import HttpResponse
 from django.test import Client
+from django.utils.html import escape
 from pytest_bdd import parsers, scenarios, then, when
 
 from knowledge.models import Capability, Domain, SubDomain
+from users.models import Product
 
 scenarios("domain-knowledge/requirements/subdomain-management.feature")
 
@@ -170,7 +172,7 @@ def see_subdomain_count(list_response: HttpResponse, count: int) -> None:
 
     content = list_response.content.decode()
     # Count table rows in the subdomain list (hover pattern for table rows)
-    row_count = len(re.findall(r'<tr class="hover">', content))
+    row_count = len(re.findall(r'<tr id="subdomain-\d+" class="hover">', content))
     assert row_count == count
 
 
@@ -195,3 +197,89 @@ def capability_no_longer_exists(
     """Verify capability was deleted (cascade)."""
     subdomain = current_product.get("subdomain")
     assert not Capability.objects.filter(name=capability_name, subdomain=subdomain).exists()
+
+
+@then(parsers.parse('the suggestion "{label}" opens the new subdomain form'))
+def suggestion_opens_form(client: Client, lookup_response: HttpResponse, label: str) -> None:
+    """Follow a suggestion to the subdomain form of that domain."""
+    (url,) = [url for option, url in lookup_response.context["options"] if option == label]
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.context["domain"].name == label
+
+
+@when(parsers.parse('the domain "{domain_name}" is moved to the product "{product_name}"'))
+def move_domain(db: Any, domain_name: str, product_name: str, current_product: dict) -> None:
+    """Reassign a domain to another product."""
+    domain = Domain.objects.get(product=current_product["product"], name=domain_name)
+    domain.product, _ = Product.objects.get_or_create(name=product_name)
+    domain.save()
+
+
+@then(parsers.parse('the subdomain "{subdomain_name}" belongs to "{product_name}"'))
+def subdomain_belongs_to(db: Any, subdomain_name: str, product_name: str) -> None:
+    """Verify the denormalized product of a subdomain."""
+    subdomain = SubDomain.objects.get(domain__product__name=product_name, name=subdomain_name)
+    assert subdomain.product.name == product_name
+
+
+@then(parsers.parse('the capability "{capability_name}" belongs to "{product_name}"'))
+def capability_belongs_to(db: Any, capability_name: str, product_name: str) -> None:
+    """Verify the denormalized product of a capability."""
+    capability = Capability.objects.get(
+        subdomain__domain__product__name=product_name, name=capability_name
+    )
+    assert capability.product.name == product_name
+
+
+@when(
+    parsers.parse(
+        'I move the subdomains "{names}" of "{domain_name}" to the domain "{target_name}"'
+    ),
+    target_fixture="move_response",
+)
+def move_subdomains(
+    client: Client, db: Any, names: str, domain_name: str, target_name: str, current_product: dict
+) -> HttpResponse:
+    """Tick subdomains on the list and move them with the move form."""
+    product = current_product["product"]
+    subdomains = SubDomain.objects.filter(
+        domain__product=product,
+        domain__name=domain_name,
+        name__in=[name.strip() for name in names.split(",")],
+    )
+    target = Domain.objects.get(product=product, name=target_name)
+    return client.post(
+        f"/products/{product.pk}/subdomains/move/",
+        {"items": [subdomain.pk for subdomain in subdomains], "target": target.pk},
+        follow=True,
+    )
+
+
+@then(parsers.parse('I am told that {count:d} subdomains were moved to "{domain_name}"'))
+def told_subdomains_moved(move_response: HttpResponse, count: int, domain_name: str) -> None:
+    """Verify the list page reports the move."""
+    assert move_response.status_code == 200
+    assert escape(f'Moved {count} subdomains to "{domain_name}".') in move_response.content.decode()
+
+
+@when(
+    parsers.parse('I pick a domain matching "{text}" to move subdomains to'),
+    target_fixture="lookup_response",
+)
+def pick_move_target(client: Client, db: Any, text: str, current_product: dict) -> HttpResponse:
+    """Request the typeahead of the move form."""
+    product = current_product["product"]
+    return client.get(
+        f"/products/{product.pk}/domains/lookup/",
+        {"q": text, "pick": "target"},
+        HTTP_HX_REQUEST="true",
+    )
+
+
+@then(parsers.parse('the domain "{domain_name}" can be picked'))
+def domain_can_be_picked(lookup_response: HttpResponse, domain_name: str, current_product: dict) -> None:
+    """Verify the typeahead offers the domain as a choice of the target field."""
+    domain = Domain.objects.get(product=current_product["product"], name=domain_name)
+    assert lookup_response.context["choices"] == [(domain_name, domain.pk)]
+    assert f'name="target" value="{domain.pk}"' in lookup_response.content.decode()
@@ -0,0 +1,263 @@
+"""Query-count and latency benchmarks for every product and home page view.
+
+Each view is requested against products seeded at several sizes. For every
+request we record the number of queries, time spent in the database, the
+rest of the request time (view + template rendering) and the response size.
+
+The run fails when a view's query count differs between sizes (an N+1 query)
+or exceeds the checked-in baseline in ``baselines.json``. Timings and sizes
+are informational. To refresh the baselines after an intended change, run:
+
+    UPDATE_PERF_BASELINES=1 pytest tests/performance
+
+Set PERF_REPORT=path.json to write every measurement to a file.
+"""
+
+import json
+import os
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+
+import core.urls
+import knowledge.api_urls
+import knowledge.urls
+from knowledge.counters import recount_product
+from knowledge.models import Capability, Domain, SubDomain
+from users.models import Product, ProductMembership, User
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+# (domains, subdomains per domain, capabilities per subdomain)
+SIZES: dict[str, tuple[int, int, int]] = {
+    "small": (1, 1, 1),
+    "medium": (3, 4, 5),
+    "large": (8, 10, 12),
+}
+
+
+@dataclass
+class Measurement:
+    url_name: str
+    size: str
+    status: int
+    queries: int
+    db_ms: float
+    render_ms: float
+    bytes: int
+
+
+@dataclass
+class SeededProduct:
+    product: Product
+    domain: Domain
+    subdomain: SubDomain
+    capability: Capability
+
+
+def _product_kwargs(seeded: SeededProduct) -> dict[str, int]:
+    return {"product_id": seeded.product.pk}
+
+
+def _domain_kwargs(seeded: SeededProduct) -> dict[str, int]:
+    return {**_product_kwargs(seeded), "domain_id": seeded.domain.pk}
+
+
+def _subdomain_kwargs(seeded: SeededProduct) -> dict[str, int]:
+    return {**_domain_kwargs(seeded), "subdomain_id": seeded.subdomain.pk}
+
+
+def _capability_kwargs(seeded: SeededProduct) -> dict[str, int]:
+    return {**_subdomain_kwargs(seeded), "capability_id": seeded.capability.pk}
+
+
+# URL name -> (kwargs builder, query string). Every URL in core.urls,
+# knowledge.urls and knowledge.api_urls must have an entry.
+CASES: dict[str, tuple[Callable[[SeededProduct], dict[str, int]], str]] = {
+    "core:home": (lambda seeded: {}, ""),
+    "core:metrics": (lambda seeded: {}, ""),
+    "knowledge:product_tree": (_product_kwargs, ""),
+    "knowledge:knowledge_search": (_product_kwargs, "?q=capability"),
+    "knowledge:knowledge_export": (_product_kwargs, "?format=csv"),
+    "knowledge:knowledge_import": (_product_kwargs, ""),
+    "knowledge:knowledge_clone": (_product_kwargs, ""),
+    "knowledge:domain_list": (_product_kwargs, ""),
+    "knowledge:domain_lookup": (_product_kwargs, "?q=domain"),
+    "knowledge:domain_create": (_product_kwargs, ""),
+    "knowledge:domain_update": (_domain_kwargs, ""),
+    "knowledge:domain_delete": (_domain_kwargs, ""),
+    "knowledge:subdomain_list": (_product_kwargs, ""),
+    "knowledge:subdomain_lookup": (_product_kwargs, "?q=subdomain"),
+    "knowledge:subdomain_move": (_product_kwargs, ""),
+    "knowledge:subdomain_create": (_domain_kwargs, ""),
+    "knowledge:subdomain_update": (_subdomain_kwargs, ""),
+    "knowledge:subdomain_delete": (_subdomain_kwargs, ""),
+    "knowledge:capability_list": (_product_kwargs, ""),
+    "knowledge:capability_move": (_product_kwargs, ""),
+    "knowledge:capability_create": (_subdomain_kwargs, ""),
+    "knowledge:capability_update": (_capability_kwargs, ""),
+    "knowledge:capability_delete": (_capability_kwargs, ""),
+    "knowledge-api:domain-list": (_product_kwargs, "?expand=subdomains.capabilities"),
+    "knowledge-api:domain-detail": (
+        lambda seeded: {**_product_kwargs(seeded), "pk": seeded.domain.pk},
+        "?expand=subdomains.capabilities",
+    ),
+    "knowledge-api:subdomain-list": (_product_kwargs, "?expand=capabilities"),
+    "knowledge-api:subdomain-detail": (
+        lambda seeded: {**_product_kwargs(seeded), "pk": seeded.subdomain.pk},
+        "?expand=capabilities",
+    ),
+    "knowledge-api:capability-list": (_product_kwargs, ""),
+    "knowledge-api:capability-detail": (
+        lambda seeded: {**_product_kwargs(seeded), "pk": seeded.capability.pk},
+        "",
+    ),
+    "knowledge-api:product-tree": (_product_kwargs, ""),
+    "knowledge-api:search": (_product_kwargs, "?q=capability"),
+}
+
+
+def _url_names(module: Any) -> set[str]:
+    names: set[str] = set()
+
+    def walk(patterns: list) -> None:
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                names.add(f"{module.app_name}:{pattern.name}")
+
+    walk(module.urlpatterns)
+    return names
+
+
+def _seed(user: User, label: str, size: tuple[int, int, int]) -> SeededProduct:
+    domains, subdomains, capabilities = size
+    product = Product.objects.create(name=f"Benchmark {label}")
+    ProductMembership.objects.create(
+        user=user, product=product, role=ProductMembership.Role.MANAGER
+    )
+    domain_objs = Domain.objects.bulk_create(
+        Domain(product=product, name=f"Domain {d:03d}") for d in range(domains)
+    )
+    subdomain_objs = SubDomain.objects.bulk_create(
+        SubDomain(domain=domain, product=product, name=f"SubDomain {s:03d}")
+        for domain in domain_objs
+        for s in range(subdomains)
+    )
+    capability_objs = Capability.objects.bulk_create(
+        Capability(subdomain=subdomain, product=product, name=f"Capability {c:03d}")
+        for subdomain in subdomain_objs
+        for c in range(capabilities)
+    )
+    recount_product(product.pk)
+    return SeededProduct(product, domain_objs[0], subdomain_objs[0], capability_objs[0])
+
+
+def _measure(
+    client: Client, url_name: str, size: str, seeded: SeededProduct
+) -> Measurement:
+    kwargs_for, query = CASES[url_name]
+    url = reverse(url_name, kwargs=kwargs_for(seeded)) + query
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.get(url)
+        if isinstance(response, StreamingHttpResponse):
+            size_bytes = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size_bytes = len(response.content)
+        total_ms = (time.perf_counter() - started) * 1000
+    db_ms = sum(float(q["time"]) for q in queries.captured_queries) * 1000
+    return Measurement(
+        url_name=url_name,
+        size=size,
+        status=response.status_code,
+        queries=len(queries),
+        db_ms=round(db_ms, 2),
+        render_ms=round(total_ms - db_ms, 2),
+        bytes=size_bytes,
+    )
+
+
+@pytest.fixture(scope="module")
+def measurements(
+    django_db_setup: Any, django_db_blocker: Any
+) -> dict[str, list[Measurement]]:
+    """Seed every size once and measure every case against it."""
+    results: dict[str, list[Measurement]] = {name: [] for name in CASES}
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            user = User.objects.create_user(username="benchmark", is_staff=True)
+            seeded = {label: _seed(user, label, size) for label, size in SIZES.items()}
+            client = Client()
+            client.force_login(user)
+            # Debug cursors record query timings; force them on for the run.
+            connection.force_debug_cursor = True
+            try:
+                for name in CASES:
+                    # Warm up once so one-off per-process work is not counted.
+                    _measure(client, name, "small", seeded["small"])
+                    for label in SIZES:
+                        results[name].append(
+                            _measure(client, name, label, seeded[label])
+                        )
+            finally:
+                connection.force_debug_cursor = False
+                transaction.set_rollback(True)
+
+    _write_outputs(results)
+    return results
+
+
+def _write_outputs(results: dict[str, list[Measurement]]) -> None:
+    if report_path := os.environ.get("PERF_REPORT"):
+        rows = [asdict(m) for ms in results.values() for m in ms]
+        Path(report_path).write_text(json.dumps(rows, indent=2) + "\n")
+    if os.environ.get("UPDATE_PERF_BASELINES"):
+        baselines = {
+            name: {"queries": max(m.queries for m in ms)}
+            for name, ms in results.items()
+        }
+        BASELINES_PATH.write_text(
+            json.dumps(baselines, indent=2, sort_keys=True) + "\n"
+        )
+
+
+def test_every_url_has_a_benchmark() -> None:
+    """New URLs must be added to CASES (and the baselines) to be guarded."""
+    names = set()
+    for module in (core.urls, knowledge.urls, knowledge.api_urls):
+        names |= _url_names(module)
+    assert names == set(CASES)
+
+
+@pytest.mark.parametrize("url_name", sorted(CASES))
+def test_query_count_is_flat_and_within_baseline(
+    url_name: str, measurements: dict[str, list[Measurement]]
+) -> None:
+    results = measurements[url_name]
+    for measurement in results:
+        assert measurement.status == 200, measurement
+
+    counts = {m.size: m.queries for m in results}
+    assert len(set(counts.values())) == 1, (
+        f"{url_name} query count grows with size: {counts}"
+    )
+
+    baselines = json.loads(BASELINES_PATH.read_text())
+    assert url_name in baselines, f"No baseline for {url_name}; see module docstring"
+    assert max(counts.values()) <= baselines[url_name]["queries"], (
+        f"{url_name} runs {max(counts.values())} queries, "
+        f"baseline is {baselines[url_name]['queries']}"
+    )
@@ -1,4 +1,24 @@
-from pytest_bdd import given, scenario, then, when
+import multiprocessing
+import runpy
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.tasks import TaskResultStatus, task, task_backends
+from django.template import engines
+from django.templatetags.static import static
+from django.urls import get_resolver
+from django.utils import timezone
+from pytest_bdd import given, parsers, scenario, then, when
+from whitenoise.compress import Compressor
+
+from core.checks import check_shared_cache, require_shared_cache
+from core.warmup import warm_up
+from jobs.models import Job
+from jobs.worker import Worker, WorkerLost, requeue_stale
+from users.models import Product, User
 
 
 @scenario(
@@ -9,6 +29,137 @@ def test_health_check():
     pass
 
 
+@scenario(
+    "testing/features/health_check.feature",
+    "Staff read the database connection pool metrics",
+)
+def test_staff_read_metrics():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "Metrics are hidden from other users",
+)
+def test_metrics_hidden():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "Workers compile templates before serving",
+)
+def test_worker_warm_up():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "Browsers cache the stylesheet and receive it compressed",
+)
+def test_static_files():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "Workers run the most urgent background job first",
+)
+def test_job_priority():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "A failing background job is retried before it fails",
+)
+def test_job_retries():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "Only one background job of a product runs at a time",
+)
+def test_job_product_concurrency():
+    pass
+
+
+# Committed, so that the heartbeat's own connection sees the job.
+@pytest.mark.django_db(transaction=True)
+@scenario(
+    "testing/features/health_check.feature",
+    "A worker reports back while its job runs",
+)
+def test_job_heartbeat():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "A job given up on while it runs is not overwritten by its worker",
+)
+def test_job_given_up_on():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "The server runs a single worker on a per-process cache by default",
+)
+def test_default_workers_per_process_cache():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "The server runs a worker per CPU on a shared cache by default",
+)
+def test_default_workers_shared_cache():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "Several workers refuse to start on a per-process cache",
+)
+def test_shared_cache_required():
+    pass
+
+
+@scenario(
+    "testing/features/health_check.feature",
+    "The deployment check warns about a per-process cache",
+)
+def test_shared_cache_deploy_check():
+    pass
+
+
+@task
+def echo(label, product_id=None):
+    return label
+
+
+@task(max_attempts=2)
+def always_fail():
+    raise RuntimeError("This job always fails")
+
+
+@task
+def wait(seconds):
+    time.sleep(seconds)
+
+
+@task(takes_context=True, max_attempts=2)
+def given_up_on(context):
+    # As if the worker had not reported back for a day.
+    Job.objects.filter(pk=context.task_result.id).update(
+        last_attempted_at=timezone.now() - timedelta(days=1)
+    )
+    requeue_stale(task_backends["default"])
+    return "done"
+
+
 @given("the application is running")
 def app_running():
     pass
@@ -22,3 +173,253 @@ def request_admin(client):
 @then("I receive a successful response")
 def check_response(response):
     assert response.status_code == 200
+
+
+@given("I am logged in as a staff member")
+def logged_in_as_staff(client, db):
+    client.force_login(User.objects.create_user(username="operator", is_staff=True))
+
+
+@given("I am logged in as a user without staff access")
+def logged_in_as_non_staff(client, db):
+    client.force_login(User.objects.create_user(username="visitor"))
+
+
+@when("I request the metrics page", target_fixture="response")
+def request_metrics(client):
+    client.get("/admin/login/")  # open a pooled connection in this worker
+    return client.get("/metrics/")
+
+
+@then("the metrics report the database pool utilization")
+def check_pool_metrics(response):
+    body = response.content.decode()
+    assert response["Content-Type"].startswith("text/plain")
+    assert 'skald_db_pool_utilization{alias="default"' in body
+    assert "skald_db_pool_requests_wait_seconds_total" in body
+
+
+@then("I am refused access")
+def check_refused(response):
+    assert response.status_code == 403
+
+
+@when("a worker warms up", target_fixture="warmed_up")
+def worker_warms_up():
+    engine = engines["django"].engine
+    for loader in engine.template_loaders:
+        loader.reset()
+    return warm_up()
+
+
+@then("every page template is compiled")
+def check_templates_compiled(warmed_up):
+    (loader,) = engines["django"].engine.template_loaders
+    cached = loader.get_template_cache
+    assert warmed_up == len(cached)
+    for name in ("base.html", "core/home.html", "knowledge/capability_list.html"):
+        assert name in cached
+
+
+@then("the URL routes are ready")
+def check_urls_ready():
+    assert get_resolver()._populated
+
+
+@given("the static files have been collected")
+def static_files_collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "staticfiles": {
+            "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+        },
+    }
+    # Brotli at full strength is slow; the stylesheet is enough to check.
+    settings.WHITENOISE_SKIP_COMPRESS_EXTENSIONS = [
+        *Compressor.SKIP_COMPRESS_EXTENSIONS,
+        "ttf",
+    ]
+    call_command(
+        "collectstatic",
+        interactive=False,
+        verbosity=0,
+        ignore_patterns=["admin", "rest_framework"],
+    )
+
+
+@when(
+    "my browser requests the stylesheet accepting brotli",
+    target_fixture="response",
+)
+def request_stylesheet(client):
+    return client.get(static("css/output.css"), HTTP_ACCEPT_ENCODING="gzip, br")
+
+
+@then("it receives the brotli-compressed stylesheet")
+def check_brotli(response):
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/css")
+    assert response["Content-Encoding"] == "br"
+
+
+@then("it may keep it without revalidating")
+def check_immutable(response):
+    assert response.request["PATH_INFO"] != "/static/css/output.css"
+    assert "immutable" in response["Cache-Control"]
+
+
+@given(parsers.parse('a background job "{label}" with priority {priority:d}'))
+def job_with_priority(db, label, priority):
+    echo.using(priority=priority).enqueue(label)
+
+
+@given(parsers.parse('a background job "{label}" for product "{product_name}"'))
+def job_for_product(db, label, product_name):
+    product, _ = Product.objects.get_or_create(name=product_name)
+    echo.enqueue(label, product_id=product.pk)
+
+
+@given(parsers.parse('a background job of product "{product_name}" is running'))
+def job_running(db, product_name):
+    product, _ = Product.objects.get_or_create(name=product_name)
+    Job.objects.create(
+        task_path=echo.module_path,
+        product=product,
+        status=TaskResultStatus.RUNNING,
+        last_attempted_at=timezone.now(),
+        worker_ids=["elsewhere:1"],
+    )
+
+
+@given("failed background jobs are retried at once")
+def retry_at_once(settings):
+    default = settings.TASKS["default"]
+    settings.TASKS = {
+        "default": {**default, "OPTIONS": {**default["OPTIONS"], "retry_delay": 0}}
+    }
+
+
+@given(
+    "a background job that fails every time and allows 2 attempts",
+    target_fixture="failing_job",
+)
+def failing_job(db):
+    return always_fail.enqueue()
+
+
+@given(
+    parsers.parse("workers report back on their running job every {interval:f} seconds")
+)
+def heartbeat_every(settings, interval):
+    default = settings.TASKS["default"]
+    options = {**default["OPTIONS"], "heartbeat": interval, "stale_after": 60}
+    settings.TASKS = {"default": {**default, "OPTIONS": options}}
+
+
+@given(
+    parsers.parse("a background job that runs for {seconds:f} seconds"),
+    target_fixture="job_result",
+)
+def slow_job(db, seconds):
+    return wait.enqueue(seconds)
+
+
+@given(
+    "a background job that is given up on while it runs",
+    target_fixture="job_result",
+)
+def job_given_up_on(db):
+    return given_up_on.enqueue()
+
+
+@when("a worker runs the background jobs")
+def worker_runs_jobs(db):
+    Worker(task_backends["default"]).run(burst=True)
+
+
+@then(parsers.parse('the jobs ran in the order "{labels}"'))
+def check_job_order(labels):
+    ran = Job.objects.filter(status=TaskResultStatus.SUCCESSFUL).order_by(
+        "last_attempted_at", "pk"
+    )
+    assert [job.return_value for job in ran] == labels.split(", ")
+
+
+@then("the job failed after 2 attempts")
+def check_job_failed(failing_job):
+    failing_job.refresh()
+    assert failing_job.status == TaskResultStatus.FAILED
+    assert failing_job.attempts == 2
+    assert [error.exception_class for error in failing_job.errors] == [RuntimeError] * 2
+
+
+@then("the job was reported on after it started")
+def check_heartbeat(job_result):
+    job = Job.objects.get(pk=job_result.id)
+    assert job.status == TaskResultStatus.SUCCESSFUL
+    assert job.last_attempted_at - job.started_at >= timedelta(seconds=0.1)
+
+
+@then("the job is waiting to be retried because its worker was lost")
+def check_given_up_on(job_result):
+    job_result.refresh()
+    assert job_result.status == TaskResultStatus.READY
+    assert [error.exception_class for error in job_result.errors] == [WorkerLost]
+    assert Job.objects.get(pk=job_result.id).return_value is None
+
+
+@given("the cache is kept in each process")
+def per_process_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+
+@given("the cache is shared by every process")
+def shared_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "skald_cache",
+        }
+    }
+
+
+@when("the server is configured without WEB_CONCURRENCY", target_fixture="server")
+def server_configured(settings, monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    return runpy.run_path(str(settings.BASE_DIR / "gunicorn.conf.py"))
+
+
+@then(parsers.re(r"it runs (?P<workers>\d+) workers?$"), converters={"workers": int})
+def check_workers(server, workers):
+    assert server["workers"] == workers
+
+
+@then("it runs 2 workers per CPU and one more")
+def check_workers_per_cpu(server):
+    assert server["workers"] == multiprocessing.cpu_count() * 2 + 1
+
+
+@when(parsers.parse("the server starts {workers:d} workers"), target_fixture="refusal")
+def server_starts(workers):
+    with pytest.raises(ImproperlyConfigured) as refusal:
+        require_shared_cache(workers)
+    return refusal.value
+
+
+@then("it refuses to start because the cache is not shared")
+def check_refusal(refusal):
+    assert "Set CACHE_BACKEND" in str(refusal)
+
+
+@when("I run the deployment checks", target_fixture="warnings")
+def run_deploy_checks():
+    return check_shared_cache(None)
+
+
+@then("they warn that revoked access would not reach other workers")
+def check_cache_warning(warnings):
+    assert [warning.id for warning in warnings] == ["core.W001"]
+    assert "Revoked product access" in warnings[0].hint
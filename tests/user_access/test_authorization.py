@@ -6,6 +6,8 @@ from pytest_bdd import given, parsers, scenarios, then, when
 
 from users.models import Product, ProductMembership, User
 
+from .conftest import ROLE_MAP
+
 scenarios("user-access/requirements/authorization.feature")
 
 # Note: Common steps (logged_in_as_admin, logged_in_as_product_manager,
@@ -157,3 +159,69 @@ def see_access_denied(content_action: dict) -> None:
     else:
         # Unassigned user should not have access
         assert not content_action["has_access"], "Expected user to have no membership"
+
+
+def _viewer_membership(product_name: str) -> ProductMembership:
+    return ProductMembership.objects.get(
+        user__username="viewer", product__name=product_name
+    )
+
+
+@given(parsers.parse('I have viewed the domains of "{product_name}"'))
+def have_viewed_domains(client: Client, product_name: str) -> None:
+    """View the domain list so the access lookup is cached."""
+    product = Product.objects.get(name=product_name)
+    response = client.get(f"/products/{product.pk}/domains/")
+    assert response.status_code == 200
+
+
+@given(parsers.parse('I have opened the new domain form of "{product_name}"'))
+def have_opened_domain_form(client: Client, product_name: str) -> None:
+    """Open the domain form so the denied lookup is cached."""
+    product = Product.objects.get(name=product_name)
+    response = client.get(f"/products/{product.pk}/domains/new/")
+    assert response.status_code == 403
+
+
+@when(parsers.parse('my membership in "{product_name}" is removed'))
+def membership_removed(product_name: str) -> None:
+    """Remove the viewer's membership."""
+    _viewer_membership(product_name).delete()
+
+
+@when(parsers.parse('my role in "{product_name}" is changed to "{role}"'))
+def role_changed(product_name: str, role: str) -> None:
+    """Change the viewer's role."""
+    membership = _viewer_membership(product_name)
+    membership.role = ROLE_MAP[role]
+    membership.save()
+
+
+@when(parsers.parse('I view the domains of "{product_name}"'), target_fixture="page_response")
+def view_domains(client: Client, product_name: str) -> HttpResponse:
+    """View the domain list of a product."""
+    product = Product.objects.get(name=product_name)
+    return client.get(f"/products/{product.pk}/domains/")
+
+
+@when(
+    parsers.parse('I open the new domain form of "{product_name}"'),
+    target_fixture="page_response",
+)
+def open_domain_form(client: Client, product_name: str) -> HttpResponse:
+    """Open the new domain form of a product."""
+    product = Product.objects.get(name=product_name)
+    return client.get(f"/products/{product.pk}/domains/new/")
+
+
+@then("I see an access denied page")
+def see_access_denied_page(page_response: HttpResponse) -> None:
+    """Verify the request was rejected with 403."""
+    assert page_response.status_code == 403
+
+
+@then("I see the new domain form")
+def see_new_domain_form(page_response: HttpResponse) -> None:
+    """Verify the domain form is displayed."""
+    assert page_response.status_code == 200
+    assert "New Domain" in page_response.content.decode()
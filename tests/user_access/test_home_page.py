@@ -1,17 +1,29 @@
 """E2E tests for home page feature."""
 
+import re
 from typing import Any
 
+import pytest
+from django.db import connection
 from django.http import HttpResponse
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from pytest_bdd import given, parsers, scenarios, then, when
 
+from knowledge.models import Capability, Domain, SubDomain
 from users.models import Product, ProductMembership, User
 
 scenarios("user-access/requirements/home-page.feature")
 
 
+@pytest.fixture
+def home_queries() -> list[str]:
+    """SQL run by the last 'visit the home page again' step."""
+    return []
+
+
 @given(parsers.parse('I am assigned to "{product_name}" as a product manager'))
+@when(parsers.parse('I am assigned to "{product_name}" as a product manager'))
 def assigned_to_product_as_manager(db: Any, product_name: str, client: Client) -> None:
     """Assign the logged-in user to a product as manager."""
     product, _ = Product.objects.get_or_create(name=product_name, defaults={"is_active": True})
@@ -76,3 +88,47 @@ def redirected_to_domain_list(product_click_response: HttpResponse, product_name
     content = product_click_response.content.decode()
     assert "Domains" in content
     assert product_name in content
+
+
+@given(parsers.parse('"{product_name}" has the capabilities "{names}" in "{domain_name} / {subdomain_name}"'))
+@when(parsers.parse('"{product_name}" has the capabilities "{names}" in "{domain_name} / {subdomain_name}"'))
+def product_has_capabilities(
+    db: Any, product_name: str, names: str, domain_name: str, subdomain_name: str
+) -> None:
+    """Create capabilities, with their domain and subdomain, in a product."""
+    product = Product.objects.get(name=product_name)
+    domain, _ = Domain.objects.get_or_create(product=product, name=domain_name)
+    subdomain, _ = SubDomain.objects.get_or_create(domain=domain, name=subdomain_name)
+    for name in names.split(","):
+        Capability.objects.create(subdomain=subdomain, name=name.strip())
+
+
+@given("I have visited the home page")
+def visited_home_page(client: Client) -> None:
+    """Visit the home page once, so its cards are cached."""
+    assert client.get("/").status_code == 200
+
+
+@when("I visit the home page again", target_fixture="home_response")
+def visit_home_page_again(client: Client, home_queries: list) -> HttpResponse:
+    """Visit the home page and record the queries it ran."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/")
+    home_queries.extend(query["sql"] for query in queries)
+    return response
+
+
+@then(parsers.parse('the card of "{product_name}" shows "{text}"'))
+def card_shows(home_response: HttpResponse, product_name: str, text: str) -> None:
+    """Verify the stats on a product's card."""
+    content = re.sub(r"\s+", " ", home_response.content.decode())
+    card = content[content.index(f"{product_name} </h3>"):]
+    card = card[: card.index("</a>")]
+    assert text in card
+
+
+@then("the home page did not query my products")
+def home_did_not_query_products(home_queries: list) -> None:
+    """Verify the cards were served from the cache."""
+    assert home_queries
+    assert not [sql for sql in home_queries if '"users_productmembership"' in sql]
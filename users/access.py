@@ -0,0 +1,80 @@
+"""Cached product access lookups.
+
+Every product-scoped page resolves the product and the user's membership role.
+Both are cached in Django's cache framework for PRODUCT_ACCESS_CACHE_TTL seconds
+and invalidated by the receivers in ``users.signals``. The ``a``-prefixed
+variants do the same with the async cache and ORM APIs, for async views.
+
+The invalidation only reaches other processes through a shared cache: with
+a per-process cache a revoked member would keep access for up to
+PRODUCT_ACCESS_CACHE_TTL in every other worker. Several workers therefore
+require a shared CACHE_BACKEND (see core.checks).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Product, ProductMembership
+
+_MISSING = object()
+
+# Cached for users without a membership so denied lookups are cached too.
+NO_ROLE = ""
+
+
+def product_cache_key(product_id: int) -> str:
+    return f"users:product:{product_id}"
+
+
+def membership_cache_key(user_id: int, product_id: int) -> str:
+    return f"users:membership:{user_id}:{product_id}"
+
+
+def get_active_product(product_id: int) -> Product | None:
+    """Return the active product with this id, or None if missing or inactive."""
+    key = product_cache_key(product_id)
+    product = cache.get(key, _MISSING)
+    if product is _MISSING:
+        product = Product.objects.filter(pk=product_id, is_active=True).first()
+        cache.set(key, product, settings.PRODUCT_ACCESS_CACHE_TTL)
+    return product
+
+
+async def aget_active_product(product_id: int) -> Product | None:
+    """Async version of get_active_product."""
+    key = product_cache_key(product_id)
+    product = await cache.aget(key, _MISSING)
+    if product is _MISSING:
+        product = await Product.objects.filter(pk=product_id, is_active=True).afirst()
+        await cache.aset(key, product, settings.PRODUCT_ACCESS_CACHE_TTL)
+    return product
+
+
+def get_membership_role(user_id: int, product_id: int) -> str | None:
+    """Return the user's role in the product, or None if not a member."""
+    key = membership_cache_key(user_id, product_id)
+    role = cache.get(key)
+    if role is None:
+        role = (
+            ProductMembership.objects.filter(user_id=user_id, product_id=product_id)
+            .values_list("role", flat=True)
+            .first()
+        ) or NO_ROLE
+        cache.set(key, role, settings.PRODUCT_ACCESS_CACHE_TTL)
+    return role or None
+
+
+async def aget_membership_role(user_id: int, product_id: int) -> str | None:
+    """Async version of get_membership_role."""
+    key = membership_cache_key(user_id, product_id)
+    role = await cache.aget(key)
+    if role is None:
+        role = (
+            await ProductMembership.objects.filter(
+                user_id=user_id, product_id=product_id
+            )
+            .values_list("role", flat=True)
+            .afirst()
+        ) or NO_ROLE
+        await cache.aset(key, role, settings.PRODUCT_ACCESS_CACHE_TTL)
+    return role or None
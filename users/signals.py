@@ -0,0 +1,18 @@
+"""Keep the cached product access lookups in ``users.access`` consistent."""
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .access import membership_cache_key, product_cache_key
+from .models import Product, ProductMembership
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product(sender, instance: Product, **kwargs) -> None:
+    cache.delete(product_cache_key(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=ProductMembership)
+def invalidate_membership(sender, instance: ProductMembership, **kwargs) -> None:
+    cache.delete(membership_cache_key(instance.user_id, instance.product_id))